@@ -0,0 +1,168 @@
+"""
+Economia de tokens do pré-processamento do CV sem perder o perfil.
+
+Cada CV de fixtures/corpus_cvs.json vira um PDF com o ruído típico dos
+currículos reais: nome e contato repetidos no topo de cada página, rodapé
+"Página X de Y", palavras hifenizadas na quebra de linha, datas alinhadas
+com espaços e linhas decorativas. O texto extraído pelo pdf_parser passa
+por `preprocessar_cv` com o orçamento do config e com um orçamento
+apertado (que força o corte de seções).
+
+Para cada CV informa os tokens estimados do texto bruto e do
+pré-processado e confere se o perfil esperado (cargo, nível e as cinco
+habilidades do corpus) continua no texto: todo fato encontrado no texto
+bruto precisa estar no pré-processado. Com --gemini (e GOOGLE_API_KEY),
+também analisa os dois textos com o modelo e compara os perfis extraídos.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_cv_preprocessor [--orcamento-apertado 400] [--gemini]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import textwrap
+import time
+from typing import Dict, List
+
+from config import CV_ORCAMENTO_TOKENS
+from core import ranking
+from core.cv_preprocessor import estimar_tokens, preprocessar_cv
+from core.pdf_parser import extrair_texto_pdf
+
+CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "corpus_cvs.json")
+LARGURA = 80
+LINHAS_POR_PAGINA = 26
+
+
+def _quebrar(texto: str) -> List[str]:
+    """Quebra em linhas de LARGURA caracteres, hifenizando palavras longas como um editor de texto."""
+    linhas, atual = [], ""
+    for palavra in texto.split():
+        espaco = LARGURA - len(atual) - (1 if atual else 0)
+        if len(palavra) <= espaco:
+            atual = f"{atual} {palavra}" if atual else palavra
+            continue
+        if palavra.isalpha() and len(palavra) >= 8 and espaco >= 5:
+            corte = min(espaco - 1, len(palavra) - 3)
+            linhas.append(f"{atual} {palavra[:corte]}-" if atual else f"{palavra[:corte]}-")
+            atual = palavra[corte:]
+            continue
+        linhas.append(atual)
+        atual = palavra
+    if atual:
+        linhas.append(atual)
+    return linhas
+
+
+def _linhas_corpo(cv: Dict) -> List[str]:
+    linhas = [cv["titulo"], "_" * 60, ""]
+    for titulo, itens in cv["secoes"]:
+        linhas.append(titulo.upper() if len(linhas) % 2 else titulo)
+        for item in itens:
+            partes = item.split(" | ")
+            if len(partes) == 3:
+                # Empresa e cargo à esquerda, período alinhado à direita
+                esquerda = f"{partes[0]} - {partes[1]}"
+                linhas.append(esquerda + " " * max(4, LARGURA + 10 - len(esquerda) - len(partes[2])) + partes[2])
+            else:
+                linhas.extend(_quebrar(item))
+        linhas.append("")
+    return linhas
+
+
+def gerar_pdf(cv: Dict) -> bytes:
+    import fitz
+
+    corpo = _linhas_corpo(cv)
+    paginas = [corpo[i:i + LINHAS_POR_PAGINA] for i in range(0, len(corpo), LINHAS_POR_PAGINA)]
+    doc = fitz.open()
+    for numero, linhas in enumerate(paginas, 1):
+        pagina = doc.new_page()
+        topo = [cv["nome"], cv["contato"], ""]
+        base = ["", f"Página {numero} de {len(paginas)}", "Currículo atualizado em 06/2025"]
+        for i, linha in enumerate(topo + linhas + base):
+            if linha:
+                pagina.insert_text((40, 50 + i * 14), linha, fontsize=9)
+    conteudo = doc.tobytes()
+    doc.close()
+    return conteudo
+
+
+def _fatos(texto: str, esperado: Dict) -> Dict[str, bool]:
+    """Quais fatos do perfil esperado aparecem no texto (comparação por termos, sem acentos)."""
+    termos = set(ranking.tokenizar(texto))
+    nivel = ranking.nivel(esperado["nivel_experiencia"])
+    fatos = {"cargo": set(ranking.tokenizar(esperado["cargo_ideal"])) <= termos,
+             "nivel": any(ranking.nivel(t) == nivel for t in termos)}
+    for habilidade in esperado["habilidades_chave"]:
+        fatos[habilidade] = set(ranking.tokenizar(habilidade)) <= termos
+    return fatos
+
+
+def _comparar_gemini(bruto: str, preparado: str) -> str:
+    from core import cv_analyzer
+
+    async def analisar(texto: str) -> Dict:
+        return json.loads(await cv_analyzer._gerar_conteudo(cv_analyzer.PROMPT_ANALISE.format(texto_cv=texto)))
+
+    async def ambos():
+        return await asyncio.gather(analisar(bruto), analisar(preparado))
+
+    antes, depois = asyncio.run(ambos())
+    mesmas = {h.casefold() for h in antes.get("habilidades_chave", [])} & {h.casefold() for h in depois.get("habilidades_chave", [])}
+    iguais = [campo for campo in ("cargo_ideal", "nivel_experiencia")
+              if str(antes.get(campo, "")).casefold() == str(depois.get(campo, "")).casefold()]
+    return f"{'/'.join(iguais) or 'nenhum campo'} igual; habilidades em comum {len(mesmas)}/5"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orcamento-apertado", type=int, default=400, help="segundo orçamento, que força cortes")
+    parser.add_argument("--repeticoes", type=int, default=50, help="execuções para medir o tempo do pré-processamento")
+    parser.add_argument("--gemini", action="store_true", help="compara também os perfis extraídos pelo modelo")
+    args = parser.parse_args()
+
+    with open(CORPUS, encoding="utf-8") as f:
+        corpus = json.load(f)
+    textos = [(cv, extrair_texto_pdf(gerar_pdf(cv))) for cv in corpus]
+
+    falhas = 0
+    for orcamento in (CV_ORCAMENTO_TOKENS, args.orcamento_apertado):
+        print(f"\nOrçamento: {orcamento} tokens")
+        print(f"{'CV':<30}{'págs':>5}{'bruto':>7}{'limpo':>7}{'econ.':>7}{'rep.':>6}{'hif.':>6}{'ms':>7}  perfil")
+        economias = []
+        for cv, bruto in textos:
+            inicio = time.perf_counter()
+            for _ in range(args.repeticoes):
+                resultado = preprocessar_cv(bruto, orcamento)
+            duracao = (time.perf_counter() - inicio) / args.repeticoes
+
+            antes, depois = _fatos(bruto, cv["esperado"]), _fatos(resultado["texto"], cv["esperado"])
+            perdidos = [fato for fato, presente in antes.items() if presente and not depois[fato]]
+            falhas += bool(perdidos)
+            economia = 1 - resultado["tokens"] / resultado["tokens_originais"]
+            economias.append(economia)
+            situacao = f"{sum(depois.values())}/{len(depois)} fatos (bruto {sum(antes.values())}/{len(antes)})"
+            if perdidos:
+                situacao += f" PERDIDOS: {', '.join(perdidos)}"
+            print(f"{cv['nome'][:29]:<30}{bruto.count(chr(12)) + 1:>5}{resultado['tokens_originais']:>7}"
+                  f"{resultado['tokens']:>7}{economia:>7.0%}{resultado['linhas_repetidas']:>6}"
+                  f"{resultado['hifenizacoes']:>6}{duracao * 1000:>7.2f}  {situacao}")
+            if resultado["secoes_cortadas"]:
+                print(textwrap.indent(f"seções cortadas: {', '.join(resultado['secoes_cortadas'])}", " " * 4))
+            if args.gemini and orcamento == CV_ORCAMENTO_TOKENS:
+                print(textwrap.indent(f"Gemini: {_comparar_gemini(bruto, resultado['texto'])}", " " * 4))
+        print(f"Economia média: {statistics.fmean(economias):.0%}")
+
+    total_bruto = sum(estimar_tokens(bruto) for _, bruto in textos)
+    print(f"\n{len(textos)} CVs, {total_bruto} tokens estimados no texto bruto.")
+    if falhas:
+        print(f"{falhas} CV(s) perderam fatos do perfil no pré-processamento.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
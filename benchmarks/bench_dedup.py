@@ -0,0 +1,119 @@
+"""
+Acerto e custo da detecção de vagas republicadas (core/dedup.py).
+
+Confere primeiro os casos fixos: republicações da mesma vaga (outra URL,
+outra grafia do local, sufixo societário na empresa) têm de ser quase
+duplicatas, e vagas parecidas mas diferentes (outro cargo, outro nível,
+outra cidade, outra empresa) não podem ser, porque a impressão fica no
+histórico do usuário e esconderia a vaga dele para sempre. Depois compara
+todos os pares de uma grade de vagas sintéticas (cargos × empresas ×
+cidades, todas diferentes entre si) e mede o tempo por impressão.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_dedup [--repeticoes 20000]
+"""
+import argparse
+import itertools
+import sys
+import time
+from typing import Dict, List
+
+from core import dedup
+
+TITULOS = [
+    "Desenvolvedor Python", "Desenvolvedor Java", "Desenvolvedor Python Júnior", "Desenvolvedor Python Sênior",
+    "Cientista de Dados", "Engenheiro de Dados", "Analista de Dados", "Analista de RH", "Analista Financeiro",
+    "Gerente de Projetos", "Product Manager", "Designer UX", "Engenheiro DevOps", "Engenheiro de Software",
+    "Desenvolvedor Frontend", "Desenvolvedor Backend", "Analista de Suporte", "Analista de Marketing",
+    "Desenvolvedor Full Stack", "Estagiário de TI",
+]
+EMPRESAS = ["Itaú", "Stone", "iFood", "Nubank", "Ambev", "Vale", "Magazine Luiza", "XP Inc", "Globo", "Natura"]
+CIDADES = ["São Paulo, SP", "Rio de Janeiro, RJ", "Curitiba, PR", "Belo Horizonte, MG"]
+
+
+def _vaga(titulo: str, empresa: str, local: str, link: str = "") -> Dict:
+    return {"titulo": titulo, "empresa": empresa, "local": local, "link": link}
+
+
+# (vaga, vaga) que são a mesma vaga republicada.
+REPUBLICACOES = [
+    (_vaga("Desenvolvedor Python", "Nubank", "São Paulo, SP"),
+     _vaga("Desenvolvedor Python", "Nubank", "São Paulo, São Paulo, Brasil")),
+    (_vaga("Desenvolvedor Python", "Itaú Unibanco", "São Paulo, SP"),
+     _vaga("desenvolvedor python", "Itaú Unibanco S.A.", "São Paulo")),
+    (_vaga("Analista de Dados", "Magazine Luiza", "Franca, SP"),
+     _vaga("Analista de Dados", "Magazine Luiza Ltda", "Franca, SP")),
+]
+
+# (vaga, vaga) diferentes que não podem ser tomadas pela mesma.
+DIFERENTES = [
+    (_vaga("Desenvolvedor Python", empresa, "São Paulo, SP"), _vaga("Desenvolvedor Java", empresa, "São Paulo, SP"))
+    for empresa in ("Itaú", "Stone", "iFood")
+] + [
+    (_vaga("Desenvolvedor Python", "iFood", "São Paulo, SP"), _vaga("Cientista de Dados", "iFood", "São Paulo, SP")),
+    (_vaga("Desenvolvedor Python", "Itaú", "Curitiba, PR"), _vaga("Analista de RH", "Itaú", "Rio de Janeiro, RJ")),
+    (_vaga("Desenvolvedor Python", "Nubank", "São Paulo, SP"),
+     _vaga("Desenvolvedor Python Júnior", "Nubank", "São Paulo, SP")),
+    (_vaga("Desenvolvedor Python", "Nubank", "São Paulo, SP"), _vaga("Desenvolvedor Python", "Nubank", "Curitiba, PR")),
+    (_vaga("Desenvolvedor Python", "Nubank", "São Paulo, SP"), _vaga("Desenvolvedor Python", "Stone", "São Paulo, SP")),
+    (_vaga("Analista de Dados", "Banco Inter", "Belo Horizonte, MG"),
+     _vaga("Analista de Dados", "Banco do Brasil", "Belo Horizonte, MG")),
+]
+
+
+def _descrever(vaga: Dict) -> str:
+    return f"{vaga['titulo']} / {vaga['empresa']} / {vaga['local']}"
+
+
+def verificar_casos() -> bool:
+    ok = True
+    for esperado, pares in ((True, REPUBLICACOES), (False, DIFERENTES)):
+        for a, b in pares:
+            obtido = dedup.quase_duplicata(dedup.impressao_vaga(a), [dedup.impressao_vaga(b)])
+            if obtido != esperado:
+                ok = False
+                rotulo = "não detectada" if esperado else "falso positivo"
+                print(f"ERRO ({rotulo}): {_descrever(a)}  x  {_descrever(b)}")
+    total = len(REPUBLICACOES) + len(DIFERENTES)
+    print(f"Casos fixos: {'todos corretos' if ok else 'com erros'} ({total} pares)")
+    return ok
+
+
+def falsos_positivos_grade(vagas: List[Dict]) -> int:
+    impressoes = [dedup.impressao_vaga(vaga) for vaga in vagas]
+    return sum(
+        dedup.quase_duplicata(a, [b]) for a, b in itertools.combinations(impressoes, 2)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=20000, help="impressões calculadas na medição de tempo")
+    args = parser.parse_args()
+
+    ok = verificar_casos()
+
+    grade = [_vaga(t, e, c) for t in TITULOS for e in EMPRESAS for c in CIDADES]
+    pares = len(grade) * (len(grade) - 1) // 2
+    falsos = falsos_positivos_grade(grade)
+    print(f"Grade de {len(grade)} vagas diferentes: {falsos} de {pares} pares tomados pela mesma vaga")
+    ok = ok and falsos == 0
+
+    # Sem o lru_cache, para medir o cálculo e não a consulta ao cache.
+    vagas = [
+        _vaga(f"{vaga['titulo']} {i}", f"{vaga['empresa']} {i}", vaga["local"])
+        for i, vaga in zip(range(args.repeticoes), itertools.cycle(grade))
+    ]
+    dedup._chave_exata.cache_clear()
+    dedup._simhash.cache_clear()
+    inicio = time.perf_counter()
+    for vaga in vagas:
+        dedup.impressao_vaga(vaga)
+    print(f"impressao_vaga: {(time.perf_counter() - inicio) / len(vagas) * 1e6:.1f} µs por vaga")
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Vazão da fila de envio (telegram_bot/envio.py) contra os limites de flood do Telegram.
+
+Um servidor local imita a Bot API com limites parecidos com os do Telegram
+(--limite-global mensagens/s no total e --limite-chat mensagens por chat a
+cada --janela-chat segundos), respondendo 429 com retry_after acima deles.
+O bot é o `telegram.Bot` de verdade apontado para esse servidor.
+
+Cenários:
+1. difusão: uma mensagem para cada um de --chats chats, enviada direto
+   (todas de uma vez, como antes da fila), pela fila com a taxa do config e
+   pela fila com uma taxa acima do limite (a taxa adaptativa e o retry_after
+   têm que evitar as perdas);
+2. rajada em um chat: --rajada mensagens seguidas para o mesmo chat;
+3. agrupamento: várias mensagens de vagas e edições da mesma mensagem
+   pendentes para o mesmo chat viram um envio só, inclusive as respostas
+   de vagas da busca (`responder_agrupavel`, usada pelos handlers).
+
+Informa entregues, recusas (429), duração e latência p50/p95 de cada envio.
+Sai com erro se a fila perder alguma mensagem ou se as respostas de vagas
+pendentes para um chat não saírem em um envio só.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_envio [--chats 300] [--rajada 12] [--taxa-alta 60]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Awaitable, Callable, List
+
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+from benchmarks.fakes import ServidorTelegramFalso
+from config import TELEGRAM_ENVIOS_POR_SEGUNDO
+from telegram_bot import envio
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round((len(ordenados) - 1) * p)))] if ordenados else 0.0
+
+
+async def _medir(envios: List[Callable[[], Awaitable]]) -> dict:
+    latencias, falhas = [], 0
+
+    async def _um(enviar):
+        nonlocal falhas
+        inicio = time.perf_counter()
+        try:
+            await enviar()
+            latencias.append(time.perf_counter() - inicio)
+        except Exception:
+            falhas += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_um(enviar) for enviar in envios))
+    return {"entregues": len(latencias), "falhas": falhas, "duracao": time.perf_counter() - inicio,
+            "p50": _percentil(latencias, 0.5), "p95": _percentil(latencias, 0.95)}
+
+
+def _linha(nome: str, resultado: dict, telegram: ServidorTelegramFalso, recusas_antes: int):
+    print(f"{nome:<28}{resultado['entregues']:>10}{resultado['falhas']:>8}{telegram.recusas - recusas_antes:>8}"
+          f"{resultado['duracao']:>10.2f}{resultado['p50']:>8.2f}{resultado['p95']:>8.2f}")
+
+
+async def _executar(args) -> int:
+    perdas = 0
+    separadas = 0
+    with ServidorTelegramFalso(latencia=args.latencia, max_por_segundo=args.limite_global,
+                               max_por_chat=args.limite_chat, janela_chat=args.janela_chat) as telegram:
+        bot = Bot("123456:TESTE", base_url=f"{telegram.url}/bot",
+                  request=HTTPXRequest(connection_pool_size=128, pool_timeout=30))
+        async with bot:
+            print(f"Bot API falsa: {args.limite_global} msg/s no total, {args.limite_chat} por chat a cada "
+                  f"{args.janela_chat:g} s, latência {args.latencia * 1000:.0f} ms\n")
+            print(f"{'cenário':<28}{'entregues':>10}{'falhas':>8}{'429':>8}{'total s':>10}{'p50 s':>8}{'p95 s':>8}")
+
+            def difusao(funcao, base: int):
+                return [lambda c=c: funcao(c) for c in range(base, base + args.chats)]
+
+            # --- 1. Difusão ---
+            recusas = telegram.recusas
+            resultado = await _medir(difusao(lambda c: bot.send_message(chat_id=c, text="alerta"), 10_000))
+            _linha(f"difusão direta ({args.chats})", resultado, telegram, recusas)
+            await asyncio.sleep(2)
+
+            for taxa, base in ((TELEGRAM_ENVIOS_POR_SEGUNDO, 20_000), (args.taxa_alta, 30_000)):
+                envio.taxa_maxima = taxa
+                recusas = telegram.recusas
+                resultado = await _medir(difusao(lambda c: envio.enviar_mensagem(bot, c, "alerta"), base))
+                _linha(f"difusão pela fila {taxa:g}/s", resultado, telegram, recusas)
+                perdas += resultado["falhas"]
+                envio._fila = None
+                await asyncio.sleep(2)
+            envio.taxa_maxima = TELEGRAM_ENVIOS_POR_SEGUNDO
+
+            # --- 2. Rajada em um chat ---
+            recusas = telegram.recusas
+            resultado = await _medir([lambda i=i: bot.send_message(chat_id=1, text=f"msg {i}") for i in range(args.rajada)])
+            _linha(f"rajada direta ({args.rajada})", resultado, telegram, recusas)
+            await asyncio.sleep(args.janela_chat + 1)
+            recusas = telegram.recusas
+            resultado = await _medir([lambda i=i: envio.enviar_mensagem(bot, 2, f"msg {i}") for i in range(args.rajada)])
+            _linha(f"rajada pela fila ({args.rajada})", resultado, telegram, recusas)
+            perdas += resultado["falhas"]
+
+            # --- 3. Agrupamento ---
+            antes = len(telegram.chamadas)
+            chats = range(40_000, 40_000 + 50)
+            resultado = await _medir([
+                lambda c=c, i=i: envio.enviar_mensagem(bot, c, f"vaga {i}", agrupar="\n\n", parse_mode="HTML")
+                for c in chats for i in range(6)
+            ])
+            perdas += resultado["falhas"]
+            mensagem = await envio.enviar_mensagem(bot, 3, "vagas: 0")
+            edicoes = await _medir([lambda i=i: envio.editar(mensagem, f"vagas: {i}") for i in range(1, 11)])
+            perdas += edicoes["falhas"]
+            enviados = len(telegram.chamadas) - antes
+            print(f"\nAgrupamento: {resultado['entregues']} mensagens de vagas em {len(chats)} chats e "
+                  f"{edicoes['entregues']} edições -> {enviados} chamadas à Bot API "
+                  f"(última edição exibida: {telegram.mensagens(3)[-1]!r})")
+
+            # Respostas de vagas de buscas pendentes para o mesmo chat, como as dos handlers.
+            pergunta = await bot.send_message(chat_id=4, text="Rio de Janeiro")
+            respostas = await asyncio.gather(*(
+                envio.responder_agrupavel(pergunta, f"<b>vaga {i}</b>", parse_mode="HTML", disable_web_page_preview=True)
+                for i in range(5)
+            ))
+            enviadas = telegram.mensagens(4)[1:]
+            juntas = len(enviadas) == 1 and all(agrupada for _, agrupada in respostas)
+            print(f"Respostas de vagas: {len(respostas)} pendentes para um chat -> {len(enviadas)} envio(s)")
+            if not juntas:
+                print("As respostas de vagas pendentes para o mesmo chat não saíram em um envio só.")
+                separadas = 1
+    if perdas:
+        print(f"\nA fila perdeu {perdas} mensagem(ns).")
+    return perdas + separadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=300, help="chats da difusão")
+    parser.add_argument("--rajada", type=int, default=12, help="mensagens seguidas para um mesmo chat")
+    parser.add_argument("--taxa-alta", type=float, default=60, help="taxa da fila acima do limite da Bot API falsa")
+    parser.add_argument("--limite-global", type=int, default=30, help="mensagens/s aceitas pela Bot API falsa")
+    parser.add_argument("--limite-chat", type=int, default=5, help="mensagens por chat aceitas na janela")
+    parser.add_argument("--janela-chat", type=float, default=2.0, help="janela (s) do limite por chat")
+    parser.add_argument("--latencia", type=float, default=0.02, help="latência (s) da Bot API falsa")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(_executar(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
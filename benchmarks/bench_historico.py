@@ -0,0 +1,228 @@
+"""
+Tamanho e latência do histórico de envios com milhões de linhas.
+
+Compara três formas de guardar "vaga X já foi enviada ao usuário Y":
+
+- legado_url: a tabela historico_vagas original (id AUTOINCREMENT, URL
+  inteira do card, data em texto e UNIQUE(user_id, job_link));
+- legado_chave: a mesma tabela guardando só a chave canônica da vaga;
+- atual: historico_envios, sem rowid, com o hash de 64 bits da chave
+  canônica e a data em segundos (profiles/profile_manager.py).
+
+Para cada uma informa tamanho do arquivo, bytes por linha, vazão de
+inserção e latência p50/p95 da consulta de um lote de 25 links (metade já
+enviada), que é o que a busca e os alertas fazem a cada página; no schema
+atual, mede também `filtrar_vagas_ineditas_usuarios` inteira, com a
+canonicalização e o hash das URLs e as impressões das vagas. Os envios
+são gravados em ordem aleatória de usuário, como na vida real, o que
+fragmenta as árvores. No fim mede a migração do banco legado (feita por
+`inicializar_banco`) e a compactação com retenção de 180 dias.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_historico [--linhas 2000000] [--usuarios 20000] [--consultas 2000]
+"""
+import argparse
+import hashlib
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from core.dedup import hash_vaga
+from profiles import profile_manager
+from benchmarks.bench_profile_manager import SCHEMA_HISTORICO_LEGADO
+
+_DIA = 24 * 60 * 60
+_LOTE_INSERCAO = 50_000
+_TITULOS = [
+    "desenvolvedor-python-pleno", "engenheiro-de-dados-senior", "analista-de-dados-junior",
+    "desenvolvedor-full-stack", "cientista-de-dados", "engenheiro-devops-sre", "product-manager",
+]
+
+
+def _id_vaga(usuario: int, j: int) -> int:
+    return 3_000_000_000 + usuario * 1000 + j
+
+
+def _url(id_vaga: int) -> str:
+    # Formato do href dos cards do LinkedIn, com os parâmetros de rastreamento.
+    token = hashlib.blake2b(str(id_vaga).encode(), digest_size=16).hexdigest()
+    return (
+        f"https://br.linkedin.com/jobs/view/{_TITULOS[id_vaga % len(_TITULOS)]}-at-empresa-{id_vaga % 997}-{id_vaga}"
+        f"?position={id_vaga % 25 + 1}&pageNum=0&refId={token[:22]}%3D%3D&trackingId={token[10:]}%3D%3D"
+    )
+
+
+def _chave(id_vaga: int) -> str:
+    return f"linkedin:{id_vaga}"
+
+
+def _tamanho(conn: sqlite3.Connection, caminho: str) -> int:
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+    return os.path.getsize(caminho)
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round((len(ordenados) - 1) * p)))]
+
+
+def _envios(linhas: int, usuarios: int, semente: int = 7):
+    """(usuario, j, enviado_em) em ordem de envio: usuários embaralhados, datas no último ano."""
+    por_usuario = linhas // usuarios
+    ordem = list(range(usuarios * por_usuario))
+    random.Random(semente).shuffle(ordem)
+    agora = time.time()
+    total = len(ordem)
+    for k, indice in enumerate(ordem):
+        yield indice // por_usuario, indice % por_usuario, agora - 365 * _DIA * (1 - k / total)
+
+
+def _preencher(conn: sqlite3.Connection, sql: str, converter: Callable, linhas: int, usuarios: int) -> float:
+    """Insere os envios em transações de _LOTE_INSERCAO linhas. Retorna linhas por segundo."""
+    inicio = time.perf_counter()
+    lote = []
+    for usuario, j, enviado_em in _envios(linhas, usuarios):
+        lote.append(converter(usuario, _id_vaga(usuario, j), enviado_em))
+        if len(lote) == _LOTE_INSERCAO:
+            with conn:
+                conn.executemany(sql, lote)
+            lote.clear()
+    if lote:
+        with conn:
+            conn.executemany(sql, lote)
+    return linhas / (time.perf_counter() - inicio)
+
+
+def _medir_consultas(
+    consultar: Callable[[int, List[str]], int], texto: Callable[[int], str], linhas: int, usuarios: int, consultas: int
+) -> Dict[str, float]:
+    """Latência de `consultar(usuario, links)` para lotes de 25 vagas, 12 delas já enviadas."""
+    por_usuario = linhas // usuarios
+    aleatorio = random.Random(11)
+    latencias = []
+    for _ in range(consultas):
+        usuario = aleatorio.randrange(usuarios)
+        enviadas = [_id_vaga(usuario, j) for j in aleatorio.sample(range(por_usuario), min(12, por_usuario))]
+        novas = [_id_vaga(usuario, por_usuario + j) for j in aleatorio.sample(range(10_000), 25 - len(enviadas))]
+        links = [texto(i) for i in enviadas + novas]
+        inicio = time.perf_counter()
+        encontradas = consultar(usuario, links)
+        latencias.append(time.perf_counter() - inicio)
+        assert encontradas == len(enviadas), encontradas
+    return {"p50_us": _percentil(latencias, 0.50) * 1e6, "p95_us": _percentil(latencias, 0.95) * 1e6,
+            "media_us": statistics.fmean(latencias) * 1e6}
+
+
+def _conectar(caminho: str) -> sqlite3.Connection:
+    """Conexão com os mesmos PRAGMAs do profile_manager."""
+    profile_manager.DB_PATH = caminho
+    return profile_manager._conexao()
+
+
+def _legado(pasta: str, nome: str, texto: Callable[[int], str], args) -> Dict:
+    caminho = os.path.join(pasta, nome + ".db")
+    conn = _conectar(caminho)
+    conn.execute(SCHEMA_HISTORICO_LEGADO)
+    conn.commit()
+    vazao = _preencher(
+        conn, "INSERT OR IGNORE INTO historico_vagas (user_id, job_link, data_envio) VALUES (?, ?, ?)",
+        lambda usuario, id_vaga, enviado_em: (usuario, texto(id_vaga), time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(enviado_em))),
+        args.linhas, args.usuarios,
+    )
+
+    def consultar(usuario: int, links: List[str]) -> int:
+        marcadores = ", ".join("?" * len(links))
+        return len(conn.execute(
+            f"SELECT job_link FROM historico_vagas WHERE user_id = ? AND job_link IN ({marcadores})", (usuario, *links)
+        ).fetchall())
+
+    return {"caminho": caminho, "tamanho": _tamanho(conn, caminho), "insercao_linhas_s": vazao,
+            **_medir_consultas(consultar, texto, args.linhas, args.usuarios, args.consultas)}
+
+
+def _atual(pasta: str, args) -> Dict:
+    caminho = os.path.join(pasta, "atual.db")
+    profile_manager.DB_PATH = caminho
+    profile_manager.inicializar_banco()
+    conn = profile_manager._conexao()
+    vazao = _preencher(
+        conn, "INSERT OR IGNORE INTO historico_envios (user_id, hash, enviado_em) VALUES (?, ?, ?)",
+        lambda usuario, id_vaga, enviado_em: (usuario, hash_vaga(_url(id_vaga)), int(enviado_em)),
+        args.linhas, args.usuarios,
+    )
+    conn.execute("PRAGMA optimize;")
+
+    def consultar(usuario: int, hashes: List[int]) -> int:
+        marcadores = ", ".join("?" * len(hashes))
+        return len(conn.execute(
+            f"SELECT hash FROM historico_envios WHERE user_id = ? AND hash IN ({marcadores})", (usuario, *hashes)
+        ).fetchall())
+
+    # Caminho real da busca: URL do card -> chave canônica -> hash -> consulta.
+    def filtrar(usuario: int, links: List[str]) -> int:
+        vagas = [{"titulo": link, "empresa": "", "local": "", "link": link} for link in links]
+        return len(links) - len(profile_manager.filtrar_vagas_ineditas_usuarios([usuario], vagas)[usuario])
+
+    return {"caminho": caminho, "tamanho": _tamanho(conn, caminho), "insercao_linhas_s": vazao,
+            **_medir_consultas(consultar, lambda i: hash_vaga(_url(i)), args.linhas, args.usuarios, args.consultas),
+            "filtrar": _medir_consultas(filtrar, _url, args.linhas, args.usuarios, args.consultas)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=2_000_000, help="envios gravados em cada banco")
+    parser.add_argument("--usuarios", type=int, default=20_000)
+    parser.add_argument("--consultas", type=int, default=2000, help="lotes de 25 links consultados")
+    parser.add_argument("--pasta", help="onde criar os bancos (padrão: diretório temporário)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.pasta) as pasta:
+        resultados = {
+            "legado_url": _legado(pasta, "legado_url", _url, args),
+            "legado_chave": _legado(pasta, "legado_chave", _chave, args),
+            "atual": _atual(pasta, args),
+        }
+        profile_manager.fechar_conexoes()
+
+        print(f"\n{args.linhas:,} envios, {args.usuarios:,} usuários, {args.consultas} lotes de 25 links\n")
+        print(f"{'schema':<14}{'tamanho MB':>12}{'bytes/linha':>13}{'inserção/s':>12}{'p50 µs':>9}{'p95 µs':>9}")
+        for nome, r in resultados.items():
+            print(f"{nome:<14}{r['tamanho'] / 2**20:>12.1f}{r['tamanho'] / args.linhas:>13.1f}"
+                  f"{r['insercao_linhas_s']:>12,.0f}{r['p50_us']:>9.0f}{r['p95_us']:>9.0f}")
+        filtrar = resultados["atual"]["filtrar"]
+        print(f"\nfiltrar_vagas_ineditas_usuarios (URLs -> chaves -> hashes -> consulta): "
+              f"p50 {filtrar['p50_us']:.0f} µs, p95 {filtrar['p95_us']:.0f} µs")
+
+        # Migração do banco legado pelo caminho real (inicializar_banco).
+        profile_manager.DB_PATH = resultados["legado_url"]["caminho"]
+        inicio = time.perf_counter()
+        profile_manager.inicializar_banco()
+        duracao = time.perf_counter() - inicio
+        conn = profile_manager._conexao()
+        migradas = conn.execute("SELECT COUNT(*) FROM historico_envios").fetchone()[0]
+        tamanho = _tamanho(conn, profile_manager.DB_PATH)
+        print(f"\nMigração legado_url -> historico_envios: {migradas:,} linhas em {duracao:.1f} s, "
+              f"{resultados['legado_url']['tamanho'] / 2**20:.1f} MB -> {tamanho / 2**20:.1f} MB")
+        profile_manager.fechar_conexoes()
+
+        # Compactação: os envios estão espalhados pelo último ano, então metade sai.
+        profile_manager.DB_PATH = resultados["atual"]["caminho"]
+        conn = profile_manager._conexao()
+        inicio = time.perf_counter()
+        removidos = profile_manager.compactar_historico(180)
+        duracao = time.perf_counter() - inicio
+        tamanho = _tamanho(conn, profile_manager.DB_PATH)
+        print(f"Compactação (retenção de 180 dias): {removidos:,} linhas removidas em {duracao:.1f} s, "
+              f"{resultados['atual']['tamanho'] / 2**20:.1f} MB -> {tamanho / 2**20:.1f} MB")
+        inicio = time.perf_counter()
+        profile_manager.compactar_historico(180)
+        print(f"Compactação sem nada a remover: {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        profile_manager.fechar_conexoes()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Partida a frio do bot: tempo e memória até responder o primeiro /start.
+
+Cada partida é um processo Python novo que importa `main` (o grafo de
+imports do ponto de entrada), monta o Application e recebe um /start; a
+Bot API é o servidor falso (TELEGRAM_API_URL) e o banco, um SQLite
+temporário. Mede, a partir do lançamento do processo, quando terminam os
+imports, quando o Application fica pronto e quando chega a resposta ao
+/start, com a memória residente (VmRSS) em cada ponto. Com o
+pré-aquecimento ligado (BOT_PREAQUECER), mede também quando ele termina e
+quanta memória o processo tem depois dele.
+
+Antes das partidas, `python -X importtime -c "import main"` mostra os
+pacotes que mais pesam no import (tempo próprio somado por pacote).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_inicializacao [--repeticoes 5] [--saida arquivo.json] [--comparar anterior.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.fakes import ServidorTelegramFalso, update_telegram
+
+PASTA_RESULTADOS = os.path.join(os.path.dirname(__file__), "resultados")
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Prefixo das linhas de evento que o processo filho escreve no stdout.
+MARCA = "@evento "
+USUARIO = 4242
+
+
+def _rss_kb(pid: str = "self") -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+# --- Processo filho (uma partida) ---
+
+def _evento(nome: str):
+    print(f"{MARCA}{json.dumps({'evento': nome, 't': time.time(), 'rss_kb': _rss_kb()})}", flush=True)
+
+
+async def _servir(construir_aplicacao):
+    from telegram import Update
+
+    application = construir_aplicacao(com_updater=False, tarefas_periodicas=False)
+    loop = asyncio.get_running_loop()
+    async with application:
+        await application.start()
+        # Como o run_polling faz depois de iniciar o Application.
+        if application.post_init:
+            await application.post_init(application)
+        _evento("pronto")
+        await application.update_queue.put(Update.de_json(update_telegram(1, USUARIO, "/start"), application.bot))
+        # O processo pai avisa pelo stdin quando a resposta chega à Bot API falsa.
+        await loop.run_in_executor(None, sys.stdin.readline)
+        _evento("respondido")
+        if await _aguardar_preaquecimento():
+            _evento("preaquecido")
+        await application.stop()
+
+
+async def _aguardar_preaquecimento(prazo: float = 60) -> bool:
+    """Espera todas as etapas do pré-aquecimento terminarem; False se ele estiver desligado."""
+    from config import BOT_PREAQUECER
+    from core import metricas, preaquecimento
+
+    if not BOT_PREAQUECER:
+        return False
+    limite = time.monotonic() + prazo
+    while metricas.total_observacoes("bot_preaquecimento_segundos") < len(preaquecimento.ETAPAS):
+        if time.monotonic() > limite:
+            raise SystemExit("O pré-aquecimento não terminou.")
+        await asyncio.sleep(0.02)
+    return True
+
+
+def _filho(caminho_banco: str):
+    import main  # noqa: F401 (o grafo de imports do ponto de entrada)
+    _evento("importado")
+
+    from profiles import profile_manager
+    from telegram_bot.bot import construir_aplicacao
+
+    profile_manager.DB_PATH = caminho_banco
+    profile_manager.inicializar_banco()
+    asyncio.run(_servir(construir_aplicacao))
+    profile_manager.fechar_conexoes()
+
+
+# --- Processo pai ---
+
+def _partida(preaquecer: bool) -> Dict[str, Dict[str, float]]:
+    """Uma partida a frio; retorna, por evento, o tempo desde o lançamento (s) e o RSS (MB)."""
+    with ServidorTelegramFalso() as telegram, tempfile.TemporaryDirectory() as pasta:
+        respondeu = threading.Event()
+        momento_resposta: List[float] = []
+
+        def ouvinte(metodo: str, parametros: Dict):
+            if metodo == "sendMessage" and not respondeu.is_set():
+                momento_resposta.append(time.time())
+                respondeu.set()
+
+        telegram.ouvinte = ouvinte
+        ambiente = {
+            **os.environ, "TELEGRAM_BOT_TOKEN": "123456:TESTE", "TELEGRAM_API_URL": telegram.url,
+            "ALERTAS_INTERVALO": "0", "HISTORICO_COMPACTACAO_INTERVALO": "0", "METRICAS_PORTA": "0",
+            "BOT_PREAQUECER": "1" if preaquecer else "0",
+        }
+        inicio = time.time()
+        filho = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.bench_inicializacao", "--filho", os.path.join(pasta, "bot.db")],
+            cwd=RAIZ, env=ambiente, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        eventos: Dict[str, Dict[str, float]] = {}
+        try:
+            for linha in filho.stdout:
+                if not linha.startswith(MARCA):
+                    continue
+                evento = json.loads(linha[len(MARCA):])
+                eventos[evento["evento"]] = {"s": evento["t"] - inicio, "rss_mb": evento["rss_kb"] / 1024}
+                if evento["evento"] == "pronto":
+                    if not respondeu.wait(60):
+                        raise SystemExit("O bot não respondeu ao /start.")
+                    filho.stdin.write("\n")
+                    filho.stdin.flush()
+        finally:
+            filho.wait(timeout=60)
+        resposta = eventos.pop("respondido")
+        eventos["primeira_resposta"] = {"s": momento_resposta[0] - inicio, "rss_mb": resposta["rss_mb"]}
+        return eventos
+
+
+def _mediana(partidas: List[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    return {
+        evento: {campo: statistics.median(p[evento][campo] for p in partidas) for campo in ("s", "rss_mb")}
+        for evento in partidas[0]
+    }
+
+
+def _perfil_imports(limite: int = 12) -> Dict[str, float]:
+    """Tempo próprio de import (ms) somado por pacote de topo em `import main`, e o total."""
+    saida = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=RAIZ,
+                           capture_output=True, text=True).stderr
+    pacotes: Dict[str, float] = {}
+    total = 0.0
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, cumulativo, nome = (parte.strip() for parte in linha[len("import time:"):].split("|"))
+        pacote = nome.split(".")[0]
+        pacotes[pacote] = pacotes.get(pacote, 0.0) + int(proprio) / 1000
+        if nome == "main":
+            total = int(cumulativo) / 1000
+    maiores = dict(sorted(pacotes.items(), key=lambda item: -item[1])[:limite])
+    return {"total_ms": total, "pacotes_ms": maiores}
+
+
+def _commit_atual() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=RAIZ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def _imprimir(resultado: Dict, anterior: Optional[Dict] = None):
+    imports = resultado["imports"]
+    print(f"\nCommit {resultado['commit']}: import main em {imports['total_ms']:.0f} ms (-X importtime)")
+    print("  " + ", ".join(f"{pacote} {ms:.0f}" for pacote, ms in imports["pacotes_ms"].items()) + " (ms)")
+    for modo, eventos in resultado["partidas"].items():
+        print(f"\n{modo} (mediana de {resultado['parametros']['repeticoes']} partidas)")
+        print(f"{'evento':<22}{'s':>8}{'RSS MB':>9}" + ("      Δs  ΔRSS MB" if anterior else ""))
+        for evento, valores in eventos.items():
+            linha = f"{evento:<22}{valores['s']:>8.2f}{valores['rss_mb']:>9.1f}"
+            antes = (anterior or {}).get("partidas", {}).get(modo, {}).get(evento)
+            if antes:
+                linha += f"{valores['s'] - antes['s']:>+8.2f}{valores['rss_mb'] - antes['rss_mb']:>+9.1f}"
+            print(linha)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5, help="partidas por modo")
+    parser.add_argument("--saida", help="arquivo JSON de saída (padrão: benchmarks/resultados/inicializacao-<commit>.json)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--filho", metavar="BANCO", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.filho:
+        _filho(args.filho)
+        return
+
+    resultado = {
+        "commit": _commit_atual(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "parametros": {"repeticoes": args.repeticoes},
+        "imports": _perfil_imports(),
+        "partidas": {
+            modo: _mediana([_partida(preaquecer) for _ in range(args.repeticoes)])
+            for modo, preaquecer in (("sem pré-aquecimento", False), ("com pré-aquecimento", True))
+        },
+    }
+
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"inicializacao-{resultado['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+    _imprimir(resultado, anterior)
+    print(f"\nResultados gravados em {saida}")
+
+
+if __name__ == "__main__":
+    main()
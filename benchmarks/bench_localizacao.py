@@ -0,0 +1,147 @@
+"""
+Acerto e latência do índice de localizações (core/localizacao.py).
+
+Cada localização esperada vem com variações do que os usuários digitam
+(siglas, apelidos, sem acento, com o estado, com erro de digitação). O
+benchmark confere se todas resolvem para a forma canônica esperada, se
+nomes de fora do índice continuam não reconhecidos e como textos com
+várias localizações são separados. Depois mede a montagem do índice e o
+tempo por consulta (fria, sem o cache de consultas, por tipo de
+casamento; e repetida, com cache) e compara quantas chaves de busca
+distintas existiriam com o texto cru (apenas normalizado) e com a forma
+canônica: cada chave a menos é uma raspagem compartilhada no cache e nos
+alertas.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_localizacao [--repeticoes 2000]
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from core import localizacao
+from core.cache_buscas import normalizar_termo
+
+# Forma canônica esperada -> textos digitados, agrupados pelo tipo de casamento.
+CASOS = {
+    "Rio de Janeiro - RJ": {
+        "exato": ["Rio de Janeiro", "rio de janeiro ", "RIO", "Rio de Janeiro, RJ", "Rio de Janeiro - RJ - Brasil"],
+        "prefixo": ["rio de jan"],
+        "aproximado": ["rio de janiero", "ruo de janeiro"],
+    },
+    "Rio de Janeiro (estado)": {
+        "exato": ["rj", "RJ - Brasil", "Estado do Rio de Janeiro", "Rio de Janeiro (estado)"],
+    },
+    "São Paulo - SP": {
+        "exato": ["São Paulo", "sao paulo", "Sampa", "São Paulo, SP"],
+        "prefixo": ["sao pa"],
+        "aproximado": ["sao paolo", "são pualo"],
+    },
+    "São Paulo (estado)": {"exato": ["SP", "sp - brasil", "Estado de São Paulo"]},
+    "Niterói - RJ": {
+        "exato": ["Niterói", "niteroi", "Niterói/RJ", "Niteroi - Rio de Janeiro"],
+        "prefixo": ["niter"],
+        "aproximado": ["niteroy", "nitroi"],
+    },
+    "Belo Horizonte - MG": {
+        "exato": ["Belo Horizonte", "BH", "beaga", "belo horizonte mg"],
+        "prefixo": ["belo hor"],
+        "aproximado": ["belo horizonet", "belo orizonte"],
+    },
+    "Florianópolis - SC": {
+        "exato": ["Florianópolis", "floripa", "Florianopolis SC"],
+        "prefixo": ["florian"],
+        "aproximado": ["florianopoles"],
+    },
+    "Campinas - SP": {"exato": ["Campinas", "campinas - sp", "Campinas, São Paulo"], "prefixo": ["camp sp"]},
+    "Campinas - SC": {"exato": ["Campinas/SC", "campinas santa catarina"]},
+    "Campo Grande - MS": {"exato": ["Campo Grande", "campo grande ms"]},
+    "Porto Alegre - RS": {"exato": ["Porto Alegre", "POA", "porto alegre/rs"], "aproximado": ["porto alege"]},
+    "Brasília - DF": {"exato": ["Brasília", "brasilia", "BSB", "Brasília - DF"], "aproximado": ["brasilai"]},
+    "Distrito Federal": {"exato": ["DF"]},
+    "Minas Gerais (estado)": {"exato": ["Minas Gerais", "MG"], "prefixo": ["minas"]},
+    "Paraná (estado)": {"exato": ["Paraná", "PR"]},
+    "Recife - PE": {"exato": ["Recife", "recife pe brasil"], "aproximado": ["recfie"]},
+    "Remoto": {"exato": ["Remoto", "home office", "Home-Office", "trabalho remoto", "remote"]},
+    "Brasil": {"exato": ["Brasil", "brazil", "todas as localizações", "Todo o Brasil"]},
+}
+
+# Textos fora do índice: não podem ser completados ou "corrigidos" para um município
+# pequeno de nome parecido ("Paris" -> "Parisi - SP"); a busca usa o texto original.
+NAO_RECONHECIDOS = ["zona sul", "xyzzy", "Lisboa, Portugal", "Paris", "Canada", "Roma", "Lima", "Centro"]
+
+# Texto com várias localizações -> lista esperada de `separar_localizacoes`.
+SEPARACOES = {
+    "Rio de Janeiro, Niterói, Remoto": ["Rio de Janeiro - RJ", "Niterói - RJ", "Remoto"],
+    "Rio ou Niterói": ["Rio de Janeiro - RJ", "Niterói - RJ"],
+    "Abreu e Lima": ["Abreu e Lima - PE"],
+    "Pontes e Lacerda": ["Pontes e Lacerda - MT"],
+    "São Paulo, SP": ["São Paulo - SP"],
+    "Campinas, SC; Remoto": ["Campinas - SC", "Remoto"],
+    "Remoto, SP": ["Remoto", "São Paulo (estado)"],
+    "Niterói, SP": ["Niterói - RJ", "São Paulo (estado)"],
+}
+
+
+def _tempo_frio(texto: str, repeticoes: int) -> float:
+    """Tempo médio (s) de uma consulta sem o cache de consultas (o índice já montado)."""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        localizacao.resolver_localizacao.cache_clear()
+        localizacao.resolver_localizacao(texto)
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=2000, help="consultas por texto nas medidas de tempo")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    indice = localizacao._obter_indice()
+    montagem = time.perf_counter() - inicio
+    print(f"Índice: {len(indice.nomes)} nomes, montado em {montagem * 1000:.0f} ms")
+
+    erros = []
+    tempos = {}
+    for esperado, grupos in CASOS.items():
+        for tipo, textos in grupos.items():
+            for texto in textos:
+                obtido = localizacao.canonicalizar_localizacao(texto)
+                if obtido != esperado:
+                    erros.append(f"{texto!r}: esperado {esperado!r}, obtido {obtido!r}")
+                tempos.setdefault(tipo, []).append(_tempo_frio(texto, max(1, args.repeticoes // 20)))
+    for texto in NAO_RECONHECIDOS:
+        if localizacao.resolver_localizacao(texto) is not None:
+            erros.append(f"{texto!r}: não deveria ser reconhecido ({localizacao.canonicalizar_localizacao(texto)!r})")
+        tempos.setdefault("não reconhecido", []).append(_tempo_frio(texto, max(1, args.repeticoes // 20)))
+    for texto, esperadas in SEPARACOES.items():
+        obtidas = localizacao.separar_localizacoes(texto)
+        if obtidas != esperadas:
+            erros.append(f"{texto!r}: esperado {esperadas}, obtido {obtidas}")
+
+    print(f"\n{'casamento':<18}{'textos':>7}{'mediana µs':>12}{'máx. µs':>10}")
+    for tipo, valores in tempos.items():
+        print(f"{tipo:<18}{len(valores):>7}{statistics.median(valores) * 1e6:>12.1f}{max(valores) * 1e6:>10.1f}")
+
+    textos = [texto for grupos in CASOS.values() for lista in grupos.values() for texto in lista]
+    inicio = time.perf_counter()
+    for _ in range(args.repeticoes):
+        for texto in textos:
+            localizacao.resolver_localizacao(texto)
+    repetida = (time.perf_counter() - inicio) / (args.repeticoes * len(textos))
+    print(f"{'repetida (cache)':<18}{len(textos):>7}{repetida * 1e6:>12.2f}")
+
+    cruas = {normalizar_termo(texto) for texto in textos}
+    canonicas = {normalizar_termo(localizacao.canonicalizar_localizacao(texto)) for texto in textos}
+    print(f"\nChaves de busca distintas para {len(textos)} textos: {len(cruas)} cruas -> {len(canonicas)} canônicas")
+
+    if erros:
+        print(f"\n{len(erros)} erro(s):")
+        print("\n".join(f"  {erro}" for erro in erros))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Equivalência e desempenho dos backends de parser de resultados do LinkedIn.
+
+Usa o HTML salvo em benchmarks/fixtures/linkedin_busca.html. Primeiro confere
+que todos os backends disponíveis produzem exatamente os mesmos dicts que o
+parser original (BeautifulSoup sobre o documento inteiro); depois mede o tempo
+médio por página de cada um.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_parser_vagas [--repeticoes 200]
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List
+
+from bs4 import BeautifulSoup
+
+from core.parser_vagas import BACKENDS, backend_padrao
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "linkedin_busca.html")
+
+
+def parser_original(html: str) -> List[Dict]:
+    """Cópia do parser anterior do job_scraper, usada como referência."""
+    soup = BeautifulSoup(html, 'html.parser')
+    lista_de_vagas = []
+    for card in soup.find_all('div', class_='base-card'):
+        try:
+            titulo = card.find('h3', class_='base-search-card__title').text.strip()
+            empresa = card.find('h4', class_='base-search-card__subtitle').text.strip()
+            local = card.find('span', class_='job-search-card__location').text.strip()
+            link_tag = card.find('a', class_='base-card__full-link')
+            link = link_tag['href'] if link_tag else "Link não encontrado"
+            lista_de_vagas.append({"titulo": titulo, "empresa": empresa, "local": local, "link": link})
+        except AttributeError:
+            continue
+    return lista_de_vagas
+
+
+def verificar_equivalencia(html: str) -> bool:
+    referencia = parser_original(html)
+    ok = True
+    for nome, extrair in BACKENDS.items():
+        resultado = extrair(html)
+        if resultado != referencia:
+            ok = False
+            print(f"[DIVERGE] {nome}: {len(resultado)} vagas x {len(referencia)} na referência")
+        else:
+            print(f"[OK] {nome}: {len(resultado)} vagas idênticas à referência")
+    return ok
+
+
+def medir(html: str, repeticoes: int) -> Dict[str, float]:
+    candidatos = {"original": parser_original, **BACKENDS}
+    tempos = {}
+    for nome, extrair in candidatos.items():
+        extrair(html)  # aquecimento
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            extrair(html)
+        tempos[nome] = (time.perf_counter() - inicio) / repeticoes * 1000
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+
+    if not verificar_equivalencia(html):
+        sys.exit(1)
+
+    tempos = medir(html, args.repeticoes)
+    print(f"\nBackend padrão: {backend_padrao()}")
+    print(f"{'backend':<12}{'ms/página':>12}{'ganho':>8}")
+    for nome, ms in tempos.items():
+        print(f"{nome:<12}{ms:>12.3f}{tempos['original'] / ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Benchmark offline do pipeline CV -> perfil -> busca -> entrega.
+
+Roda sem rede, sem chave de API e sem Telegram: os PDFs são gerados
+localmente, o LinkedIn é um servidor HTTP local servindo HTML gravado,
+o Gemini é um cliente falso com latência configurável e os handlers
+recebem `Update`s sintéticos. O banco é um SQLite temporário.
+
+Para cada estágio informa latência p50/p95, vazão e pico de memória
+(tracemalloc) e grava tudo em JSON, para comparar entre commits. Antes,
+confere com o Gemini falso que as chamadas limitadas (429/503) são
+repetidas e que as análises simultâneas não passam de
+GEMINI_MAX_CONCORRENCIA; se algo falhar, termina com erro.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_pipeline [--iteracoes 30] [--usuarios 20]
+        [--latencia-gemini 0.05] [--saida arquivo.json] [--comparar anterior.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import aclosing
+from typing import Awaitable, Callable, Dict, List
+
+from benchmarks.fakes import ClienteGeminiFalso, ContextoFalso, ServidorLinkedInFalso, criar_update, gerar_pdf_cv
+
+from core import cv_analyzer, job_scraper, metricas, pdf_parser
+from core.cache_buscas import cache_buscas
+from profiles import profile_manager
+from telegram_bot import envio, handlers
+
+PASTA_RESULTADOS = os.path.join(os.path.dirname(__file__), "resultados")
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    k = (len(ordenados) - 1) * p
+    i = int(k)
+    j = min(i + 1, len(ordenados) - 1)
+    return ordenados[i] + (ordenados[j] - ordenados[i]) * (k - i)
+
+
+def _resumo(latencias: List[float], duracao_total: float, pico_bytes: int) -> Dict[str, float]:
+    return {
+        "n": len(latencias),
+        "p50_ms": _percentil(latencias, 0.50) * 1000,
+        "p95_ms": _percentil(latencias, 0.95) * 1000,
+        "media_ms": statistics.fmean(latencias) * 1000 if latencias else 0.0,
+        "vazao_ops_s": len(latencias) / duracao_total if duracao_total else 0.0,
+        "pico_memoria_kb": pico_bytes / 1024,
+    }
+
+
+async def _medir(operacao: Callable[[int], Awaitable], iteracoes: int, concorrencia: int = 1) -> Dict[str, float]:
+    """Executa `operacao(i)` `iteracoes` vezes, com até `concorrencia` em paralelo."""
+    latencias: List[float] = []
+    limite = asyncio.Semaphore(concorrencia)
+
+    async def _uma(i: int):
+        async with limite:
+            inicio = time.perf_counter()
+            await operacao(i)
+            latencias.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    inicio_total = time.perf_counter()
+    await asyncio.gather(*(_uma(i) for i in range(iteracoes)))
+    duracao = time.perf_counter() - inicio_total
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return _resumo(latencias, duracao, pico)
+
+
+async def verificar_gemini() -> List[str]:
+    """Confere o retry, o limite de concorrência e a validação do cv_analyzer; retorna os problemas encontrados."""
+    problemas: List[str] = []
+    backoff = cv_analyzer.GEMINI_BACKOFF_BASE
+    # Sem as esperas reais do backoff (segundos) entre as tentativas.
+    cv_analyzer.GEMINI_BACKOFF_BASE = 0.001
+    try:
+        gemini = ClienteGeminiFalso(falhas_429=1, falhas_503=1)
+        cv_analyzer.definir_cliente(gemini)
+        resultado = await cv_analyzer.analisar_cv_async(f"CV com retentativas #{time.perf_counter_ns()}")
+        if resultado is None or gemini.chamadas != 3:
+            problemas.append(f"retry: {gemini.chamadas} chamadas após um 429 e um 503 (esperado 3, com sucesso)")
+
+        limite = cv_analyzer.GEMINI_MAX_CONCORRENCIA
+        gemini = ClienteGeminiFalso(latencia=0.02)
+        cv_analyzer.definir_cliente(gemini)
+        await asyncio.gather(*(
+            cv_analyzer.analisar_cv_async(f"CV simultâneo {i} #{time.perf_counter_ns()}") for i in range(limite * 3)
+        ))
+        if gemini.pico_concorrencia > limite:
+            problemas.append(f"concorrência: pico de {gemini.pico_concorrencia} chamadas (limite {limite})")
+
+        # Resposta sem cargo_ideal: a análise falha e não fica no cache (a segunda vez chama o modelo de novo).
+        gemini = ClienteGeminiFalso(resposta={"nivel_experiencia": "Pleno", "habilidades_chave": ["Python"]})
+        cv_analyzer.definir_cliente(gemini)
+        texto = f"CV com resposta incompleta #{time.perf_counter_ns()}"
+        resultados = [await cv_analyzer.analisar_cv_async(texto) for _ in range(2)]
+        if resultados != [None, None] or gemini.chamadas != 2:
+            problemas.append(f"validação: resposta sem cargo_ideal virou {resultados[0]!r} ({gemini.chamadas} chamadas)")
+    finally:
+        cv_analyzer.GEMINI_BACKOFF_BASE = backoff
+    return problemas
+
+
+async def _fluxo_completo(user_id: int, pdf: bytes):
+    """Percorre a conversa inteira de um usuário novo, como o ConversationHandler faria."""
+    contexto = ContextoFalso()
+    await handlers.start(criar_update(user_id, "/start"), contexto)
+    update_pdf = criar_update(user_id, pdf=pdf)
+    await handlers.receber_cv(update_pdf, contexto.anexar(update_pdf))
+    await handlers.receber_nome(criar_update(user_id, "Ana"), contexto)
+    await handlers.receber_sobrenome(criar_update(user_id, "Souza"), contexto)
+    await handlers.receber_telefone(criar_update(user_id, "(21) 99999-0000"), contexto)
+    await handlers.receber_localizacao_e_buscar(criar_update(user_id, "Rio de Janeiro"), contexto)
+
+
+async def executar(iteracoes: int, usuarios: int, latencia_gemini: float, latencia_linkedin: float) -> Dict:
+    pdfs = [gerar_pdf_cv(i) for i in range(iteracoes)]
+    # CVs inéditos para o fluxo completo, para que a análise não venha do cache.
+    pdfs_fluxo = [gerar_pdf_cv(10_000 + i) for i in range(iteracoes + usuarios * 2)]
+    problemas = await verificar_gemini()
+    gemini = ClienteGeminiFalso(latencia=latencia_gemini)
+    cv_analyzer.definir_cliente(gemini)
+    cache_buscas.persistente = False
+    # Os limites de envio do Telegram (telegram_bot/envio.py) não fazem parte do pipeline medido:
+    # a conversa simulada não tem o tempo de digitação do usuário entre as mensagens.
+    envio.taxa_maxima = 1e9
+    envio.intervalo_chat = 0
+    estagios: Dict[str, Dict[str, float]] = {}
+
+    with ServidorLinkedInFalso(paginas=8, latencia=latencia_linkedin) as linkedin:
+        job_scraper.LINKEDIN_URL = linkedin.url
+
+        # Aquece o pool de processos do PDF e o cliente HTTP fora da medição.
+        await pdf_parser.extrair_texto_pdf_async(pdfs[0])
+        await job_scraper.buscar_vagas_async("aquecimento", "aquecimento")
+
+        async def extrair(i):
+            await pdf_parser.extrair_texto_pdf_async(pdfs[i])
+        estagios["extrair_texto_pdf"] = await _medir(extrair, iteracoes)
+
+        textos = [pdf_parser.extrair_texto_pdf(pdf) for pdf in pdfs]
+
+        async def analisar(i):
+            await cv_analyzer.analisar_cv_async(f"{textos[i]}\n#{time.perf_counter_ns()}")
+        estagios["analisar_cv"] = await _medir(analisar, iteracoes)
+
+        async def analisar_cache(i):
+            await cv_analyzer.analisar_cv_async(textos[i])
+        for texto in textos:
+            await cv_analyzer.analisar_cv_async(texto)
+        estagios["analisar_cv_cache"] = await _medir(analisar_cache, iteracoes)
+
+        async def buscar_frio(i):
+            cache_buscas.limpar()
+            async with aclosing(job_scraper.iterar_vagas("Desenvolvedor Python", "Rio de Janeiro", max_paginas=1)) as vagas:
+                async for _ in vagas:
+                    pass
+        estagios["buscar_vagas_pagina"] = await _medir(buscar_frio, iteracoes)
+
+        async def buscar_quente(i):
+            async with aclosing(job_scraper.iterar_vagas("Desenvolvedor Python", "Rio de Janeiro", max_paginas=1)) as vagas:
+                async for _ in vagas:
+                    pass
+        estagios["buscar_vagas_cache"] = await _medir(buscar_quente, iteracoes)
+
+        # Várias localizações: em paralelo (uma chamada) contra uma busca após a outra.
+        localizacoes = ["Rio de Janeiro", "Niterói", "Remoto"]
+
+        async def buscar_localizacoes(locais):
+            async with aclosing(job_scraper.iterar_vagas("Desenvolvedor Python", locais, max_paginas=2)) as vagas:
+                async for _ in vagas:
+                    pass
+
+        async def buscar_uma_localizacao(i):
+            cache_buscas.limpar()
+            await buscar_localizacoes(localizacoes[:1])
+        estagios["buscar_1_localizacao"] = await _medir(buscar_uma_localizacao, iteracoes)
+
+        async def buscar_multilocal(i):
+            cache_buscas.limpar()
+            await buscar_localizacoes(localizacoes)
+        estagios["buscar_3_localizacoes"] = await _medir(buscar_multilocal, iteracoes)
+
+        async def buscar_multilocal_sequencial(i):
+            cache_buscas.limpar()
+            for local in localizacoes:
+                await buscar_localizacoes([local])
+        estagios["buscar_3_localizacoes_seq"] = await _medir(buscar_multilocal_sequencial, iteracoes)
+
+        vagas = [
+            {"titulo": f"Desenvolvedor Python {n}", "empresa": "Empresa", "local": "São Paulo, SP",
+             "link": f"https://br.linkedin.com/jobs/view/{n}"}
+            for n in range(25)
+        ]
+
+        async def banco(i):
+            user_id = 10_000 + i
+            await profile_manager.executar_no_banco(profile_manager.salvar_perfil, user_id, {"cargo_ideal": "Dev", "nome": "Ana"})
+            await profile_manager.executar_no_banco(profile_manager.carregar_perfil, user_id)
+            novas = await profile_manager.executar_no_banco(profile_manager.filtrar_vagas_ineditas_usuarios, [user_id], vagas)
+            await profile_manager.executar_no_banco(
+                profile_manager.registrar_vagas_enviadas_usuarios, {user_id: novas[user_id][:5]}
+            )
+        estagios["profile_manager"] = await _medir(banco, iteracoes)
+
+        cache_buscas.limpar()
+
+        async def fluxo(i):
+            await _fluxo_completo(100_000 + i, pdfs_fluxo[i])
+        estagios["fluxo_handlers"] = await _medir(fluxo, iteracoes)
+
+        async def fluxo_concorrente(i):
+            await _fluxo_completo(200_000 + i, pdfs_fluxo[iteracoes + i])
+        estagios["fluxo_handlers_concorrente"] = await _medir(fluxo_concorrente, usuarios * 2, concorrencia=usuarios)
+
+        requisicoes_linkedin = linkedin.requisicoes
+
+    pdf_parser.encerrar_pool()
+    if gemini.pico_concorrencia > cv_analyzer.GEMINI_MAX_CONCORRENCIA:
+        problemas.append(f"concorrência no pipeline: pico de {gemini.pico_concorrencia} chamadas ao Gemini")
+    return {
+        "problemas": problemas,
+        "estagios": estagios,
+        "contadores": {
+            "chamadas_gemini": gemini.chamadas,
+            "requisicoes_linkedin": requisicoes_linkedin,
+            "cache_buscas": cache_buscas.estatisticas(),
+        },
+        "metricas": metricas.resumo(),
+    }
+
+
+def _commit_atual() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def _imprimir(resultado: Dict, anterior: Dict = None):
+    print(f"\nCommit {resultado['commit']} - {resultado['data']}")
+    print(f"{'estágio':<28}{'p50 ms':>10}{'p95 ms':>10}{'ops/s':>10}{'pico KB':>10}" + ("   Δp50" if anterior else ""))
+    for nome, r in resultado["estagios"].items():
+        linha = f"{nome:<28}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['vazao_ops_s']:>10.1f}{r['pico_memoria_kb']:>10.0f}"
+        antes = (anterior or {}).get("estagios", {}).get(nome)
+        if antes and antes["p50_ms"]:
+            linha += f"   {(r['p50_ms'] / antes['p50_ms'] - 1) * 100:+.0f}%"
+        print(linha)
+    print(f"\nPico de RSS do processo: {resultado['pico_rss_kb']:.0f} KB")
+    print(f"Contadores: {json.dumps(resultado['contadores'], ensure_ascii=False)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iteracoes", type=int, default=30, help="repetições por estágio")
+    parser.add_argument("--usuarios", type=int, default=20, help="usuários simultâneos no fluxo concorrente")
+    parser.add_argument("--latencia-gemini", type=float, default=0.05, help="latência simulada do Gemini (s)")
+    parser.add_argument("--latencia-linkedin", type=float, default=0.02, help="latência simulada do LinkedIn (s)")
+    parser.add_argument("--saida", help="arquivo JSON de saída (padrão: benchmarks/resultados/pipeline-<commit>.json)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as pasta:
+        profile_manager.DB_PATH = os.path.join(pasta, "bench.db")
+        profile_manager.inicializar_banco()
+        # Os módulos imprimem o progresso no stdout; aqui só interessa o relatório.
+        with contextlib.redirect_stdout(io.StringIO()):
+            medicoes = asyncio.run(executar(args.iteracoes, args.usuarios, args.latencia_gemini, args.latencia_linkedin))
+        profile_manager.fechar_conexoes()
+
+    resultado = {
+        "commit": _commit_atual(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "parametros": vars(args),
+        "pico_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        **medicoes,
+    }
+
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"pipeline-{resultado['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+    _imprimir(resultado, anterior)
+    print(f"\nResultados gravados em {saida}")
+    if resultado["problemas"]:
+        print("\nProblemas encontrados:\n" + "\n".join(f"  {problema}" for problema in resultado["problemas"]))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
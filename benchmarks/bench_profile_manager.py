@@ -0,0 +1,161 @@
+"""
+Micro-benchmark da camada SQLite do profile_manager.
+
+Compara operações por segundo da implementação atual (conexão persistente,
+WAL e UPSERT) com a implementação anterior, que abria uma conexão nova por
+chamada e fazia leitura + INSERT OR REPLACE no salvar_perfil.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_profile_manager [--ops 2000]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Callable, Dict
+
+from profiles import profile_manager
+
+
+# --- IMPLEMENTAÇÃO ANTERIOR (uma conexão por chamada) ---
+
+SCHEMA_HISTORICO_LEGADO = """
+CREATE TABLE IF NOT EXISTS historico_vagas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    job_link TEXT,
+    data_envio DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, job_link)
+);
+"""
+
+def _legado_salvar_perfil(db: str, user_id: int, perfil: Dict):
+    with sqlite3.connect(db) as conn:
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("SELECT cargo_ideal, habilidades_chave, nome, sobrenome, telefone FROM perfis WHERE user_id = ?;", (user_id,))
+        existente = cursor.fetchone()
+        cargo = perfil.get("cargo_ideal") if perfil.get("cargo_ideal") is not None else (existente["cargo_ideal"] if existente else "")
+        if "habilidades_chave" in perfil:
+            habilidades = perfil.get("habilidades_chave") or []
+        else:
+            habilidades = json.loads(existente["habilidades_chave"]) if existente and existente["habilidades_chave"] else []
+        nome = perfil.get("nome") or (existente["nome"] if existente else "")
+        sobrenome = perfil.get("sobrenome") or (existente["sobrenome"] if existente else "")
+        telefone = profile_manager._normalize_phone(perfil.get("telefone") or (existente["telefone"] if existente else ""))
+        cursor.execute("""
+            INSERT OR REPLACE INTO perfis (user_id, cargo_ideal, habilidades_chave, nome, sobrenome, telefone)
+            VALUES (?, ?, ?, ?, ?, ?);
+        """, (user_id, cargo, json.dumps(habilidades, ensure_ascii=False), nome, sobrenome, telefone))
+        conn.commit()
+
+
+def _legado_carregar_perfil(db: str, user_id: int):
+    with sqlite3.connect(db) as conn:
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("SELECT cargo_ideal, habilidades_chave, nome, sobrenome, telefone FROM perfis WHERE user_id = ?;", (user_id,))
+        row = cursor.fetchone()
+        if row:
+            return {"cargo_ideal": row["cargo_ideal"], "habilidades_chave": json.loads(row["habilidades_chave"] or "[]"),
+                    "nome": row["nome"], "sobrenome": row["sobrenome"], "telefone": row["telefone"]}
+    return None
+
+
+def _legado_vaga_ja_enviada(db: str, user_id: int, link: str) -> bool:
+    with sqlite3.connect(db) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM historico_vagas WHERE user_id = ? AND job_link = ?", (user_id, link))
+        return cursor.fetchone() is not None
+
+
+def _legado_registrar_envio(db: str, user_id: int, link: str):
+    with sqlite3.connect(db) as conn:
+        conn.execute("INSERT OR IGNORE INTO historico_vagas (user_id, job_link) VALUES (?, ?)", (user_id, link))
+        conn.commit()
+
+
+def _legado_listar_perfis(db: str):
+    with sqlite3.connect(db) as conn:
+        return conn.execute("SELECT user_id, cargo_ideal, nome, sobrenome, telefone FROM perfis;").fetchall()
+
+
+# --- MEDIÇÃO ---
+
+def _ops_por_segundo(funcao: Callable[[int], None], ops: int) -> float:
+    inicio = time.perf_counter()
+    for i in range(ops):
+        funcao(i)
+    return ops / (time.perf_counter() - inicio)
+
+
+def _novo_banco(pasta: str, nome: str) -> str:
+    caminho = os.path.join(pasta, nome)
+    profile_manager.DB_PATH = caminho
+    profile_manager.inicializar_banco()
+    return caminho
+
+
+def executar(ops: int) -> Dict[str, Dict[str, float]]:
+    perfil = {"cargo_ideal": "Desenvolvedor Python", "habilidades_chave": ["Python", "SQL"],
+              "nome": "Ana", "telefone": "+55 21 99999-0000"}
+    link = "https://br.linkedin.com/jobs/view/{}"
+
+    def _vaga(i: int) -> Dict:
+        return {"titulo": f"Desenvolvedor Python {i}", "empresa": "Empresa", "local": "São Paulo, SP",
+                "link": link.format(i)}
+
+    resultados: Dict[str, Dict[str, float]] = {}
+
+    with tempfile.TemporaryDirectory() as pasta:
+        # O banco legado é criado com o schema atual, volta ao journal padrão e
+        # ganha a tabela de histórico antiga (URL + id + UNIQUE).
+        db_legado = _novo_banco(pasta, "legado.db")
+        profile_manager.fechar_conexoes()
+        with sqlite3.connect(db_legado) as conn:
+            conn.execute("PRAGMA journal_mode=DELETE;")
+            conn.execute(SCHEMA_HISTORICO_LEGADO)
+
+        legado = {
+            "salvar_perfil": lambda i: _legado_salvar_perfil(db_legado, i % 500, perfil),
+            "carregar_perfil": lambda i: _legado_carregar_perfil(db_legado, i % 500),
+            "registrar_envio": lambda i: _legado_registrar_envio(db_legado, i % 500, link.format(i)),
+            "vaga_ja_enviada": lambda i: _legado_vaga_ja_enviada(db_legado, i % 500, link.format(i)),
+            "listar_perfis": lambda i: _legado_listar_perfis(db_legado),
+        }
+
+        _novo_banco(pasta, "atual.db")
+        atual = {
+            "salvar_perfil": lambda i: profile_manager.salvar_perfil(i % 500, perfil),
+            "carregar_perfil": lambda i: profile_manager.carregar_perfil(i % 500),
+            "registrar_envio": lambda i: profile_manager.registrar_vagas_enviadas_usuarios({i % 500: [_vaga(i)]}),
+            "vaga_ja_enviada": lambda i: profile_manager.filtrar_vagas_ineditas_usuarios([i % 500], [_vaga(i)]),
+            "listar_perfis": lambda i: profile_manager.listar_perfis(),
+        }
+
+        for operacao in legado:
+            n = max(ops // 10, 1) if operacao == "listar_perfis" else ops
+            resultados[operacao] = {
+                "legado": _ops_por_segundo(legado[operacao], n),
+                "atual": _ops_por_segundo(atual[operacao], n),
+            }
+        profile_manager.fechar_conexoes()
+
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=2000, help="operações por medição")
+    args = parser.parse_args()
+
+    resultados = executar(args.ops)
+    print(f"{'operação':<18}{'legado (ops/s)':>16}{'atual (ops/s)':>16}{'ganho':>8}")
+    for operacao, r in resultados.items():
+        print(f"{operacao:<18}{r['legado']:>16.0f}{r['atual']:>16.0f}{r['atual'] / r['legado']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Desempenho e conferência do ranking de vagas (core/ranking.py).
+
+Gera lotes sintéticos de títulos de vaga, confere que as pontuações
+vetorizadas batem com uma implementação de referência em Python puro e
+mede o tempo por lote em dois cenários: títulos inéditos (tokenização
+incluída) e títulos já vistos (tokenização memoizada, o caso comum quando
+várias buscas trazem as mesmas vagas).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_ranking [--vagas 5000] [--repeticoes 20]
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from collections import Counter
+from typing import Dict, List
+
+import numpy as np
+
+from core import ranking
+
+_CARGOS = [
+    "Desenvolvedor Python", "Desenvolvedor Backend", "Engenheiro de Dados", "Analista de Dados",
+    "Desenvolvedor Full Stack", "Engenheiro DevOps", "Cientista de Dados", "Desenvolvedor Java",
+    "Analista de BI", "Engenheiro de Machine Learning", "Desenvolvedor Front-end React",
+    "QA Engineer", "Product Manager", "Designer UX/UI", "Desenvolvedor Node.js", "Analista de Suporte",
+]
+_NIVEIS = ["Júnior", "Pleno", "Sênior", "Estágio", "Especialista", "", "", ""]
+_EXTRAS = ["Remoto", "Híbrido", "AWS", "Django", "SQL", "Kubernetes", "Spark", "C#", ".NET", "Power BI", "", "", ""]
+
+PERFIL = {
+    "cargo_ideal": "Desenvolvedor Python",
+    "nivel_experiencia": "Pleno",
+    "habilidades_chave": ["Python", "SQL", "Django", "Docker", "AWS"],
+}
+
+
+def gerar_vagas(quantidade: int, semente: int) -> List[Dict]:
+    aleatorio = random.Random(semente)
+    vagas = []
+    for i in range(quantidade):
+        partes = [aleatorio.choice(_CARGOS), aleatorio.choice(_NIVEIS), aleatorio.choice(_EXTRAS)]
+        # Um termo exclusivo por vaga simula a variedade de títulos reais.
+        titulo = " ".join(p for p in partes if p) + f" {semente}x{i}"
+        vagas.append({"titulo": titulo, "empresa": f"Empresa {i % 300}", "local": "São Paulo, SP", "link": f"v/{semente}/{i}"})
+    return vagas
+
+
+def pontuar_referencia(vagas: List[Dict], perfil: Dict) -> List[float]:
+    """Mesmo cálculo de ranking.MatrizVagas.pontuar, em Python puro, vaga a vaga."""
+    documentos = [Counter(ranking.tokenizar(v["titulo"])) for v in vagas]
+    n = len(documentos)
+    df = Counter(t for doc in documentos for t in doc)
+    idf = {t: math.log((1 + n) / (1 + d)) + 1.0 for t, d in df.items()}
+
+    consulta: Dict[str, float] = Counter()
+    for habilidade in perfil["habilidades_chave"]:
+        for t in ranking.tokenizar(habilidade):
+            consulta[t] += 1.0
+    for t in ranking.tokenizar(perfil["cargo_ideal"]):
+        consulta[t] += ranking.PESO_CARGO
+    consulta = {t: peso * idf[t] for t, peso in consulta.items() if t in idf}
+    norma_consulta = math.sqrt(sum(p * p for p in consulta.values()))
+
+    alvo = ranking.nivel(perfil["nivel_experiencia"])
+    pontos = []
+    for vaga, doc in zip(vagas, documentos):
+        pesos = {t: (1 + math.log(f)) * idf[t] for t, f in doc.items()}
+        norma = math.sqrt(sum(p * p for p in pesos.values()))
+        produto = sum(p * consulta.get(t, 0.0) for t, p in pesos.items())
+        ponto = produto / (norma * norma_consulta) if norma and norma_consulta else 0.0
+        nivel_vaga = ranking.nivel(vaga["titulo"])
+        if alvo >= 0 and nivel_vaga >= 0:
+            if nivel_vaga == alvo:
+                ponto += ranking.AJUSTE_SENIORIDADE
+            elif abs(nivel_vaga - alvo) >= 2:
+                ponto -= ranking.AJUSTE_SENIORIDADE
+        pontos.append(ponto)
+    return pontos
+
+
+def _pontuar(vagas: List[Dict]) -> np.ndarray:
+    return ranking.MatrizVagas(vagas).pontuar(
+        PERFIL["habilidades_chave"], PERFIL["cargo_ideal"], PERFIL["nivel_experiencia"]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vagas", type=int, default=5000, help="tamanho do maior lote")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    vagas = gerar_vagas(args.vagas, semente=1)
+    referencia = pontuar_referencia(vagas, PERFIL)
+    vetorizado = _pontuar(vagas)
+    if not np.allclose(vetorizado, referencia, atol=1e-9):
+        print("[DIVERGE] pontuações vetorizadas diferem da referência")
+        sys.exit(1)
+    print(f"[OK] {len(vagas)} pontuações idênticas à referência")
+    melhores = ranking.ordenar_vagas(vagas, PERFIL)[:3]
+    print("Melhores: " + " | ".join(v["titulo"] for v in melhores))
+
+    print(f"\n{'lote':>8}{'referência ms':>16}{'inéditos ms':>14}{'memoizado ms':>15}{'µs/vaga':>10}")
+    tamanhos = sorted({t for t in (25, 100, 500, args.vagas) if t <= args.vagas})
+    for tamanho in tamanhos:
+        lote = vagas[:tamanho]
+
+        inicio = time.perf_counter()
+        for _ in range(max(1, args.repeticoes // 4)):
+            pontuar_referencia(lote, PERFIL)
+        ms_referencia = (time.perf_counter() - inicio) / max(1, args.repeticoes // 4) * 1000
+
+        # Títulos nunca vistos: inclui a tokenização.
+        ineditos = [gerar_vagas(tamanho, semente=1000 + tamanho * 100 + r) for r in range(args.repeticoes)]
+        inicio = time.perf_counter()
+        for lote_inedito in ineditos:
+            _pontuar(lote_inedito)
+        ms_ineditos = (time.perf_counter() - inicio) / args.repeticoes * 1000
+
+        _pontuar(lote)
+        inicio = time.perf_counter()
+        for _ in range(args.repeticoes):
+            _pontuar(lote)
+        ms_memoizado = (time.perf_counter() - inicio) / args.repeticoes * 1000
+
+        print(f"{tamanho:>8}{ms_referencia:>16.3f}{ms_ineditos:>14.3f}{ms_memoizado:>15.3f}{ms_memoizado * 1000 / tamanho:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+"""
+Teste de carga: milhares de usuários simulados conversando com o bot ao mesmo tempo.
+
+Os updates entram no Application de verdade (construir_aplicacao, sem o
+updater) e passam pelo ConversationHandler, pelo processamento por usuário
+(telegram_bot/agendador.py), pela persistência no SQLite e pela fila de
+envio (telegram_bot/envio.py). Cada usuário simulado é novo e percorre
+/start -> PDF do currículo -> nome -> sobrenome -> telefone -> localização,
+esperando a resposta do bot a cada passo e um tempo de digitação (--pensar)
+entre eles.
+
+A Bot API falsa (que também serve os PDFs, um CV diferente por usuário) e o
+LinkedIn falso rodam em outro processo, para não disputarem o GIL com o
+event loop medido; o Gemini é o cliente falso, com --latencia-gemini.
+
+A carga é fechada: em cada nível, N usuários simultâneos durante --duracao
+segundos (quem termina a conversa dá lugar a um usuário novo). Por nível:
+- vazão: conversas concluídas e passos respondidos por segundo (inclusive
+  as conversas iniciadas no nível que terminam depois dele);
+- latência p50/p95/p99 dos passos rápidos (/start, nome, sobrenome,
+  telefone), da análise do CV e da busca (localização -> "Busca encerrada");
+- conversas recusadas (filas cheias), com erro e sem resposta (--timeout);
+- atraso do event loop (p99 e máximo de um sleep de 10 ms);
+- p95 das etapas internas (download do PDF, filas de CV e de busca,
+  extração, análise e fila de envio), das métricas do próprio bot;
+- SQLite: espera por uma thread do banco e duração das escritas (p95; a
+  disputa pelo lock de escrita do WAL aparece aqui) e operações com erro.
+
+O banco é um SQLite temporário. O relatório vai para o terminal e para um
+JSON (padrão: benchmarks/resultados/carga-<commit>.json).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.carga [--niveis 50,100,250,500,1000,2000] [--duracao 60]
+        [--latencia-gemini 1.5] [--taxa-envio 25] [--saida arquivo.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from benchmarks.fakes import update_telegram
+
+PASTA_RESULTADOS = os.path.join(os.path.dirname(__file__), "resultados")
+
+# Passo -> texto enviado (None: o PDF do currículo) e início da resposta que conclui o passo.
+PASSOS = [
+    ("start", "/start", "Olá!"),
+    ("cv", None, "Análise concluída"),
+    ("nome", "Ana", "Ótimo, Ana"),
+    ("sobrenome", "Souza", "Informe seu"),
+    ("telefone", "(21) 99999-0000", "✅ Telefone salvo"),
+    ("busca", "", "Busca encerrada"),
+]
+PASSOS_RAPIDOS = ("start", "nome", "sobrenome", "telefone")
+LOCALIZACOES = ["Rio de Janeiro", "São Paulo", "Niterói", "Belo Horizonte", "Remoto", "Curitiba", "Recife"]
+RECUSAS = ("🚦", "⏳ Ainda")
+RESULTADOS = ("concluida", "recusada", "erro", "sem_resposta")
+
+# Etapas internas (histogramas de core/metricas.py) cujo p95 entra no relatório.
+ETAPAS = {
+    "download_pdf": ("bot_telegram_download_segundos", {}),
+    "fila_cv": ("bot_agendador_espera_segundos", {"tipo": "cv"}),
+    "extracao_pdf": ("bot_pdf_extracao_segundos", {}),
+    "analise_cv": ("bot_analise_cv_segundos", {}),
+    "fila_busca": ("bot_agendador_espera_segundos", {"tipo": "busca"}),
+    "fila_envio": ("bot_telegram_fila_segundos", {}),
+}
+
+# Intervalo (s) do sleep usado para medir o atraso do event loop.
+AMOSTRA_LOOP = 0.01
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round((len(ordenados) - 1) * p)))] if ordenados else 0.0
+
+
+def _percentis(valores: List[float]) -> Dict[str, float]:
+    return {"n": len(valores), "p50": _percentil(valores, 0.5), "p95": _percentil(valores, 0.95),
+            "p99": _percentil(valores, 0.99)}
+
+
+# --- Processo dos dublês ---
+
+def _servir_dubles(conexao, eventos, latencia_telegram: float, latencia_linkedin: float):
+    """Bot API falsa (avisando cada mensagem enviada em `eventos`) e LinkedIn falso, até `conexao` receber algo."""
+    from benchmarks.fakes import ServidorLinkedInFalso, ServidorTelegramFalso, gerar_pdf_cv
+
+    class _Curriculos(dict):
+        """file_id "cv-<n>" -> PDF do candidato n, gerado no primeiro pedido (cada usuário tem o seu)."""
+
+        def get(self, file_id, padrao=None):
+            if file_id not in self:
+                self[file_id] = gerar_pdf_cv(int(file_id.rsplit("-", 1)[-1]))
+            return dict.get(self, file_id, padrao)
+
+    with ServidorTelegramFalso(latencia=latencia_telegram) as telegram, \
+            ServidorLinkedInFalso(paginas=3, latencia=latencia_linkedin) as linkedin:
+        telegram.arquivos = _Curriculos()
+        telegram.ouvinte = lambda metodo, p: eventos.put((int(p.get("chat_id") or 0), p.get("text", "")))
+        conexao.send((telegram.url, linkedin.url))
+        conexao.recv()
+
+
+class _Conversas:
+    """Entrega as mensagens do bot (avisadas pelo processo dos dublês) ao usuário simulado de cada chat."""
+
+    def __init__(self, eventos):
+        self._eventos = eventos
+        self._filas: Dict[int, asyncio.Queue] = {}
+        self._loop = asyncio.get_running_loop()
+        self._leitor = threading.Thread(target=self._ler, name="carga-eventos", daemon=True)
+        self._leitor.start()
+
+    def abrir(self, chat_id: int) -> asyncio.Queue:
+        fila = self._filas[chat_id] = asyncio.Queue()
+        return fila
+
+    def fechar(self, chat_id: int):
+        self._filas.pop(chat_id, None)
+
+    def _ler(self):
+        while True:
+            lote = [self._eventos.get()]
+            try:
+                while len(lote) < 500:
+                    lote.append(self._eventos.get_nowait())
+            except queue.Empty:
+                pass
+            if None in lote:
+                return
+            self._loop.call_soon_threadsafe(self._entregar, lote)
+
+    def _entregar(self, lote):
+        for chat_id, texto in lote:
+            fila = self._filas.get(chat_id)
+            if fila is not None:
+                fila.put_nowait(texto)
+
+
+# --- Usuários simulados ---
+
+class _Medidas:
+    """Latências e resultados de um nível de carga."""
+
+    def __init__(self):
+        self.passos: Dict[str, List[float]] = {passo: [] for passo, _, _ in PASSOS}
+        self.fim_passos: List[float] = []
+        self.conversas: Dict[str, int] = dict.fromkeys(RESULTADOS, 0)
+        self.fim_conversas: List[float] = []
+        self.atrasos_loop: List[float] = []
+
+
+async def _aguardar(respostas: asyncio.Queue, conclusao: str) -> str:
+    while True:
+        texto = await respostas.get()
+        if texto.startswith(conclusao):
+            return "ok"
+        if texto.startswith(RECUSAS):
+            return "recusada"
+        if texto.startswith("❌"):
+            return "erro"
+
+
+async def _conversa(application, conversas: _Conversas, user_id: int, ids_update, args, medidas: _Medidas) -> str:
+    """Percorre a conversa de um usuário novo; retorna um de RESULTADOS."""
+    from telegram import Update
+
+    respostas = conversas.abrir(user_id)
+    try:
+        for numero, (passo, texto, conclusao) in enumerate(PASSOS):
+            if numero:
+                await asyncio.sleep(args.pensar * random.uniform(0.5, 1.5))
+            if passo == "busca":
+                texto = random.choice(LOCALIZACOES)
+            dados = update_telegram(next(ids_update), user_id, texto or "",
+                                    documento=None if texto else f"cv-{user_id}")
+            inicio = time.perf_counter()
+            await application.update_queue.put(Update.de_json(dados, application.bot))
+            try:
+                resultado = await asyncio.wait_for(_aguardar(respostas, conclusao), args.timeout)
+            except asyncio.TimeoutError:
+                return "sem_resposta"
+            if resultado != "ok":
+                return resultado
+            fim = time.perf_counter()
+            medidas.passos[passo].append(fim - inicio)
+            medidas.fim_passos.append(fim)
+        return "concluida"
+    finally:
+        conversas.fechar(user_id)
+
+
+async def _usuario_virtual(application, conversas, ids_usuario, ids_update, args, medidas: _Medidas,
+                           atraso: float, ate: float):
+    """Um lugar na carga fechada: conversas de usuários novos, uma após a outra, até `ate`."""
+    await asyncio.sleep(atraso)
+    while time.perf_counter() < ate:
+        resultado = await _conversa(application, conversas, next(ids_usuario), ids_update, args, medidas)
+        medidas.conversas[resultado] += 1
+        if resultado == "concluida":
+            medidas.fim_conversas.append(time.perf_counter())
+        await asyncio.sleep(args.pensar * random.uniform(0.5, 1.5))
+
+
+async def _medir_atraso_loop(amostras: List[float], parar: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not parar.is_set():
+        inicio = loop.time()
+        await asyncio.sleep(AMOSTRA_LOOP)
+        amostras.append(loop.time() - inicio - AMOSTRA_LOOP)
+
+
+async def _aguardar_ocioso(application, prazo: float):
+    """Espera o bot esvaziar os updates e as filas de tarefas pesadas (resto do nível anterior)."""
+    from telegram_bot import agendador
+
+    limite = time.perf_counter() + prazo
+    while time.perf_counter() < limite:
+        if application.update_queue.empty() and \
+                all(fila.ativas == 0 and fila.aguardando == 0 for fila in agendador.FILAS.values()):
+            break
+        await asyncio.sleep(0.2)
+    await asyncio.sleep(1)
+
+
+async def _nivel(application, conversas, usuarios: int, ids_usuario, ids_update, args) -> Dict:
+    from core import metricas
+    from profiles import profile_manager
+
+    metricas.limpar()
+    medidas = _Medidas()
+    parar = asyncio.Event()
+    amostrador = asyncio.create_task(_medir_atraso_loop(medidas.atrasos_loop, parar))
+
+    inicio = time.perf_counter()
+    ate = inicio + args.duracao
+    lugares = [
+        asyncio.create_task(_usuario_virtual(application, conversas, ids_usuario, ids_update, args, medidas,
+                                             random.uniform(0, args.rampa), ate))
+        for _ in range(usuarios)
+    ]
+    # A última conversa de cada lugar termina depois do fim do nível (no máximo um --timeout por passo restante).
+    _, pendentes = await asyncio.wait(lugares, timeout=args.duracao + args.timeout)
+    for tarefa in pendentes:
+        tarefa.cancel()
+    await asyncio.gather(*pendentes, return_exceptions=True)
+    await _aguardar_ocioso(application, args.timeout)
+    parar.set()
+    await amostrador
+
+    escritas = [nome for nome in dir(profile_manager) if nome.startswith(("gravar_", "salvar_", "registrar_", "remover_"))]
+    rapidos = [latencia for passo in PASSOS_RAPIDOS for latencia in medidas.passos[passo]]
+    # Vazão: o que foi concluído (inclusive as conversas que passaram do fim do nível) pelo tempo decorrido.
+    decorrido = max(medidas.fim_passos, default=ate) - inicio
+    return {
+        "usuarios": usuarios,
+        "conversas_s": len(medidas.fim_conversas) / decorrido,
+        "passos_s": len(medidas.fim_passos) / decorrido,
+        "conversas": medidas.conversas,
+        "latencia_s": {
+            "rapidos": _percentis(rapidos),
+            "cv": _percentis(medidas.passos["cv"]),
+            "busca": _percentis(medidas.passos["busca"]),
+        },
+        "etapas_p95_s": {nome: metricas.quantil(metrica, 0.95, **rotulos) for nome, (metrica, rotulos) in ETAPAS.items()},
+        "atraso_loop_ms": {
+            "p99": _percentil(medidas.atrasos_loop, 0.99) * 1000,
+            "max": max(medidas.atrasos_loop, default=0.0) * 1000,
+        },
+        "sqlite": {
+            "operacoes": metricas.total_observacoes("bot_sqlite_segundos"),
+            "erros": metricas.total_observacoes("bot_sqlite_segundos", status="erro"),
+            "espera_p95_ms": metricas.quantil("bot_sqlite_espera_segundos", 0.95) * 1000,
+            "escrita_p95_ms": metricas.quantil("bot_sqlite_segundos", 0.95, operacao=escritas) * 1000,
+        },
+        "pico_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+async def executar(args, eventos, niveis: List[int]) -> List[Dict]:
+    from benchmarks.fakes import ClienteGeminiFalso
+    from core import cv_analyzer
+    from telegram_bot import envio
+    from telegram_bot.bot import construir_aplicacao
+
+    cv_analyzer.definir_cliente(ClienteGeminiFalso(latencia=args.latencia_gemini))
+    # 0: sem o limite global de envios (mede o bot sem o teto de mensagens/s do Telegram).
+    envio.taxa_maxima = args.taxa_envio or 1e9
+
+    application = construir_aplicacao(com_updater=False, tarefas_periodicas=False)
+    # Depois dos imports: alguns módulos configuram o log em INFO (uma linha por requisição HTTP).
+    logging.getLogger().setLevel(logging.WARNING)
+    conversas = _Conversas(eventos)
+    ids_usuario = itertools.count(1_000_000)
+    ids_update = itertools.count(1)
+    resultados = []
+    async with application:
+        await application.start()
+        for usuarios in niveis:
+            resultado = await _nivel(application, conversas, usuarios, ids_usuario, ids_update, args)
+            resultados.append(resultado)
+            latencia = resultado["latencia_s"]["rapidos"]
+            print(f"{usuarios} usuários: {resultado['conversas_s']:.2f} conversas/s, "
+                  f"passos rápidos p95 {latencia['p95']:.2f} s", file=sys.stderr)
+        await application.stop()
+    eventos.put(None)
+    return resultados
+
+
+def _commit_atual() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def _imprimir(resultados: List[Dict], slo: float):
+    print(f"\n{'usuários':>9}{'conv/s':>8}{'passos/s':>10}{'rápidos p50/p95/p99 s':>24}{'cv p95':>8}{'busca p95':>10}"
+          f"{'concl.':>8}{'recus.':>8}{'erro':>6}{'s/resp':>8}")
+    for r in resultados:
+        rapidos, c = r["latencia_s"]["rapidos"], r["conversas"]
+        faixa = f"{rapidos['p50']:.2f}/{rapidos['p95']:.2f}/{rapidos['p99']:.2f}"
+        print(f"{r['usuarios']:>9}{r['conversas_s']:>8.2f}{r['passos_s']:>10.1f}{faixa:>24}"
+              f"{r['latencia_s']['cv']['p95']:>8.2f}{r['latencia_s']['busca']['p95']:>10.2f}"
+              f"{c['concluida']:>8}{c['recusada']:>8}{c['erro']:>6}{c['sem_resposta']:>8}")
+
+    print(f"\n{'usuários':>9}{'loop p99 ms':>13}{'loop máx ms':>13}{'sqlite ops':>12}{'fila p95 ms':>13}"
+          f"{'escrita p95 ms':>16}{'erros':>7}{'RSS MB':>8}")
+    for r in resultados:
+        s = r["sqlite"]
+        print(f"{r['usuarios']:>9}{r['atraso_loop_ms']['p99']:>13.1f}{r['atraso_loop_ms']['max']:>13.1f}"
+              f"{s['operacoes']:>12}{s['espera_p95_ms']:>13.1f}{s['escrita_p95_ms']:>16.1f}{s['erros']:>7}"
+              f"{r['pico_rss_mb']:>8.0f}")
+
+    print(f"\n{'usuários':>9}" + "".join(f"{nome:>14}" for nome in ETAPAS) + "   (p95 s)")
+    for r in resultados:
+        print(f"{r['usuarios']:>9}" + "".join(f"{r['etapas_p95_s'][nome]:>14.2f}" for nome in ETAPAS))
+
+    colapso = next((r["usuarios"] for r in resultados
+                    if r["latencia_s"]["rapidos"]["p95"] > slo or r["conversas"]["sem_resposta"]), None)
+    if colapso is None:
+        print(f"\nPassos rápidos abaixo de {slo:g} s (p95) em todos os níveis.")
+    else:
+        print(f"\nPassos rápidos passam de {slo:g} s (p95) ou ficam sem resposta a partir de {colapso} usuários.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--niveis", default="50,100,250,500,1000,2000", help="usuários simultâneos em cada nível")
+    parser.add_argument("--duracao", type=float, default=60, help="duração (s) de cada nível")
+    parser.add_argument("--rampa", type=float, default=20, help="os usuários de um nível entram ao longo deste tempo (s)")
+    parser.add_argument("--pensar", type=float, default=3.0, help="tempo médio (s) de digitação entre os passos")
+    parser.add_argument("--timeout", type=float, default=120, help="espera máxima (s) pela resposta de um passo")
+    parser.add_argument("--slo", type=float, default=2.0, help="p95 (s) aceitável para os passos rápidos")
+    parser.add_argument("--latencia-gemini", type=float, default=1.5, help="latência simulada do Gemini (s)")
+    parser.add_argument("--latencia-linkedin", type=float, default=0.05, help="latência simulada do LinkedIn (s)")
+    parser.add_argument("--latencia-telegram", type=float, default=0.02, help="latência simulada da Bot API (s)")
+    parser.add_argument("--taxa-envio", type=float, default=None,
+                        help="limite global de envios/s (padrão: TELEGRAM_ENVIOS_POR_SEGUNDO; 0 = sem limite)")
+    parser.add_argument("--saida", help="arquivo JSON de saída (padrão: benchmarks/resultados/carga-<commit>.json)")
+    args = parser.parse_args()
+    niveis = [int(n) for n in args.niveis.split(",")]
+
+    contexto = multiprocessing.get_context("spawn")
+    eventos = contexto.Queue()
+    conexao, conexao_dubles = contexto.Pipe()
+    dubles = contexto.Process(target=_servir_dubles, daemon=True,
+                              args=(conexao_dubles, eventos, args.latencia_telegram, args.latencia_linkedin))
+    dubles.start()
+    url_telegram, url_linkedin = conexao.recv()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        # Lidas pelo config na importação dos módulos do bot (daqui em diante).
+        os.environ.update({
+            "TELEGRAM_BOT_TOKEN": "123456:TESTE", "TELEGRAM_API_URL": url_telegram, "LINKEDIN_URL": url_linkedin,
+            "ALERTAS_INTERVALO": "0", "HISTORICO_COMPACTACAO_INTERVALO": "0", "METRICAS_PORTA": "0",
+        })
+        from config import TELEGRAM_ENVIOS_POR_SEGUNDO
+        from profiles import profile_manager
+
+        if args.taxa_envio is None:
+            args.taxa_envio = TELEGRAM_ENVIOS_POR_SEGUNDO
+        profile_manager.DB_PATH = os.path.join(pasta, "carga.db")
+        profile_manager.inicializar_banco()
+        # Os módulos imprimem o progresso no stdout; aqui só interessa o relatório.
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultados = asyncio.run(executar(args, eventos, niveis))
+        profile_manager.fechar_conexoes()
+    conexao.send(None)
+    dubles.join(timeout=10)
+
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"carga-{_commit_atual()}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump({"commit": _commit_atual(), "data": time.strftime("%Y-%m-%dT%H:%M:%S"), "parametros": vars(args),
+                   "niveis": resultados}, f, ensure_ascii=False, indent=2)
+
+    print(f"Gemini {args.latencia_gemini:g} s, digitação ~{args.pensar:g} s, "
+          f"envios {'sem limite' if not args.taxa_envio else f'{args.taxa_envio:g}/s'}, {args.duracao:g} s por nível")
+    _imprimir(resultados, args.slo)
+    print(f"\nResultados gravados em {saida}")
+
+
+if __name__ == "__main__":
+    main()
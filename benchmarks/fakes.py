@@ -0,0 +1,428 @@
+"""
+Dublês locais das dependências externas, usados pelos benchmarks e testes offline.
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import types
+import zlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+class ErroApiFalso(Exception):
+    """Erro com `code` HTTP, no mesmo formato das exceções do google-genai."""
+
+    def __init__(self, code: int, mensagem: str = ""):
+        super().__init__(f"{code} {mensagem}".strip())
+        self.code = code
+
+
+class ClienteGeminiFalso:
+    """
+    Imita `genai.Client` (apenas `client.aio.models.generate_content`).
+
+    Responde após `latencia` segundos com `resposta` serializada em JSON e falha
+    com 429 nas primeiras `falhas_429` chamadas e depois com 503 nas
+    `falhas_503` seguintes, para exercitar o retry.
+    Registra o pico de chamadas simultâneas em `pico_concorrencia`.
+    """
+
+    def __init__(self, resposta: Optional[Dict] = None, latencia: float = 0.0, falhas_429: int = 0,
+                 falhas_503: int = 0):
+        self.resposta = resposta or {
+            "cargo_ideal": "Desenvolvedor Python",
+            "nivel_experiencia": "Pleno",
+            "habilidades_chave": ["Python", "SQL", "Django", "Docker", "Git"],
+        }
+        self.latencia = latencia
+        self.falhas_429 = falhas_429
+        self.falhas_503 = falhas_503
+        self.chamadas = 0
+        self.em_voo = 0
+        self.pico_concorrencia = 0
+        self.prompts = []
+        self.aio = types.SimpleNamespace(models=types.SimpleNamespace(generate_content=self._generate_content))
+
+    async def _generate_content(self, model: str, contents: str, config=None):
+        self.chamadas += 1
+        self.prompts.append(contents)
+        self.em_voo += 1
+        self.pico_concorrencia = max(self.pico_concorrencia, self.em_voo)
+        try:
+            await asyncio.sleep(self.latencia)
+            if self.falhas_429 > 0:
+                self.falhas_429 -= 1
+                raise ErroApiFalso(429, "RESOURCE_EXHAUSTED")
+            if self.falhas_503 > 0:
+                self.falhas_503 -= 1
+                raise ErroApiFalso(503, "UNAVAILABLE")
+            return types.SimpleNamespace(text=json.dumps(self.resposta, ensure_ascii=False))
+        finally:
+            self.em_voo -= 1
+
+
+# --- LinkedIn ---
+
+_FIXTURE_LINKEDIN = os.path.join(os.path.dirname(__file__), "fixtures", "linkedin_busca.html")
+_ID_VAGA = re.compile(r"(jobs/view/[^\"?]*-|jobPosting:)(\d+)")
+
+
+class ServidorLinkedInFalso:
+    """
+    Servidor HTTP local que imita a busca pública de vagas do LinkedIn.
+
+    Cada página devolve o HTML gravado em fixtures/ com os IDs das vagas
+    deslocados pelo número da página e pela localização buscada (para que
+    cada página e cada localização tragam vagas diferentes). Páginas a
+    partir de `paginas` voltam sem cards.
+    Use como context manager; `url` fica disponível após a entrada.
+    """
+
+    def __init__(self, paginas: int = 5, latencia: float = 0.0, html: Optional[str] = None):
+        if html is None:
+            with open(_FIXTURE_LINKEDIN, encoding="utf-8") as f:
+                html = f.read()
+        self.paginas = paginas
+        self.latencia = latencia
+        self.requisicoes = 0
+        self._html = html
+        self._paginas_html: Dict[tuple, bytes] = {}
+        self._servidor: Optional[ThreadingHTTPServer] = None
+        self.url = ""
+
+    def _pagina(self, numero: int, local: str = "") -> bytes:
+        if (numero, local) not in self._paginas_html:
+            if numero >= self.paginas:
+                html = "<html><body><ul class=\"jobs-search__results-list\"></ul></body></html>"
+            else:
+                deslocamento = numero * 1_000_000_000 + (zlib.crc32(local.encode("utf-8")) % 997) * 1_000_000
+                html = _ID_VAGA.sub(lambda m: f"{m.group(1)}{int(m.group(2)) + deslocamento}", self._html)
+            self._paginas_html[numero, local] = html.encode("utf-8")
+        return self._paginas_html[numero, local]
+
+    def __enter__(self) -> "ServidorLinkedInFalso":
+        falso = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                falso.requisicoes += 1
+                params = parse_qs(urlparse(self.path).query)
+                numero = int(params.get("pageNum", ["0"])[0])
+                if falso.latencia:
+                    time.sleep(falso.latencia)
+                corpo = falso._pagina(numero, params.get("location", [""])[0])
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                    self.send_header("Content-Length", str(len(corpo)))
+                    self.end_headers()
+                    self.wfile.write(corpo)
+                except (BrokenPipeError, ConnectionResetError):
+                    # O cliente cancelou a página (ex.: a busca parou ao atingir o limite de vagas).
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._servidor.daemon_threads = True
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._servidor.server_port}/jobs/search"
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+
+# --- PDF ---
+
+_SECOES_CV = {
+    "Resumo": "Profissional de tecnologia com {anos} anos de experiência em desenvolvimento de software, "
+              "APIs REST e automação de processos, atuando em equipes ágeis.",
+    "Experiência Profissional": "Empresa {n} - Desenvolvedor Python ({inicio}-{fim})\n"
+                                "Desenvolvimento de microsserviços com Django e FastAPI, integração com "
+                                "bancos PostgreSQL e filas RabbitMQ, implantação com Docker e Kubernetes.",
+    "Formação Acadêmica": "Bacharelado em Ciência da Computação - Universidade Federal ({fim})",
+    "Habilidades": "Python, SQL, Django, FastAPI, Docker, Git, Linux, testes automatizados",
+    "Idiomas": "Inglês avançado, Espanhol intermediário",
+}
+
+
+def gerar_pdf_cv(indice: int = 0, paginas: int = 2) -> bytes:
+    """Gera um CV sintético em PDF (determinístico para o mesmo índice), com cabeçalho e rodapé por página."""
+    import fitz
+
+    doc = fitz.open()
+    for numero in range(paginas):
+        pagina = doc.new_page()
+        linhas = [f"Candidato {indice} - candidato{indice}@exemplo.com - (21) 99999-{indice % 10000:04d}", ""]
+        for titulo, texto in _SECOES_CV.items():
+            linhas.append(titulo)
+            linhas.extend(texto.format(anos=3 + indice % 10, n=numero + 1, inicio=2015 + numero, fim=2019 + numero).split("\n"))
+            linhas.append("")
+        linhas.append(f"Página {numero + 1} de {paginas}")
+        pagina.insert_textbox(fitz.Rect(50, 50, 545, 800), "\n".join(linhas), fontsize=10)
+    conteudo = doc.tobytes()
+    doc.close()
+    return conteudo
+
+
+# --- Telegram ---
+
+class MensagemFalsa:
+    """Imita `telegram.Message`: guarda tudo o que o bot respondeu em `respostas`."""
+
+    def __init__(self, user_id: int, texto: str = "", documento=None, respostas: Optional[list] = None):
+        self.text = texto
+        self.from_user = types.SimpleNamespace(id=user_id)
+        self.chat_id = user_id
+        self.message_id = 1
+        self.document = documento
+        self.respostas = respostas if respostas is not None else []
+
+    async def reply_text(self, texto: str, **kwargs):
+        self.respostas.append(texto)
+        return MensagemFalsa(self.from_user.id, texto, respostas=self.respostas)
+
+    async def edit_text(self, texto: str, **kwargs):
+        self.text = texto
+        self.respostas.append(texto)
+        return self
+
+
+def criar_update(user_id: int, texto: str = "", pdf: Optional[bytes] = None, respostas: Optional[list] = None):
+    """Cria um `Update` sintético de mensagem de texto ou de documento PDF."""
+    documento = None
+    if pdf is not None:
+        documento = types.SimpleNamespace(file_id=f"pdf-{user_id}", file_size=len(pdf), conteudo=pdf)
+    mensagem = MensagemFalsa(user_id, texto, documento, respostas)
+    usuario = types.SimpleNamespace(id=user_id)
+    return types.SimpleNamespace(
+        message=mensagem, effective_user=usuario, effective_message=mensagem,
+        effective_chat=types.SimpleNamespace(id=user_id), callback_query=None,
+    )
+
+
+class ContextoFalso:
+    """Imita `ContextTypes.DEFAULT_TYPE`: `user_data` persistente e `bot.get_file` servindo o PDF do update."""
+
+    def __init__(self):
+        self.user_data: Dict = {}
+        self._arquivos: Dict[str, bytes] = {}
+        self.bot = types.SimpleNamespace(get_file=self._get_file)
+
+    def anexar(self, update):
+        documento = update.message.document
+        if documento is not None:
+            self._arquivos[documento.file_id] = documento.conteudo
+        return self
+
+    async def _get_file(self, file_id: str):
+        conteudo = self._arquivos[file_id]
+
+        async def download_as_bytearray():
+            return bytearray(conteudo)
+
+        return types.SimpleNamespace(download_as_bytearray=download_as_bytearray)
+
+
+class ServidorTelegramFalso:
+    """
+    Servidor HTTP local que imita a Bot API do Telegram (use com TELEGRAM_API_URL).
+
+    Responde getMe, sendMessage, editMessageText, getFile etc. com objetos
+    plausíveis e registra cada chamada em `chamadas` como (método, parâmetros).
+    Os arquivos de `arquivos` (file_id -> bytes) são servidos em /file/bot<token>/.
+    Use como context manager; `url` fica disponível após a entrada.
+
+    Com `max_por_segundo` (todas as mensagens) ou `max_por_chat` (mensagens de
+    um chat em `janela_chat` segundos), os envios e edições acima do limite
+    recebem 429 com `retry_after`, como o controle de flood do Telegram; eles
+    não entram em `chamadas` e são contados em `recusas`.
+
+    `ouvinte(metodo, parametros)`, se definido, é chamado (na thread da
+    requisição) a cada chamada aceita.
+    """
+
+    BOT = {"id": 1, "is_bot": True, "first_name": "Bot", "username": "bot_falso"}
+    ENVIOS = ("sendMessage", "editMessageText")
+
+    def __init__(self, latencia: float = 0.0, max_por_segundo: int = 0, max_por_chat: int = 0,
+                 janela_chat: float = 1.0, retry_after: int = 1):
+        self.latencia = latencia
+        self.max_por_segundo = max_por_segundo
+        self.max_por_chat = max_por_chat
+        self.janela_chat = janela_chat
+        self.retry_after = retry_after
+        self.chamadas: list = []
+        self.recusas = 0
+        self.arquivos: Dict[str, bytes] = {}
+        self.ouvinte: Optional[Callable[[str, Dict], None]] = None
+        self._proxima_mensagem = 1000
+        self._envios: deque = deque()
+        self._envios_chat: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._servidor: Optional[ThreadingHTTPServer] = None
+        self.url = ""
+
+    def _excede_limite(self, metodo: str, parametros: Dict) -> bool:
+        """Registra o envio na janela; True se ele passa de um dos limites (e não é aceito)."""
+        if metodo not in self.ENVIOS or not (self.max_por_segundo or self.max_por_chat):
+            return False
+        agora = time.monotonic()
+        with self._lock:
+            chat = self._envios_chat.setdefault(str(parametros.get("chat_id")), deque())
+            for janela, duracao in ((self._envios, 1.0), (chat, self.janela_chat)):
+                while janela and agora - janela[0] >= duracao:
+                    janela.popleft()
+            if (self.max_por_segundo and len(self._envios) >= self.max_por_segundo) or \
+                    (self.max_por_chat and len(chat) >= self.max_por_chat):
+                self.recusas += 1
+                return True
+            self._envios.append(agora)
+            chat.append(agora)
+        return False
+
+    def mensagens(self, chat_id: int) -> list:
+        """Textos enviados (ou editados) pelo bot no chat, em ordem."""
+        with self._lock:
+            return [
+                p.get("text", "") for metodo, p in self.chamadas
+                if metodo in ("sendMessage", "editMessageText") and str(p.get("chat_id")) == str(chat_id)
+            ]
+
+    def _mensagem(self, parametros: Dict) -> Dict:
+        with self._lock:
+            self._proxima_mensagem += 1
+            message_id = int(parametros.get("message_id") or self._proxima_mensagem)
+        chat_id = int(parametros.get("chat_id") or 0)
+        return {
+            "message_id": message_id, "date": int(time.time()), "text": parametros.get("text", ""),
+            "chat": {"id": chat_id, "type": "private"}, "from": self.BOT,
+        }
+
+    def _resultado(self, metodo: str, parametros: Dict):
+        if metodo == "getMe":
+            return self.BOT
+        if metodo in ("sendMessage", "editMessageText"):
+            return self._mensagem(parametros)
+        if metodo == "getFile":
+            file_id = parametros["file_id"]
+            return {"file_id": file_id, "file_unique_id": file_id, "file_size": len(self.arquivos.get(file_id, b"")),
+                    "file_path": f"documentos/{file_id}"}
+        return True
+
+    def __enter__(self) -> "ServidorTelegramFalso":
+        falso = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _enviar(self, corpo: bytes, tipo: str = "application/json", status: int = 200):
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", tipo)
+                    self.send_header("Content-Length", str(len(corpo)))
+                    self.end_headers()
+                    self.wfile.write(corpo)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def do_GET(self):
+                caminho = urlparse(self.path).path
+                if caminho.startswith("/file/"):
+                    self._enviar(falso.arquivos.get(caminho.rsplit("/", 1)[-1], b""), "application/octet-stream")
+                else:
+                    self.do_POST()
+
+            def do_POST(self):
+                metodo = urlparse(self.path).path.rsplit("/", 1)[-1]
+                corpo = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+                # A biblioteca envia os parâmetros como formulário, com os valores não textuais em JSON.
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    parametros = json.loads(corpo or "{}")
+                else:
+                    parametros = {}
+                    for chave, valores in parse_qs(corpo).items():
+                        try:
+                            parametros[chave] = json.loads(valores[0])
+                        except ValueError:
+                            parametros[chave] = valores[0]
+                if falso.latencia:
+                    time.sleep(falso.latencia)
+                if falso._excede_limite(metodo, parametros):
+                    self._enviar(json.dumps({
+                        "ok": False, "error_code": 429,
+                        "description": f"Too Many Requests: retry after {falso.retry_after}",
+                        "parameters": {"retry_after": falso.retry_after},
+                    }).encode("utf-8"), status=429)
+                    return
+                with falso._lock:
+                    falso.chamadas.append((metodo, parametros))
+                if falso.ouvinte is not None:
+                    falso.ouvinte(metodo, parametros)
+                resposta = {"ok": True, "result": falso._resultado(metodo, parametros)}
+                self._enviar(json.dumps(resposta).encode("utf-8"))
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._servidor.daemon_threads = True
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._servidor.server_port}"
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+
+def update_telegram(update_id: int, user_id: int, texto: str = "", botao: Optional[str] = None,
+                    message_id: int = 1, documento: Optional[str] = None) -> Dict:
+    """
+    JSON de um update do Telegram: mensagem de texto (comandos com a entidade
+    bot_command), clique em botão ou, com `documento` (file_id), envio de um PDF.
+    """
+    usuario = {"id": user_id, "is_bot": False, "first_name": f"Usuário {user_id}"}
+    chat = {"id": user_id, "type": "private"}
+    if botao is not None:
+        mensagem = {"message_id": message_id, "date": int(time.time()), "chat": chat,
+                    "from": ServidorTelegramFalso.BOT, "text": "menu"}
+        return {"update_id": update_id, "callback_query": {
+            "id": str(update_id), "from": usuario, "chat_instance": str(user_id), "data": botao, "message": mensagem,
+        }}
+    mensagem = {"message_id": message_id, "date": int(time.time()), "chat": chat, "from": usuario}
+    if documento is not None:
+        mensagem["document"] = {"file_id": documento, "file_unique_id": documento, "file_name": "curriculo.pdf",
+                                "mime_type": "application/pdf"}
+        return {"update_id": update_id, "message": mensagem}
+    mensagem["text"] = texto
+    if texto.startswith("/"):
+        mensagem["entities"] = [{"type": "bot_command", "offset": 0, "length": len(texto.split()[0])}]
+    return {"update_id": update_id, "message": mensagem}
+
+
+def postar_update(url: str, update: Dict, segredo: str = "") -> int:
+    """Envia o update ao webhook como o Telegram faria. Retorna o status HTTP."""
+    import urllib.error
+    import urllib.request
+
+    requisicao = urllib.request.Request(
+        url, data=json.dumps(update).encode("utf-8"), method="POST",
+        headers={"Content-Type": "application/json", "X-Telegram-Bot-Api-Secret-Token": segredo},
+    )
+    try:
+        with urllib.request.urlopen(requisicao, timeout=10) as resposta:
+            return resposta.status
+    except urllib.error.HTTPError as e:
+        return e.code
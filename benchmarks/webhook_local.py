@@ -0,0 +1,145 @@
+"""
+Teste de ponta a ponta do modo webhook, sem rede e sem Telegram.
+
+Sobe o servidor do webhook (telegram_bot/webhook.py) com processos
+trabalhadores de verdade, um servidor local que imita a Bot API
+(TELEGRAM_API_URL) e o LinkedIn falso. Cada usuário simulado já tem
+perfil salvo e percorre a conversa /start -> "Buscar Vagas" -> localização:
+
+1. os dois primeiros passos são enviados a `--processos` trabalhadores;
+2. o servidor é encerrado e sobe de novo com outra quantidade de
+   trabalhadores, que recebe a localização. A busca só acontece se o estado
+   da conversa e o user_data tiverem sido gravados no SQLite e recarregados
+   por outro processo.
+
+Confere também que updates sem o token secreto são recusados (403).
+Informa a latência (envio do update até "Busca encerrada") e quantos
+updates cada trabalhador recebeu. O banco é um SQLite temporário.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.webhook_local [--usuarios 40] [--processos 3] [--processos-depois 2]
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.fakes import ServidorLinkedInFalso, ServidorTelegramFalso, postar_update, update_telegram
+
+SEGREDO = "segredo-local"
+FIM_BUSCA = "Busca encerrada"
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round((len(ordenados) - 1) * p)))]
+
+
+def _esperar(condicao, prazo: float, descricao: str):
+    limite = time.monotonic() + prazo
+    while not condicao():
+        if time.monotonic() > limite:
+            raise SystemExit(f"Tempo esgotado esperando {descricao}.")
+        time.sleep(0.05)
+
+
+def _iniciar(processos: int):
+    # Importado aqui: config lê as variáveis de ambiente definidas em main().
+    from telegram_bot.webhook import ServidorWebhook
+
+    servidor = ServidorWebhook(processos=processos, endereco="127.0.0.1", porta=0, caminho="/webhook", segredo=SEGREDO)
+    servidor.iniciar()
+    return servidor, f"http://127.0.0.1:{servidor.porta}/webhook"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=40)
+    parser.add_argument("--processos", type=int, default=3, help="trabalhadores na primeira etapa")
+    parser.add_argument("--processos-depois", type=int, default=2, help="trabalhadores após o reinício")
+    parser.add_argument("--latencia-telegram", type=float, default=0.01, help="latência (s) da Bot API falsa")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta, \
+            ServidorLinkedInFalso(paginas=3) as linkedin, \
+            ServidorTelegramFalso(latencia=args.latencia_telegram) as telegram:
+        # Herdado pelos trabalhadores (spawn), que leem o config ao importar.
+        os.environ.update({
+            "TELEGRAM_BOT_TOKEN": "123456:TESTE", "TELEGRAM_API_URL": telegram.url, "LINKEDIN_URL": linkedin.url,
+            "ALERTAS_INTERVALO": "0", "HISTORICO_COMPACTACAO_INTERVALO": "0", "METRICAS_PORTA": "0",
+            "PERSISTENCIA_INTERVALO": "1",
+        })
+        from profiles import profile_manager
+
+        profile_manager.DB_PATH = os.path.join(pasta, "bot.db")
+        profile_manager.inicializar_banco()
+        usuarios = [1000 + i for i in range(args.usuarios)]
+        for user_id in usuarios:
+            profile_manager.salvar_perfil(user_id, {
+                "cargo_ideal": "Desenvolvedor Python", "habilidades_chave": ["Python", "Django", "SQL"],
+                "nome": f"Usuário {user_id}", "sobrenome": "Teste", "telefone": "11999990000",
+            })
+        profile_manager.fechar_conexoes()
+
+        proximo_update = iter(range(1, 10**9))
+
+        def enviar(url: str, update: Dict):
+            status = postar_update(url, update, SEGREDO)
+            if status != 200:
+                raise SystemExit(f"Webhook respondeu {status}.")
+
+        # --- Etapa 1: /start e clique em "Buscar Vagas" ---
+        servidor, url = _iniciar(args.processos)
+        # Update sem o token secreto, ou com outro, é recusado antes de chegar a um trabalhador.
+        for segredo in ("", "outro-segredo"):
+            status = postar_update(url, update_telegram(next(proximo_update), usuarios[0], "/start"), segredo)
+            if status != 403:
+                raise SystemExit(f"Update com token secreto {segredo!r} respondeu {status} (esperado 403).")
+        for user_id in usuarios:
+            enviar(url, update_telegram(next(proximo_update), user_id, "/start"))
+        _esperar(lambda: all(telegram.mensagens(u) for u in usuarios), 60, "as respostas ao /start")
+        for user_id in usuarios:
+            enviar(url, update_telegram(next(proximo_update), user_id, botao="acao_buscar"))
+        _esperar(lambda: all(len(telegram.mensagens(u)) >= 2 for u in usuarios), 60, "as respostas ao botão")
+        distribuicao_antes = list(servidor.encaminhados)
+        inicio = time.perf_counter()
+        servidor.encerrar()
+        encerramento = time.perf_counter() - inicio
+
+        # --- Etapa 2: outra quantidade de trabalhadores recebe a localização ---
+        inicio = time.perf_counter()
+        servidor, url = _iniciar(args.processos_depois)
+        enviados: Dict[int, float] = {}
+        for user_id in usuarios:
+            enviados[user_id] = time.perf_counter()
+            enviar(url, update_telegram(next(proximo_update), user_id, "São Paulo"))
+
+        concluidos: Dict[int, float] = {}
+
+        def todos_concluidos() -> bool:
+            for user_id in usuarios:
+                if user_id not in concluidos and any(FIM_BUSCA in t for t in telegram.mensagens(user_id)):
+                    concluidos[user_id] = time.perf_counter() - enviados[user_id]
+            return len(concluidos) == len(usuarios)
+
+        _esperar(todos_concluidos, 120, "o fim das buscas")
+        total = time.perf_counter() - inicio
+        distribuicao_depois = list(servidor.encaminhados)
+        servidor.encerrar()
+
+        latencias = list(concluidos.values())
+        chamadas = {}
+        for metodo, _ in telegram.chamadas:
+            chamadas[metodo] = chamadas.get(metodo, 0) + 1
+        print(f"\n{args.usuarios} usuários; {args.processos} trabalhadores -> reinício -> {args.processos_depois}")
+        print(f"Encerramento da etapa 1: {encerramento:.1f} s")
+        print(f"Updates por trabalhador: etapa 1 {distribuicao_antes}, etapa 2 {distribuicao_depois}")
+        print(f"Localização -> '{FIM_BUSCA}' (inclui a subida dos trabalhadores): "
+              f"p50 {_percentil(latencias, 0.5):.2f} s, p95 {_percentil(latencias, 0.95):.2f} s, "
+              f"todas em {total:.1f} s")
+        print(f"Chamadas à Bot API: {dict(sorted(chamadas.items()))}")
+
+
+if __name__ == "__main__":
+    main()
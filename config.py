@@ -7,3 +7,131 @@ TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 LINKEDIN_URL = os.getenv("LINKEDIN_URL")
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+
+# --- Scraper ---
+# Timeout (em segundos) de cada requisição HTTP feita às fontes de vagas.
+SCRAPER_TIMEOUT = float(os.getenv("SCRAPER_TIMEOUT", "10"))
+# Tamanho do pool de conexões keep-alive compartilhado entre todas as buscas.
+SCRAPER_MAX_CONEXOES = int(os.getenv("SCRAPER_MAX_CONEXOES", "100"))
+# Quantidade máxima de páginas de resultado consultadas por busca.
+SCRAPER_MAX_PAGINAS = int(os.getenv("SCRAPER_MAX_PAGINAS", "8"))
+# Quantas páginas podem ser baixadas em paralelo dentro de uma mesma busca.
+SCRAPER_CONCORRENCIA_PAGINAS = int(os.getenv("SCRAPER_CONCORRENCIA_PAGINAS", "3"))
+# Parser de HTML dos resultados: "auto" (mais rápido disponível), "selectolax", "lxml" ou "bs4".
+SCRAPER_PARSER = os.getenv("SCRAPER_PARSER", "auto").lower()
+# Prazo (em segundos) compartilhado pelas fontes em uma busca; a fonte que não
+# responder a tempo é descartada e a busca segue com as demais (0 desativa).
+SCRAPER_PRAZO = float(os.getenv("SCRAPER_PRAZO", "20"))
+# Fontes habilitadas, separadas por vírgula (vazio = todas as registradas).
+SCRAPER_FONTES = [f.strip().lower() for f in os.getenv("SCRAPER_FONTES", "").split(",") if f.strip()]
+# Máximo de localizações buscadas em paralelo quando o usuário pede várias ("Rio de Janeiro, Niterói, Remoto").
+SCRAPER_MAX_LOCALIZACOES = int(os.getenv("SCRAPER_MAX_LOCALIZACOES", "5"))
+
+# --- Cache de buscas ---
+# Tempo (em segundos) que uma página de resultados fica válida no cache compartilhado.
+CACHE_BUSCAS_TTL = int(os.getenv("CACHE_BUSCAS_TTL", "1800"))
+# Quantidade máxima de páginas mantidas em memória (as menos usadas saem primeiro).
+CACHE_BUSCAS_MAX_ITENS = int(os.getenv("CACHE_BUSCAS_MAX_ITENS", "2000"))
+# Se ativo, as páginas também são gravadas no SQLite e sobrevivem a reinícios.
+CACHE_BUSCAS_PERSISTENTE = os.getenv("CACHE_BUSCAS_PERSISTENTE", "1").lower() in ("1", "true", "sim")
+
+# --- Banco de dados (SQLite) ---
+# Modo de sincronização do SQLite. Com WAL, NORMAL é seguro contra corrupção e
+# evita um fsync por transação (pode perder apenas os últimos commits numa queda de energia).
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+# Tamanho do cache de páginas de cada conexão, em KiB.
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "16384"))
+# Threads dedicadas às operações de banco chamadas pelos handlers assíncronos.
+SQLITE_THREADS = int(os.getenv("SQLITE_THREADS", "4"))
+
+# --- Gemini ---
+# Máximo de chamadas simultâneas à API do Gemini (as demais aguardam na fila, em ordem).
+GEMINI_MAX_CONCORRENCIA = int(os.getenv("GEMINI_MAX_CONCORRENCIA", "4"))
+# Tentativas por análise quando a API responde com limite de taxa / indisponibilidade.
+GEMINI_MAX_TENTATIVAS = int(os.getenv("GEMINI_MAX_TENTATIVAS", "4"))
+# Espera base e máxima (em segundos) do backoff exponencial com jitter entre tentativas.
+GEMINI_BACKOFF_BASE = float(os.getenv("GEMINI_BACKOFF_BASE", "1.0"))
+GEMINI_BACKOFF_MAX = float(os.getenv("GEMINI_BACKOFF_MAX", "20.0"))
+
+# --- PDF ---
+# Limites da extração de texto: tamanho do arquivo, páginas lidas e caracteres extraídos.
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(10 * 1024 * 1024)))
+PDF_MAX_PAGINAS = int(os.getenv("PDF_MAX_PAGINAS", "15"))
+PDF_MAX_CARACTERES = int(os.getenv("PDF_MAX_CARACTERES", "60000"))
+# Tempo máximo (em segundos) de extração de um documento e processos dedicados a ela.
+PDF_TIMEOUT = float(os.getenv("PDF_TIMEOUT", "20"))
+PDF_PROCESSOS = int(os.getenv("PDF_PROCESSOS", "2"))
+# Orçamento (em tokens estimados) do texto do CV enviado ao Gemini; 0 desativa o corte por seções.
+CV_ORCAMENTO_TOKENS = int(os.getenv("CV_ORCAMENTO_TOKENS", "2000"))
+
+# --- Métricas ---
+# Porta do endpoint local /metrics no formato Prometheus (0 desativa).
+METRICAS_PORTA = int(os.getenv("METRICAS_PORTA", "0"))
+METRICAS_ENDERECO = os.getenv("METRICAS_ENDERECO", "127.0.0.1")
+# Intervalo (em segundos) do despejo periódico das métricas (0 desativa) e arquivo de destino
+# (sem arquivo, o despejo vai para o log).
+METRICAS_DESPEJO_INTERVALO = float(os.getenv("METRICAS_DESPEJO_INTERVALO", "0"))
+METRICAS_DESPEJO_ARQUIVO = os.getenv("METRICAS_DESPEJO_ARQUIVO")
+
+# --- Alertas periódicos ---
+# Intervalo (em segundos) entre as rodadas de alertas de vagas (0 desativa) e atraso da primeira rodada.
+ALERTAS_INTERVALO = float(os.getenv("ALERTAS_INTERVALO", str(6 * 60 * 60)))
+ALERTAS_PRIMEIRA_EXECUCAO = float(os.getenv("ALERTAS_PRIMEIRA_EXECUCAO", "60"))
+# Páginas raspadas por busca agrupada e buscas distintas raspadas ao mesmo tempo.
+ALERTAS_MAX_PAGINAS = int(os.getenv("ALERTAS_MAX_PAGINAS", "2"))
+ALERTAS_CONCORRENCIA = int(os.getenv("ALERTAS_CONCORRENCIA", "4"))
+
+# --- Deduplicação de vagas ---
+# Distância máxima de Hamming (em bits, de 0 a 3) entre os simhashes do nome da
+# empresa de duas vagas com o mesmo título e a mesma cidade para elas serem
+# consideradas a mesma (republicação).
+DEDUP_DISTANCIA_MAXIMA = min(3, int(os.getenv("DEDUP_DISTANCIA_MAXIMA", "1")))
+
+# --- Histórico de envios ---
+# Dias que uma vaga enviada fica no histórico (e não é reenviada ao mesmo usuário); 0 guarda para sempre.
+HISTORICO_RETENCAO_DIAS = float(os.getenv("HISTORICO_RETENCAO_DIAS", "180"))
+# Intervalo (em segundos) entre as compactações do histórico (0 desativa).
+HISTORICO_COMPACTACAO_INTERVALO = float(os.getenv("HISTORICO_COMPACTACAO_INTERVALO", str(24 * 60 * 60)))
+
+# --- Concorrência do bot ---
+# Updates do Telegram processados ao mesmo tempo (os de um mesmo usuário seguem em ordem)
+# e updates de um mesmo usuário aguardando a vez; acima disso os novos são descartados.
+BOT_UPDATES_CONCORRENTES = int(os.getenv("BOT_UPDATES_CONCORRENTES", "64"))
+BOT_UPDATES_PENDENTES_USUARIO = int(os.getenv("BOT_UPDATES_PENDENTES_USUARIO", "3"))
+# Depois que o bot começa a receber updates, carrega em segundo plano o que os módulos só importam
+# no primeiro uso (processos de extração de PDF, google-genai, índice de localizações, NumPy).
+BOT_PREAQUECER = os.getenv("BOT_PREAQUECER", "1").lower() in ("1", "true", "sim")
+# Análises de CV (extração do PDF + IA) e buscas de vagas executadas ao mesmo tempo.
+AGENDADOR_MAX_CV = int(os.getenv("AGENDADOR_MAX_CV", "4"))
+AGENDADOR_MAX_BUSCAS = int(os.getenv("AGENDADOR_MAX_BUSCAS", "8"))
+# Pedidos aguardando em cada fila; com a fila cheia, os novos são recusados.
+AGENDADOR_MAX_FILA = int(os.getenv("AGENDADOR_MAX_FILA", "50"))
+
+# --- Telegram: modo webhook e estado compartilhado ---
+# URL pública (HTTPS) registrada como webhook no Telegram; vazia = long polling em um único processo.
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+# Endereço e porta do servidor HTTP local que recebe os updates (atrás do proxy/TLS, na mesma máquina;
+# use 0.0.0.0 só se o proxy estiver em outra).
+WEBHOOK_ENDERECO = os.getenv("WEBHOOK_ENDERECO", "127.0.0.1")
+WEBHOOK_PORTA = int(os.getenv("WEBHOOK_PORTA", "8443"))
+# Token conferido no cabeçalho X-Telegram-Bot-Api-Secret-Token de cada update (vazio = um token
+# aleatório gerado a cada partida e registrado no Telegram junto com o webhook).
+WEBHOOK_SEGREDO = os.getenv("WEBHOOK_SEGREDO", "")
+# Processos que atendem os updates no modo webhook (cada usuário é sempre atendido pelo mesmo).
+BOT_PROCESSOS = int(os.getenv("BOT_PROCESSOS", "2"))
+# Updates aguardando em cada processo; com a fila cheia o webhook responde 503 e o Telegram reenvia depois.
+WEBHOOK_MAX_FILA = int(os.getenv("WEBHOOK_MAX_FILA", "1000"))
+# Intervalo (em segundos) entre as gravações do estado das conversas e do user_data no banco.
+PERSISTENCIA_INTERVALO = float(os.getenv("PERSISTENCIA_INTERVALO", "5"))
+# URL base da Bot API (vazia = api.telegram.org), para um servidor Bot API local ou de testes.
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "").rstrip("/")
+
+# --- Telegram: envio de mensagens ---
+# Mensagens por segundo enviadas pelo bot, somando todos os chats (o Telegram recusa acima de ~30);
+# no modo webhook o total é dividido entre os processos.
+TELEGRAM_ENVIOS_POR_SEGUNDO = float(os.getenv("TELEGRAM_ENVIOS_POR_SEGUNDO", "25"))
+# Intervalo (em segundos) entre mensagens de um mesmo chat e quantas podem sair de uma vez antes dele.
+TELEGRAM_INTERVALO_CHAT = float(os.getenv("TELEGRAM_INTERVALO_CHAT", "1"))
+TELEGRAM_RAJADA_CHAT = int(os.getenv("TELEGRAM_RAJADA_CHAT", "5"))
+# Tentativas de um envio recusado por excesso (429 com retry_after) antes de desistir.
+TELEGRAM_MAX_TENTATIVAS = int(os.getenv("TELEGRAM_MAX_TENTATIVAS", "3"))
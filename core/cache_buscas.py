@@ -0,0 +1,121 @@
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from core import metricas
+from config import CACHE_BUSCAS_TTL, CACHE_BUSCAS_MAX_ITENS, CACHE_BUSCAS_PERSISTENTE
+from profiles.profile_manager import (
+    ler_cache_busca, gravar_cache_busca, remover_cache_buscas_expirado, executar_no_banco
+)
+
+# A cada quantas gravações o cache aproveita para expurgar entradas vencidas no banco.
+_GRAVACOES_POR_EXPURGO = 200
+
+
+def normalizar_termo(texto: str) -> str:
+    """Normaliza um termo de busca: sem acentos, minúsculo e com espaços colapsados."""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", texto).strip().casefold()
+
+
+def chave_busca(cargo: str, localizacao: str, pagina: int = 0, fonte: str = "linkedin") -> str:
+    """Monta a chave de cache de uma página de resultados de uma fonte."""
+    return f"{fonte}|{normalizar_termo(cargo)}|{normalizar_termo(localizacao)}|{pagina}"
+
+
+class CacheBuscas:
+    """
+    Cache de resultados de busca compartilhado entre todos os usuários.
+
+    Mantém as páginas mais usadas em memória (LRU com limite de tamanho) e,
+    opcionalmente, uma segunda camada no SQLite para sobreviver a reinícios.
+    As entradas valem por `ttl` segundos. O filtro de vagas já enviadas é
+    feito por usuário depois, sobre a lista devolvida pelo cache.
+    """
+
+    def __init__(self, ttl: int, max_itens: int, persistente: bool):
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self.persistente = persistente
+        self._itens: "OrderedDict[str, Tuple[List[Dict], float]]" = OrderedDict()
+        self._gravacoes = 0
+        self.hits_memoria = 0
+        self.hits_banco = 0
+        self.misses = 0
+
+    def _guardar_em_memoria(self, chave: str, vagas: List[Dict], criado_em: float):
+        self._itens[chave] = (vagas, criado_em)
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.max_itens:
+            self._itens.popitem(last=False)
+
+    async def obter(self, chave: str) -> Optional[List[Dict]]:
+        """Retorna as vagas em cache para a chave, ou None se não houver entrada válida."""
+        limite = time.time() - self.ttl
+
+        item = self._itens.get(chave)
+        if item is not None:
+            vagas, criado_em = item
+            if criado_em > limite:
+                self._itens.move_to_end(chave)
+                self.hits_memoria += 1
+                metricas.incrementar("bot_cache_consultas_total", cache="buscas", resultado="hit_memoria")
+                return vagas
+            del self._itens[chave]
+
+        if self.persistente:
+            try:
+                encontrado = await executar_no_banco(ler_cache_busca, chave, limite)
+            except Exception as e:
+                print(f"Erro ao ler cache de buscas: {e}")
+                encontrado = None
+            if encontrado is not None:
+                vagas, criado_em = encontrado
+                self._guardar_em_memoria(chave, vagas, criado_em)
+                self.hits_banco += 1
+                metricas.incrementar("bot_cache_consultas_total", cache="buscas", resultado="hit_banco")
+                return vagas
+
+        self.misses += 1
+        metricas.incrementar("bot_cache_consultas_total", cache="buscas", resultado="miss")
+        return None
+
+    async def guardar(self, chave: str, vagas: List[Dict]):
+        """Guarda uma página de vagas no cache."""
+        criado_em = time.time()
+        self._guardar_em_memoria(chave, vagas, criado_em)
+
+        if not self.persistente:
+            return
+        try:
+            await executar_no_banco(gravar_cache_busca, chave, vagas, criado_em)
+            self._gravacoes += 1
+            if self._gravacoes % _GRAVACOES_POR_EXPURGO == 0:
+                await executar_no_banco(remover_cache_buscas_expirado, criado_em - self.ttl)
+        except Exception as e:
+            print(f"Erro ao gravar cache de buscas: {e}")
+
+    def limpar(self):
+        """Esvazia a camada em memória e zera os contadores."""
+        self._itens.clear()
+        self.hits_memoria = self.hits_banco = self.misses = 0
+
+    def estatisticas(self) -> Dict:
+        """Contadores de acerto/erro do cache."""
+        hits = self.hits_memoria + self.hits_banco
+        total = hits + self.misses
+        return {
+            "hits": hits,
+            "hits_memoria": self.hits_memoria,
+            "hits_banco": self.hits_banco,
+            "misses": self.misses,
+            "taxa_acerto": hits / total if total else 0.0,
+            "itens_em_memoria": len(self._itens),
+        }
+
+
+# Instância única usada pelo scraper.
+cache_buscas = CacheBuscas(CACHE_BUSCAS_TTL, CACHE_BUSCAS_MAX_ITENS, CACHE_BUSCAS_PERSISTENTE)
@@ -1,25 +1,24 @@
-from google import genai # Alterado para o novo SDK
-from config import GOOGLE_API_KEY
-from typing import Dict, Optional
+from config import (
+    GOOGLE_API_KEY, GEMINI_MAX_CONCORRENCIA, GEMINI_MAX_TENTATIVAS,
+    GEMINI_BACKOFF_BASE, GEMINI_BACKOFF_MAX, CV_ORCAMENTO_TOKENS
+)
+from typing import Dict, Optional, Union
+import asyncio
+import hashlib
 import json
 import logging
+import random
+import re
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+from core import metricas
+from core.cv_preprocessor import VERSAO as VERSAO_PREPROCESSAMENTO, preprocessar_cv
+from profiles.profile_manager import ler_analise_cv, gravar_analise_cv, executar_no_banco
 
-def analisar_cv(texto_cv: str) -> Optional[Dict]:
-    """
-    Usa o novo SDK Google para analisar o CV e extrair informações relevantes,
-    garantindo uma saída JSON robusta.
-    """
-    if not GOOGLE_API_KEY:
-        logging.error("ERRO: GOOGLE_API_KEY não configurado no arquivo .env ou config.py.")
-        return None
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-    try:
-        # Inicializa o cliente com o novo SDK
-        client = genai.Client(api_key=GOOGLE_API_KEY)
+MODELO_GEMINI = "gemini-2.0-flash" # Usando o ID estável
 
-        prompt = f"""
+PROMPT_ANALISE = """
         Aja como um recrutador generalista sênior, com experiência em diversas áreas de atuação.
         Sua tarefa é analisar o texto do currículo abaixo e extrair as seguintes informações de forma objetiva.
         Retorne APENAS um objeto JSON válido.
@@ -34,26 +33,209 @@ def analisar_cv(texto_cv: str) -> Optional[Dict]:
         ---
         """
 
-        logging.info("Analisando o CV com a API Gemini...")
+# Códigos HTTP que indicam limite de taxa / sobrecarga temporária da API.
+_CODIGOS_RETENTAVEIS = {429, 503}
+
+# Cliente e limitador de concorrência compartilhados por todas as análises. O cliente
+# assíncrono do SDK fica preso ao event loop em que foi usado, então, como o limitador
+# (e o cliente HTTP do job_scraper), guardamos o loop junto e recriamos o cliente se ele
+# mudar (ex.: `analisar_cv`, que roda cada análise em um asyncio.run).
+_cliente = None
+_cliente_loop: Optional[asyncio.AbstractEventLoop] = None
+# Cliente definido por `definir_cliente` (stubs), usado em qualquer loop no lugar do SDK.
+_cliente_fixo = None
+_limitador: Optional[asyncio.Semaphore] = None
+_limitador_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Versão da análise: muda sempre que o modelo, o prompt ou o pré-processamento do texto mudam, invalidando o cache.
+VERSAO_ANALISE = hashlib.sha256(
+    f"{MODELO_GEMINI}\n{PROMPT_ANALISE}\n{VERSAO_PREPROCESSAMENTO}:{CV_ORCAMENTO_TOKENS}".encode("utf-8")
+).hexdigest()[:16]
+
+
+def hash_cv(conteudo: Union[str, bytes, bytearray]) -> str:
+    """
+    Hash do conteúdo de um CV. Para texto, espaços são colapsados antes, para que
+    pequenas diferenças de extração não gerem uma nova análise.
+    """
+    if isinstance(conteudo, str):
+        conteudo = re.sub(r"\s+", " ", conteudo).strip().encode("utf-8")
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def _analise_valida(dados) -> bool:
+    """
+    Confere se a resposta do modelo tem o formato pedido no prompt: um objeto com
+    `cargo_ideal` preenchido e, se vierem, `habilidades_chave` em lista e
+    `nivel_experiencia` em texto. Só análises válidas vão para o cache.
+    """
+    if not isinstance(dados, dict):
+        return False
+    cargo = dados.get("cargo_ideal")
+    if not isinstance(cargo, str) or not cargo.strip():
+        return False
+    if not isinstance(dados.get("habilidades_chave", []), list):
+        return False
+    return isinstance(dados.get("nivel_experiencia", ""), str)
+
+
+def analise_em_cache(pdf_bytes: Union[bytes, bytearray]) -> Optional[Dict]:
+    """Retorna a análise de um PDF já visto (mesmos bytes), sem extrair o texto."""
+    try:
+        dados = ler_analise_cv([hash_cv(pdf_bytes)], VERSAO_ANALISE)
+    except Exception as e:
+        logging.error(f"ERRO ao consultar o cache de análises: {e}")
+        return None
+    return dados if _analise_valida(dados) else None
+
+
+def definir_cliente(cliente):
+    """Substitui o cliente compartilhado (ex.: por um stub local em testes e benchmarks); None volta ao SDK."""
+    global _cliente_fixo
+    _cliente_fixo = cliente
+
+
+def _obter_cliente():
+    """Cliente Gemini compartilhado, criado no loop atual se necessário."""
+    global _cliente, _cliente_loop
+    if _cliente_fixo is not None:
+        return _cliente_fixo
+    loop = asyncio.get_running_loop()
+    if _cliente is None or _cliente_loop is not loop:
+        # Importado no primeiro uso: o SDK (com o pydantic) leva quase meio segundo para carregar.
+        from google import genai
+
+        _cliente = genai.Client(api_key=GOOGLE_API_KEY)
+        _cliente_loop = loop
+    return _cliente
+
+
+async def fechar_cliente():
+    """Fecha as conexões do cliente Gemini (no encerramento do bot e ao fim de `analisar_cv`)."""
+    global _cliente, _cliente_loop
+    if _cliente is not None and _cliente_loop is asyncio.get_running_loop():
+        await _cliente.aio.aclose()
+    _cliente = None
+    _cliente_loop = None
 
-        # Chamada corrigida para a sintaxe do novo SDK
-        response = client.models.generate_content(
-            model="gemini-2.0-flash", # Usando o ID estável
-            contents=prompt,
-            config={
-                "response_mime_type": "application/json"
-            }
+
+def _obter_limitador() -> asyncio.Semaphore:
+    """Semáforo que limita as chamadas em voo ao Gemini (um por event loop)."""
+    global _limitador, _limitador_loop
+    loop = asyncio.get_running_loop()
+    if _limitador is None or _limitador_loop is not loop:
+        _limitador = asyncio.Semaphore(GEMINI_MAX_CONCORRENCIA)
+        _limitador_loop = loop
+    return _limitador
+
+
+def _erro_retentavel(erro: Exception) -> bool:
+    """Erros de limite de taxa ou indisponibilidade temporária da API."""
+    return getattr(erro, "code", None) in _CODIGOS_RETENTAVEIS
+
+
+async def _gerar_conteudo(prompt: str) -> str:
+    """
+    Chama o Gemini respeitando o limite de concorrência global. Em caso de limite
+    de taxa, tenta de novo com backoff exponencial e jitter, até GEMINI_MAX_TENTATIVAS.
+    """
+    cliente = _obter_cliente()
+    for tentativa in range(1, GEMINI_MAX_TENTATIVAS + 1):
+        try:
+            async with _obter_limitador():
+                response = await cliente.aio.models.generate_content(
+                    model=MODELO_GEMINI,
+                    contents=prompt,
+                    config={
+                        "response_mime_type": "application/json"
+                    }
+                )
+            # O novo SDK permite acessar o texto diretamente
+            return response.text
+        except Exception as e:
+            if not _erro_retentavel(e) or tentativa == GEMINI_MAX_TENTATIVAS:
+                raise
+            metricas.incrementar("bot_llm_retentativas_total", codigo=getattr(e, "code", ""))
+            # Full jitter: espera aleatória até o teto exponencial da tentativa
+            espera = random.uniform(0, min(GEMINI_BACKOFF_MAX, GEMINI_BACKOFF_BASE * 2 ** (tentativa - 1)))
+            logging.warning(f"Gemini indisponível/limitado ({e}). Nova tentativa em {espera:.1f}s...")
+            await asyncio.sleep(espera)
+
+
+async def analisar_cv_async(texto_cv: str, pdf_bytes: Optional[Union[bytes, bytearray]] = None) -> Optional[Dict]:
+    """
+    Usa o novo SDK Google (interface assíncrona) para analisar o CV e extrair
+    informações relevantes, garantindo uma saída JSON robusta.
+    CVs com o mesmo texto (ou os mesmos bytes de PDF) reutilizam a análise guardada.
+    """
+    hashes = [hash_cv(texto_cv)]
+    if pdf_bytes:
+        hashes.append(hash_cv(pdf_bytes))
+
+    try:
+        dados_em_cache = await executar_no_banco(ler_analise_cv, hashes, VERSAO_ANALISE)
+    except Exception as e:
+        logging.error(f"ERRO ao consultar o cache de análises: {e}")
+        dados_em_cache = None
+    # Entradas gravadas antes da validação podem estar incompletas: tratadas como miss.
+    if _analise_valida(dados_em_cache):
+        metricas.incrementar("bot_cache_consultas_total", cache="analise_cv", resultado="hit")
+        logging.info("Análise do CV encontrada no cache.")
+        return dados_em_cache
+    metricas.incrementar("bot_cache_consultas_total", cache="analise_cv", resultado="miss")
+
+    if not GOOGLE_API_KEY and _cliente_fixo is None:
+        logging.error("ERRO: GOOGLE_API_KEY não configurado no arquivo .env ou config.py.")
+        return None
+
+    try:
+        # Sem cabeçalhos/rodapés repetidos, hifenização e espaços sobrando, e dentro do orçamento de tokens
+        preparado = preprocessar_cv(texto_cv, CV_ORCAMENTO_TOKENS)
+        economizados = preparado["tokens_originais"] - preparado["tokens"]
+        metricas.incrementar("bot_llm_tokens_cv_total", preparado["tokens"])
+        metricas.incrementar("bot_llm_tokens_economizados_total", economizados)
+        logging.info(
+            f"Texto do CV: ~{preparado['tokens_originais']} -> ~{preparado['tokens']} tokens "
+            f"({economizados} economizados"
+            + (f"; seções cortadas: {', '.join(preparado['secoes_cortadas'])}" if preparado["secoes_cortadas"] else "")
+            + ")."
         )
+        prompt = PROMPT_ANALISE.format(texto_cv=preparado["texto"])
 
-        # O novo SDK permite acessar o texto diretamente
-        json_text = response.text
+        logging.info("Analisando o CV com a API Gemini...")
+        with metricas.medir("bot_llm_segundos", modelo=MODELO_GEMINI):
+            json_text = await _gerar_conteudo(prompt)
 
         dados_analisados = json.loads(json_text)
-        return dados_analisados
 
     except json.JSONDecodeError as e:
+        metricas.incrementar("bot_llm_erros_total", tipo="json_invalido")
         logging.error(f"ERRO ao decodificar o JSON: {e}")
         return None
     except Exception as e:
+        metricas.incrementar("bot_llm_erros_total", tipo=type(e).__name__)
         logging.error(f"ERRO ao comunicar com a API do Google Gemini: {e}")
-        return None
\ No newline at end of file
+        return None
+
+    if not _analise_valida(dados_analisados):
+        metricas.incrementar("bot_llm_erros_total", tipo="resposta_invalida")
+        logging.error(f"ERRO: resposta do Gemini fora do formato esperado: {json_text[:200]!r}")
+        return None
+
+    try:
+        await executar_no_banco(gravar_analise_cv, hashes, VERSAO_ANALISE, dados_analisados)
+    except Exception as e:
+        logging.error(f"ERRO ao gravar a análise no cache: {e}")
+    return dados_analisados
+
+
+def analisar_cv(texto_cv: str, pdf_bytes: Optional[Union[bytes, bytearray]] = None) -> Optional[Dict]:
+    """Versão síncrona de analisar_cv_async, para uso fora de um event loop (ex.: main.py)."""
+    async def _analisar():
+        try:
+            return await analisar_cv_async(texto_cv, pdf_bytes)
+        finally:
+            # O cliente criado neste loop não serve para o próximo asyncio.run.
+            await fechar_cliente()
+
+    return asyncio.run(_analisar())
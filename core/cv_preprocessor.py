@@ -0,0 +1,235 @@
+"""
+Limpeza do texto do CV antes de enviá-lo ao Gemini.
+
+O texto extraído do PDF traz ruído que só gasta tokens do prompt:
+cabeçalhos e rodapés repetidos em todas as páginas, palavras hifenizadas na
+quebra de linha, sequências de espaços (colunas alinhadas) e linhas
+decorativas. `preprocessar_cv` remove esse ruído e, se o resultado ainda
+passar do orçamento de tokens, corta as seções menos úteis para a análise
+(referências, hobbies, idiomas...) antes das que definem cargo, nível e
+habilidades (resumo, habilidades, experiência).
+
+A contagem de tokens é uma estimativa local (cerca de 4 caracteres por
+token, como os tokenizadores SentencePiece em português e inglês), boa o
+bastante para orçamento e relatório sem chamar a API.
+"""
+import math
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+# Muda sempre que as regras de limpeza mudam (faz parte da versão da análise em cache).
+VERSAO = "1"
+
+# Linhas do topo e da base de cada página examinadas como possível cabeçalho/rodapé.
+LINHAS_CABECALHO_RODAPE = 3
+
+# Prioridade das seções pelo início do título (sem acentos, minúsculo):
+# menor = mais importante para extrair cargo, nível e habilidades.
+# O trecho antes do primeiro título (nome e título profissional) tem prioridade 0.
+PRIORIDADE_SECOES = {
+    "resumo": 1, "sobre": 1, "perfil": 1, "objetivo": 1, "summary": 1, "profile": 1, "about": 1,
+    "habilidades": 1, "competencias": 1, "skills": 1, "tecnologias": 1, "conhecimentos": 1,
+    "experiencia": 2, "experience": 2, "historico profissional": 2, "atuacao": 2,
+    "formacao": 3, "educacao": 3, "education": 3, "escolaridade": 3,
+    "certificacoes": 3, "certificados": 3, "certifications": 3, "cursos": 3,
+    "projetos": 3, "projects": 3,
+    "idiomas": 4, "languages": 4,
+    "premios": 5, "publicacoes": 5, "voluntariado": 5, "atividades": 5,
+    "referencias": 6, "references": 6, "hobbies": 6, "interesses": 6, "informacoes adicionais": 6,
+}
+
+_PECA_TOKEN = re.compile(r"\w+|[^\w\s]|\n|[^\S\n]{2,}")
+_ESPACOS = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+_CONTROLE = re.compile(r"[\x00-\x08\x0b\x0e-\x1f\x7f]")
+# Marcadores de lista, inclusive os da fonte Symbol/Wingdings que o Word exporta (\uf0b7, \uf0a7)
+_MARCADOR = re.compile(r"^[•·▪●◦■□►▶➢✓✔*\uf0b7\uf0a7]\s*")
+_DECORATIVA = re.compile(r"^[\W_]+$")
+_HIFEN_FINAL = re.compile(r"[^\W\d_]-$")
+_DIGITOS = re.compile(r"\d+")
+
+
+def estimar_tokens(texto: str) -> int:
+    """
+    Estimativa do número de tokens: cada palavra conta ~1 token a cada 4
+    caracteres; cada pontuação, quebra de linha ou sequência de espaços, 1.
+    """
+    return sum(1 if peca.isspace() else math.ceil(len(peca) / 4) for peca in _PECA_TOKEN.findall(texto or ""))
+
+
+def _sem_acentos(texto: str) -> str:
+    texto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in texto if not unicodedata.combining(c)).casefold()
+
+
+def _normalizar_linha(linha: str) -> str:
+    linha = _ESPACOS.sub(" ", linha).strip()
+    return _MARCADOR.sub("- ", linha)
+
+
+def _paginas(texto: str) -> List[List[str]]:
+    """Páginas (separadas por \\f) como listas de linhas normalizadas, sem linhas decorativas."""
+    texto = _CONTROLE.sub("", unicodedata.normalize("NFKC", texto))
+    # Hífen opcional no fim da linha junta as metades da palavra; no meio dela, só some.
+    texto = texto.replace("\u00ad\n", "").replace("\u00ad", "")
+    paginas = []
+    for pagina in texto.split("\f"):
+        linhas = [_normalizar_linha(linha) for linha in pagina.splitlines()]
+        paginas.append([linha for linha in linhas if not (linha and _DECORATIVA.match(linha) and len(linha) > 1)])
+    return paginas
+
+
+def _remover_cabecalhos_rodapes(paginas: List[List[str]]) -> Tuple[List[List[str]], int]:
+    """
+    Remove as linhas do topo/base que se repetem em pelo menos metade das páginas
+    (só as seguidas a partir da borda da página, para não mutilar parágrafos).
+    Cabeçalhos idênticos (ex.: nome e contato) ficam só na primeira página; rodapés
+    e linhas que mudam apenas nos números (ex.: "Página 2 de 3") saem de todas.
+    """
+    if len(paginas) < 2:
+        return paginas, 0
+
+    def bordas(linhas: List[str]) -> Tuple[List[int], List[int]]:
+        preenchidas = [i for i, linha in enumerate(linhas) if linha]
+        return preenchidas[:LINHAS_CABECALHO_RODAPE], preenchidas[::-1][:LINHAS_CABECALHO_RODAPE]
+
+    def chave(linha: str) -> str:
+        return _DIGITOS.sub("#", linha.casefold())
+
+    ocorrencias: Dict[str, set] = {}
+    textos: Dict[str, set] = {}
+    for numero, linhas in enumerate(paginas):
+        topo, base = bordas(linhas)
+        for i in topo + base:
+            ocorrencias.setdefault(chave(linhas[i]), set()).add(numero)
+            textos.setdefault(chave(linhas[i]), set()).add(linhas[i])
+
+    minimo = max(2, math.ceil(len(paginas) / 2))
+    repetidas = {c for c, numeros in ocorrencias.items() if len(numeros) >= minimo}
+    if not repetidas:
+        return paginas, 0
+
+    removidas = 0
+    mantidas = set()
+    resultado = []
+    for linhas in paginas:
+        remover = set()
+        topo, base = bordas(linhas)
+        for borda in (topo, base):
+            for i in borda:
+                c = chave(linhas[i])
+                if c not in repetidas:
+                    break
+                if borda is topo and len(textos[c]) == 1 and c not in mantidas:
+                    mantidas.add(c)
+                else:
+                    remover.add(i)
+        removidas += len(remover)
+        resultado.append([linha for i, linha in enumerate(linhas) if i not in remover])
+    return resultado, removidas
+
+
+def _juntar_hifenizadas(linhas: List[str]) -> Tuple[List[str], int]:
+    """Junta "desenvol-" + "vimento" quando a linha seguinte começa com minúscula."""
+    resultado: List[str] = []
+    juncoes = 0
+    for linha in linhas:
+        anterior = resultado[-1] if resultado else ""
+        if linha and linha[0].islower() and _HIFEN_FINAL.search(anterior):
+            primeira, _, resto = linha.partition(" ")
+            resultado[-1] = anterior[:-1] + primeira
+            juncoes += 1
+            if resto:
+                resultado.append(resto)
+            continue
+        resultado.append(linha)
+    return resultado, juncoes
+
+
+def _prioridade_titulo(linha: str) -> Optional[int]:
+    """Prioridade da seção se a linha for um título conhecido; None se não for título."""
+    if not linha or len(linha) > 50 or len(linha.split()) > 5 or linha[-1] in ".,;":
+        return None
+    normalizada = _sem_acentos(linha).rstrip(":").strip()
+    for inicio, prioridade in PRIORIDADE_SECOES.items():
+        if normalizada.startswith(inicio):
+            return prioridade
+    return None
+
+
+def _secoes(linhas: List[str]) -> List[Tuple[int, List[str]]]:
+    """(prioridade, linhas) de cada seção, na ordem do documento; o título é a primeira linha."""
+    secoes: List[Tuple[int, List[str]]] = [(0, [])]
+    for linha in linhas:
+        prioridade = _prioridade_titulo(linha)
+        if prioridade is not None:
+            secoes.append((prioridade, [linha]))
+        elif linha or (secoes[-1][1] and secoes[-1][1][-1]):
+            # No máximo uma linha em branco seguida
+            secoes[-1][1].append(linha)
+    return [(prioridade, conteudo) for prioridade, conteudo in secoes if any(conteudo)]
+
+
+def _cortar(linhas: List[str], orcamento: int) -> List[str]:
+    """As primeiras linhas que cabem em `orcamento` tokens (a última pode ser cortada no meio)."""
+    resultado = []
+    for linha in linhas:
+        custo = estimar_tokens(linha) + 1
+        if custo <= orcamento:
+            resultado.append(linha)
+            orcamento -= custo
+            continue
+        palavras = []
+        for palavra in linha.split(" "):
+            custo = estimar_tokens(palavra)
+            if custo > orcamento:
+                break
+            palavras.append(palavra)
+            orcamento -= custo
+        if palavras:
+            resultado.append(" ".join(palavras))
+        break
+    return resultado
+
+
+def preprocessar_cv(texto: str, orcamento_tokens: int = 0) -> Dict:
+    """
+    Limpa o texto extraído do CV (páginas separadas por \\f) e, com `orcamento_tokens`
+    > 0, corta as seções de menor prioridade até caber no orçamento.
+
+    Retorna {"texto", "tokens_originais", "tokens", "linhas_repetidas",
+    "hifenizacoes", "secoes_cortadas"}; as contagens de tokens são estimativas.
+    """
+    paginas, linhas_repetidas = _remover_cabecalhos_rodapes(_paginas(texto or ""))
+    linhas, hifenizacoes = _juntar_hifenizadas([linha for pagina in paginas for linha in pagina])
+    secoes = _secoes(linhas)
+
+    secoes_cortadas: List[str] = []
+    if orcamento_tokens > 0 and estimar_tokens("\n".join(linha for _, conteudo in secoes for linha in conteudo)) > orcamento_tokens:
+        restante = orcamento_tokens
+        cortadas = list(secoes)
+        # As mais importantes primeiro; entre iguais, a que vem antes no documento.
+        for indice in sorted(range(len(secoes)), key=lambda i: (secoes[i][0], i)):
+            prioridade, conteudo = secoes[indice]
+            # Um token fica reservado para a linha em branco que separa as seções
+            mantidas = _cortar(conteudo, restante - 1)
+            if prioridade and len(mantidas) < 2:
+                # Título sem conteúdo não ajuda a análise
+                mantidas = []
+            if mantidas:
+                restante -= sum(estimar_tokens(linha) + 1 for linha in mantidas) + 1
+            nome = conteudo[0] if prioridade else "(início)"
+            if mantidas != conteudo and nome not in secoes_cortadas:
+                secoes_cortadas.append(nome)
+            cortadas[indice] = (prioridade, mantidas)
+        secoes = [(prioridade, conteudo) for prioridade, conteudo in cortadas if conteudo]
+
+    texto_final = "\n\n".join("\n".join(conteudo).strip() for _, conteudo in secoes)
+    return {
+        "texto": texto_final,
+        "tokens_originais": estimar_tokens(texto),
+        "tokens": estimar_tokens(texto_final),
+        "linhas_repetidas": linhas_repetidas,
+        "hifenizacoes": hifenizacoes,
+        "secoes_cortadas": secoes_cortadas,
+    }
@@ -0,0 +1,52 @@
+"""
+Gera localidades.tsv (cidades brasileiras usadas por core/localizacao.py).
+
+A fonte é o cities1000.json do pacote geonamescache (dados do GeoNames,
+CC BY 4.0): todas as localidades com pelo menos 1000 habitantes. O
+arquivo gerado tem uma linha "UF<TAB>nome<TAB>população" por cidade;
+nomes repetidos no mesmo estado ficam só com a maior população.
+
+Uso:
+    pip download geonamescache --no-deps && unzip geonamescache-*.whl
+    python core/dados/gerar_localidades.py geonamescache/data/cities1000.json
+"""
+import json
+import os
+import sys
+
+# Código admin1 do GeoNames -> sigla do estado.
+UF_POR_ADMIN1 = {
+    "01": "AC", "02": "AL", "03": "AP", "04": "AM", "05": "BA", "06": "CE", "07": "DF",
+    "08": "ES", "11": "MS", "13": "MA", "14": "MT", "15": "MG", "16": "PA", "17": "PB",
+    "18": "PR", "20": "PI", "21": "RJ", "22": "RN", "23": "RS", "24": "RO", "25": "RR",
+    "26": "SC", "27": "SP", "28": "SE", "29": "GO", "30": "PE", "31": "TO",
+}
+
+DESTINO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "localidades.tsv")
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit(__doc__)
+    with open(sys.argv[1], encoding="utf-8") as f:
+        cidades = json.load(f)
+
+    populacoes = {}
+    for cidade in cidades.values():
+        uf = UF_POR_ADMIN1.get(cidade.get("admin1code", ""))
+        if cidade.get("countrycode") != "BR" or not uf:
+            continue
+        nome = " ".join(cidade["name"].replace("’", "'").split())
+        chave = (uf, nome)
+        populacoes[chave] = max(populacoes.get(chave, 0), int(cidade.get("population") or 0))
+
+    with open(DESTINO, "w", encoding="utf-8", newline="\n") as f:
+        f.write("# Cidades brasileiras com 1000+ habitantes: UF, nome, população.\n")
+        f.write("# Fonte: GeoNames (https://www.geonames.org), CC BY 4.0. Gerado por gerar_localidades.py.\n")
+        for (uf, nome), populacao in sorted(populacoes.items()):
+            f.write(f"{uf}\t{nome}\t{populacao}\n")
+    print(f"{len(populacoes)} localidades gravadas em {DESTINO}")
+
+
+if __name__ == "__main__":
+    main()
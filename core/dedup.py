@@ -0,0 +1,153 @@
+"""
+Identidade das vagas para o controle de duplicatas.
+
+- `canonicalizar_link`: reduz a URL de uma vaga a uma chave estável
+  (no LinkedIn, "linkedin:<id da vaga>"), descartando parâmetros de
+  rastreamento como refId, trackingId e position.
+- `hash_vaga`: hash de 64 bits dessa chave, que é o que o histórico de
+  envios guarda (um inteiro por vaga em vez da URL).
+- `impressao_vaga`: impressão de 64 bits da vaga para pegar a mesma vaga
+  republicada com outra URL. Os 32 bits altos são um hash exato do título e
+  da cidade normalizados (`chave_impressao`), que o banco usa para achar
+  candidatas por igualdade em índice; os 32 bits baixos são um simhash do
+  nome da empresa, que tolera pequenas variações dele. Só são a mesma vaga
+  impressões com a mesma chave e a até DEDUP_DISTANCIA_MAXIMA bits de
+  distância: vagas parecidas mas diferentes ("Desenvolvedor Python" e
+  "Desenvolvedor Java", o mesmo cargo em outra cidade) nunca se confundem.
+"""
+import hashlib
+import re
+import struct
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config import DEDUP_DISTANCIA_MAXIMA
+
+# Parâmetros de URL que só servem para rastreamento e não mudam a vaga.
+_PARAMETROS_RASTREAMENTO = {
+    "refid", "trackingid", "position", "pagenum", "trk", "trkinfo", "lipi",
+    "originalsubdomain", "eby", "ebp", "src", "ref", "fbclid", "gclid",
+}
+
+_ID_LINKEDIN = (
+    re.compile(r"/jobs/view/(?:[^/?#]*?-)?(\d{6,})(?:[/?#]|$)"),
+    re.compile(r"[?&](?:currentJobId|jobId)=(\d{6,})"),
+    re.compile(r"jobPosting:(\d{6,})"),
+)
+
+_MASCARA_64 = (1 << 64) - 1
+_MASCARA_32 = (1 << 32) - 1
+
+_PALAVRAS_VAZIAS = {"de", "da", "do", "das", "dos", "e", "em", "para", "a", "o", "the", "at", "of", "and", "-"}
+# Sufixos societários, que uma mesma empresa às vezes usa e às vezes não.
+_SUFIXOS_EMPRESA = {"ltda", "sa", "s", "me", "epp", "eireli", "inc", "ltd", "llc"}
+
+
+@lru_cache(maxsize=16384)
+def canonicalizar_link(link: str) -> str:
+    """Chave estável da vaga a partir da URL do card."""
+    if not link or "://" not in link:
+        return link
+    if "linkedin." in link:
+        for padrao in _ID_LINKEDIN:
+            encontrado = padrao.search(link)
+            if encontrado:
+                return f"linkedin:{encontrado.group(1)}"
+
+    partes = urlsplit(link.strip())
+    parametros = [
+        (chave, valor) for chave, valor in parse_qsl(partes.query, keep_blank_values=True)
+        if chave.lower() not in _PARAMETROS_RASTREAMENTO and not chave.lower().startswith("utm_")
+    ]
+    caminho = partes.path.rstrip("/") or "/"
+    return urlunsplit((partes.scheme.lower(), partes.netloc.lower(), caminho, urlencode(sorted(parametros)), ""))
+
+
+def _resumo64(texto: str) -> bytes:
+    return hashlib.blake2b(texto.encode("utf-8"), digest_size=8).digest()
+
+
+def hash_vaga(link: str) -> int:
+    """Hash de 64 bits (com sinal, para o INTEGER do SQLite) da chave canônica da vaga."""
+    return int.from_bytes(_resumo64(canonicalizar_link(link) or ""), "little", signed=True)
+
+
+def _tokens(texto: str) -> List[str]:
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).casefold()
+    return [t for t in re.findall(r"\w+", texto) if t not in _PALAVRAS_VAZIAS]
+
+
+@lru_cache(maxsize=8192)
+def _chave_exata(titulo: str, local: str) -> int:
+    """Hash de 32 bits do título e da cidade normalizados."""
+    # Só a cidade: "São Paulo, SP" e "São Paulo, São Paulo, Brasil" são o mesmo lugar.
+    cidade = " ".join(_tokens((local or "").split(",")[0]))
+    texto = " ".join(_tokens(titulo)) + "|" + cidade
+    return int.from_bytes(_resumo64(texto), "little") & _MASCARA_32
+
+
+def _caracteristicas(empresa: str) -> Iterable[Tuple[str, int]]:
+    """Pares (característica, peso) do nome da empresa usados no simhash."""
+    palavras = [p for p in _tokens(empresa) if p not in _SUFIXOS_EMPRESA]
+    for palavra in palavras:
+        yield f"p:{palavra}", 1
+    if palavras:
+        yield f"e:{' '.join(palavras)}", 2
+
+
+# Cada bit do hash vira uma "raia" de 16 bits de um inteiro grande; assim os 64
+# contadores do simhash são somados de uma vez, com uma multiplicação por
+# característica, em vez de um laço de 64 passos. A tabela expande um byte
+# do hash em 8 raias (16 bytes, little-endian).
+_RAIAS_POR_BYTE = [
+    b"".join((1 if (byte >> bit) & 1 else 0).to_bytes(2, "little") for bit in range(8))
+    for byte in range(256)
+]
+_FORMATO_RAIAS = struct.Struct("<64H")
+
+
+@lru_cache(maxsize=8192)
+def _simhash(empresa: str) -> int:
+    """Simhash de 64 bits (sem sinal) do nome da empresa."""
+    # Em cada raia fica a soma dos pesos das características com aquele bit ligado;
+    # o bit da impressão liga quando essa soma passa da metade do peso total.
+    acumulado = 0
+    peso_total = 0
+    for caracteristica, peso in _caracteristicas(empresa):
+        resumo = _resumo64(caracteristica)
+        # Bytes do menos para o mais significativo: a raia k corresponde ao bit k do hash.
+        acumulado += peso * int.from_bytes(b"".join([_RAIAS_POR_BYTE[b] for b in reversed(resumo)]), "little")
+        peso_total += peso
+    raias = _FORMATO_RAIAS.unpack(acumulado.to_bytes(_FORMATO_RAIAS.size, "little"))
+    return sum(1 << bit for bit, soma in enumerate(raias) if 2 * soma > peso_total)
+
+
+def impressao_vaga(vaga: Dict) -> int:
+    """Impressão de 64 bits (com sinal): chave exata de título + cidade e simhash da empresa."""
+    impressao = (_chave_exata(vaga.get("titulo", ""), vaga.get("local", "")) << 32) | (
+        _simhash(vaga.get("empresa", "")) & _MASCARA_32
+    )
+    # Inteiro com sinal, para caber no INTEGER do SQLite.
+    return impressao - (1 << 64) if impressao >= 1 << 63 else impressao
+
+
+def chave_impressao(impressao: int) -> int:
+    """Parte exata (título + cidade) da impressão, pela qual o banco procura candidatas."""
+    return (impressao & _MASCARA_64) >> 32
+
+
+def distancia(a: int, b: int) -> int:
+    """Distância de Hamming entre duas impressões."""
+    return ((a ^ b) & _MASCARA_64).bit_count()
+
+
+def quase_duplicata(impressao: int, conhecidas: Iterable[int], distancia_maxima: int = DEDUP_DISTANCIA_MAXIMA) -> bool:
+    """True se alguma das conhecidas tiver a mesma chave e estiver a até `distancia_maxima` bits."""
+    chave = chave_impressao(impressao)
+    return any(
+        chave_impressao(outra) == chave and distancia(impressao, outra) <= distancia_maxima
+        for outra in conhecidas
+    )
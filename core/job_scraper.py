@@ -1,66 +1,319 @@
+import asyncio
+import httpx
+from contextlib import aclosing
+from collections import deque
+from typing import AsyncIterator, List, Dict, Optional, Sequence, Tuple, Union
 
 
-import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from config import (
+    LINKEDIN_URL, USER_AGENT, SCRAPER_TIMEOUT, SCRAPER_MAX_CONEXOES,
+    SCRAPER_MAX_PAGINAS, SCRAPER_CONCORRENCIA_PAGINAS, SCRAPER_PRAZO, SCRAPER_FONTES
+)
+from core.cache_buscas import cache_buscas, chave_busca
+from core.dedup import canonicalizar_link
+from core.localizacao import canonicalizar_localizacao, consulta_localizacao
+from core.parser_vagas import extrair_vagas
+from core import metricas
 
+# Quantidade de cards que o LinkedIn devolve por página de resultados.
+VAGAS_POR_PAGINA = 25
 
-from config import LINKEDIN_URL, USER_AGENT
+# Cliente HTTP compartilhado por todas as buscas (pool de conexões keep-alive).
+# Um AsyncClient fica preso ao event loop em que foi criado, então guardamos o
+# loop junto e recriamos o cliente se ele mudar (ex.: chamadas via asyncio.run).
+_cliente: Optional[httpx.AsyncClient] = None
+_cliente_loop: Optional[asyncio.AbstractEventLoop] = None
 
-def buscar_vagas(cargo: str, localizacao: str) -> Optional[List[Dict]]:
+
+def _obter_cliente() -> httpx.AsyncClient:
+    """Retorna o cliente HTTP compartilhado, criando-o no loop atual se necessário."""
+    global _cliente, _cliente_loop
+    loop = asyncio.get_running_loop()
+    if _cliente is None or _cliente.is_closed or _cliente_loop is not loop:
+        _cliente = httpx.AsyncClient(
+            headers={'User-Agent': USER_AGENT},
+            timeout=httpx.Timeout(SCRAPER_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=SCRAPER_MAX_CONEXOES,
+                max_keepalive_connections=SCRAPER_MAX_CONEXOES,
+            ),
+            follow_redirects=True,
+        )
+        _cliente_loop = loop
+    return _cliente
+
+
+async def fechar_cliente():
+    """Fecha o pool de conexões compartilhado (chamado no encerramento do bot)."""
+    global _cliente, _cliente_loop
+    if _cliente is not None and not _cliente.is_closed:
+        await _cliente.aclose()
+    _cliente = None
+    _cliente_loop = None
+
+
+# --- FONTES DE VAGAS ---
+
+class FonteVagas:
     """
-    Busca vagas de emprego no LinkedIn.
-    Retorna uma lista de vagas ou None se ocorrer um erro.
+    Interface de uma fonte de vagas (plugin).
+
+    Cada fonte informa se atende a uma busca (ex.: sites regionais só para a
+    sua região) e sabe baixar uma página de resultados já convertida em
+    dicts com titulo/empresa/local/link. Novas fontes entram com `registrar_fonte`.
+    A localização chega na forma canônica ("Niterói - RJ"): `resolver_localizacao`
+    informa o estado e `consulta_localizacao` o texto a usar na busca.
     """
-    print(f"\nBuscando vagas para '{cargo}' em '{localizacao}'...")
+    nome = ""
 
-    if not LINKEDIN_URL:
-        print("ERRO: URL do LinkedIn não configurada no arquivo .env ou config.py.")
+    def elegivel(self, cargo: str, localizacao: str) -> bool:
+        """Se a fonte deve participar desta busca."""
+        return True
+
+    async def buscar_pagina(self, cargo: str, localizacao: str, pagina: int) -> Optional[List[Dict]]:
+        """Retorna a página `pagina` (a partir de 0), [] se acabaram os resultados ou None em caso de erro."""
+        raise NotImplementedError
+
+
+# Fontes disponíveis, por nome, na ordem de registro (que é a ordem do intercalamento).
+FONTES: Dict[str, FonteVagas] = {}
+
+
+def registrar_fonte(fonte: FonteVagas) -> FonteVagas:
+    """Adiciona (ou substitui) uma fonte no registro."""
+    FONTES[fonte.nome] = fonte
+    return fonte
+
+
+def fontes_elegiveis(cargo: str, localizacao: str) -> List[FonteVagas]:
+    """Fontes habilitadas em SCRAPER_FONTES (todas, se vazio) que atendem à busca."""
+    return [
+        fonte for nome, fonte in FONTES.items()
+        if (not SCRAPER_FONTES or nome in SCRAPER_FONTES) and fonte.elegivel(cargo, localizacao)
+    ]
+
+
+class FonteLinkedIn(FonteVagas):
+    """Busca pública de vagas do LinkedIn (sem login)."""
+    nome = "linkedin"
+
+    def elegivel(self, cargo: str, localizacao: str) -> bool:
+        return bool(LINKEDIN_URL)
+
+    async def buscar_pagina(self, cargo: str, localizacao: str, pagina: int) -> Optional[List[Dict]]:
+        params = {
+            'keywords': cargo,
+            'location': consulta_localizacao(localizacao),
+            'trk': 'public_jobs_jobs-search-bar_search-submit',
+            'position': 1,
+            'pageNum': pagina,
+            'start': pagina * VAGAS_POR_PAGINA
+        }
+
+        # Usa o pool compartilhado; o timeout vem da configuração do cliente.
+        with metricas.medir("bot_scraper_http_segundos", fonte=self.nome):
+            resposta = await _obter_cliente().get(LINKEDIN_URL, params=params)
+            resposta.raise_for_status()
+        with metricas.medir("bot_scraper_parse_segundos", fonte=self.nome):
+            return extrair_vagas(resposta.text)
+
+
+registrar_fonte(FonteLinkedIn())
+
+
+async def _buscar_pagina(fonte: FonteVagas, cargo: str, localizacao: str, pagina: int) -> Optional[List[Dict]]:
+    """
+    Retorna uma página de resultados da fonte, consultando primeiro o cache compartilhado.
+    Retorna None em caso de erro.
+    """
+    chave = chave_busca(cargo, localizacao, pagina, fonte.nome)
+    vagas_em_cache = await cache_buscas.obter(chave)
+    if vagas_em_cache is not None:
+        return vagas_em_cache
+
+    try:
+        lista_de_vagas = await fonte.buscar_pagina(cargo, localizacao, pagina)
+    except httpx.HTTPError as e:
+        metricas.incrementar("bot_scraper_erros_total", fonte=fonte.nome, tipo=type(e).__name__)
+        print(f"ERRO de conexão ao buscar vagas em {fonte.nome} (página {pagina}): {e}")
         return None
 
- 
-    params = {
-        'keywords': cargo,
-        'location': localizacao,
-        'trk': 'public_jobs_jobs-search-bar_search-submit', 
-        'position': 1,
-        'pageNum': 0
+    # Páginas vazias não entram no cache: podem ser um bloqueio temporário.
+    if lista_de_vagas:
+        await cache_buscas.guardar(chave, lista_de_vagas)
+    else:
+        metricas.incrementar("bot_scraper_paginas_vazias_total", fonte=fonte.nome)
+    return lista_de_vagas
+
+
+async def _paginas_da_fonte(
+    fonte: FonteVagas,
+    cargo: str,
+    localizacao: str,
+    max_paginas: int,
+    concorrencia: int,
+) -> AsyncIterator[List[Dict]]:
+    """
+    Gera as páginas de uma fonte, na ordem dos resultados.
+
+    As páginas seguintes são baixadas em paralelo, com no máximo `concorrencia`
+    requisições em voo. A janela começa em 1 e dobra a cada página consumida,
+    para que quem se satisfaz com a primeira página não pague pelas demais.
+    """
+    pendentes: Dict[int, asyncio.Task] = {}
+    proxima = 0
+    try:
+        for pagina in range(max_paginas):
+            janela = min(concorrencia, 2 ** pagina)
+            while proxima < max_paginas and len(pendentes) < janela:
+                pendentes[proxima] = asyncio.create_task(_buscar_pagina(fonte, cargo, localizacao, proxima))
+                proxima += 1
+
+            vagas = await pendentes.pop(pagina)
+            # Página vazia ou com erro: acabaram os resultados desta fonte.
+            if not vagas:
+                break
+            yield vagas
+    finally:
+        for tarefa in pendentes.values():
+            tarefa.cancel()
+
+
+async def _encerrar(tarefa: asyncio.Task):
+    tarefa.cancel()
+    await asyncio.gather(tarefa, return_exceptions=True)
+
+
+def _localizacoes(localizacao: Union[str, Sequence[str]]) -> List[str]:
+    """Localizações canônicas e sem repetição ("rj" e "Rio de Janeiro - RJ" dividem o cache)."""
+    localizacoes = [localizacao] if isinstance(localizacao, str) else localizacao
+    return list(dict.fromkeys(canonicalizar_localizacao(local) for local in localizacoes))
+
+
+async def iterar_vagas(
+    cargo: str,
+    localizacao: Union[str, Sequence[str]],
+    max_paginas: Optional[int] = None,
+    concorrencia: Optional[int] = None,
+    fontes: Optional[List[str]] = None,
+    prazo: Optional[float] = None,
+) -> AsyncIterator[Dict]:
+    """
+    Gera as vagas de todas as fontes elegíveis, uma a uma, assim que chegam.
+
+    `localizacao` pode ser uma lista: cada par (fonte, localização) vira uma
+    busca, e todas são consultadas ao mesmo tempo. Entre as que já entregaram
+    resultados, as vagas saem em rodízio (a1, b1, a2, b2, ...), como um
+    zip_longest; uma busca lenta não segura as demais, as vagas dela entram
+    no rodízio quando chegarem. A mesma vaga vinda de mais de uma busca sai
+    uma vez só. Todas dividem o mesmo prazo (`prazo` segundos, SCRAPER_PRAZO
+    por padrão): esgotado o prazo, o que ainda não chegou é descartado e a
+    busca termina com o que já foi entregue.
+    Ao interromper a iteração (use `contextlib.aclosing`), os downloads
+    pendentes são cancelados e nenhuma página nova é solicitada.
+    """
+    max_paginas = SCRAPER_MAX_PAGINAS if max_paginas is None else max_paginas
+    concorrencia = max(1, SCRAPER_CONCORRENCIA_PAGINAS if concorrencia is None else concorrencia)
+    prazo = SCRAPER_PRAZO if prazo is None else prazo
+    localizacoes = _localizacoes(localizacao)
+    selecionadas = [
+        (fonte, local)
+        for local in localizacoes
+        for fonte in (fontes_elegiveis(cargo, local) if fontes is None else [FONTES[nome] for nome in fontes])
+    ]
+
+    print(f"\nBuscando vagas para '{cargo}' em '{' | '.join(localizacoes)}' (até {max_paginas} páginas)...")
+
+    if not selecionadas:
+        print("ERRO: Nenhuma fonte de vagas disponível. Verifique a URL do LinkedIn no arquivo .env ou config.py.")
+        return
+
+    loop = asyncio.get_running_loop()
+    limite = loop.time() + prazo if prazo else None
+    streams = {
+        (fonte.nome, local): _paginas_da_fonte(fonte, cargo, local, max_paginas, concorrencia)
+        for fonte, local in selecionadas
     }
-    
-  
-    
+    # Vagas já recebidas e ainda não entregues, por busca (na ordem do rodízio).
+    recebidas: Dict[Tuple[str, str], deque] = {busca: deque() for busca in streams}
+    proximas: Dict[Tuple[str, str], asyncio.Task] = {}
+    entregues = set()
     try:
-        # A chamada GET agora usa  dicionário 'params' para construir a URL.
-        resposta = requests.get(LINKEDIN_URL, headers={'User-Agent': USER_AGENT}, params=params)
-        resposta.raise_for_status()
-
-        soup = BeautifulSoup(resposta.text, 'html.parser')
-        
-        cards_vagas = soup.find_all('div', class_='base-card')
-        
-        if not cards_vagas:
-            print("Nenhuma vaga encontrada com esses critérios.")
-            return []
-
-        lista_de_vagas = []
-        for card in cards_vagas:
-            try:
-                titulo = card.find('h3', class_='base-search-card__title').text.strip()
-                empresa = card.find('h4', class_='base-search-card__subtitle').text.strip()
-                local = card.find('span', class_='job-search-card__location').text.strip()
-                
-                link_tag = card.find('a', class_='base-card__full-link')
-                link = link_tag['href'] if link_tag else "Link não encontrado"
-                
-                lista_de_vagas.append({
-                    "titulo": titulo, "empresa": empresa,
-                    "local": local, "link": link
-                })
-            except AttributeError:
-                continue
-        
-        return lista_de_vagas
-
-    except requests.exceptions.RequestException as e:
-        print(f"ERRO de conexão ao buscar vagas: {e}")
-        return None
\ No newline at end of file
+        while streams or any(recebidas.values()):
+            if limite is not None and streams and loop.time() >= limite:
+                # Prazo esgotado: as buscas que ainda não terminaram ficam de fora.
+                for busca in list(streams):
+                    if busca in proximas:
+                        await _encerrar(proximas.pop(busca))
+                    await streams.pop(busca).aclose()
+                    nome, local = busca
+                    metricas.incrementar("bot_scraper_prazo_esgotado_total", fonte=nome)
+                    print(f"AVISO: prazo de {prazo:g}s esgotado; {nome} ({local}) ficou fora do restante da busca.")
+
+            # A próxima página de uma busca só é pedida quando as vagas dela acabam.
+            for busca, stream in streams.items():
+                if busca not in proximas and not recebidas[busca]:
+                    proximas[busca] = asyncio.ensure_future(stream.__anext__())
+
+            # Só espera a rede quando não há nada pronto para entregar.
+            if proximas and not any(recebidas.values()):
+                restante = None if limite is None else max(0.0, limite - loop.time())
+                await asyncio.wait(proximas.values(), timeout=restante, return_when=asyncio.FIRST_COMPLETED)
+
+            for busca in [busca for busca, tarefa in proximas.items() if tarefa.done()]:
+                tarefa = proximas.pop(busca)
+                try:
+                    recebidas[busca].extend(tarefa.result())
+                except StopAsyncIteration:
+                    streams.pop(busca)
+                except Exception as e:
+                    metricas.incrementar("bot_scraper_erros_total", fonte=busca[0], tipo=type(e).__name__)
+                    print(f"ERRO ao buscar vagas em {busca[0]} ({busca[1]}): {e}")
+                    await streams.pop(busca).aclose()
+
+            for fila in recebidas.values():
+                while fila:
+                    vaga = fila.popleft()
+                    chave = canonicalizar_link(vaga.get('link', ''))
+                    if chave and chave in entregues:
+                        metricas.incrementar("bot_scraper_vagas_repetidas_total")
+                        continue
+                    entregues.add(chave)
+                    yield vaga
+                    break
+    finally:
+        for tarefa in proximas.values():
+            await _encerrar(tarefa)
+        for stream in streams.values():
+            await stream.aclose()
+
+
+async def buscar_vagas_async(cargo: str, localizacao: Union[str, Sequence[str]]) -> Optional[List[Dict]]:
+    """
+    Busca vagas em todas as fontes elegíveis (e em todas as localizações, se for uma lista)
+    sem bloquear o event loop. Retorna a primeira página de cada busca, intercaladas,
+    ou None se não houver fonte disponível.
+    """
+    if not any(fontes_elegiveis(cargo, local) for local in _localizacoes(localizacao)):
+        print("ERRO: URL do LinkedIn não configurada no arquivo .env ou config.py.")
+        return None
+
+    async with aclosing(iterar_vagas(cargo, localizacao, max_paginas=1)) as vagas:
+        lista_de_vagas = [vaga async for vaga in vagas]
+
+    if not lista_de_vagas:
+        print("Nenhuma vaga encontrada com esses critérios.")
+    return lista_de_vagas
+
+
+def buscar_vagas(cargo: str, localizacao: Union[str, Sequence[str]]) -> Optional[List[Dict]]:
+    """
+    Versão síncrona de buscar_vagas_async, para uso fora de um event loop (ex.: main.py).
+    """
+    async def _executar():
+        try:
+            return await buscar_vagas_async(cargo, localizacao)
+        finally:
+            await fechar_cliente()
+
+    return asyncio.run(_executar())
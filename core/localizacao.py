@@ -0,0 +1,373 @@
+"""
+Localizações das buscas.
+
+O usuário pode pedir vagas em várias localizações de uma vez
+("Rio de Janeiro, Niterói, Remoto" ou "Rio ou Niterói"); `separar_localizacoes`
+transforma o texto na lista que `iterar_vagas` busca em paralelo, sem
+quebrar nomes que têm "e" ("Abreu e Lima").
+
+Cada localização é resolvida para uma forma canônica ("rj", "Rio",
+"rio de janeiro " e "RJ - Brasil" viram a mesma chave), então buscas
+iguais dividem o cache de páginas e os grupos de alerta, e uma fonte
+regional sabe o estado da busca. O índice de cidades e estados vem de
+dados/localidades.tsv (GeoNames) mais os apelidos abaixo; é montado uma
+única vez, no primeiro uso, como uma árvore de prefixos (trie) com nomes
+sem acentos, o que permite completar prefixos ("florian") e tolerar erros
+de digitação ("niteroy", "rio de janiero"). Um texto completado ou corrigido
+só é aceito quando o palpite é seguro (veja `_confiavel`); senão a
+localização não é reconhecida e a busca usa o texto do usuário, em vez de
+trocar "Paris" por "Parisi - SP". As consultas ficam em cache.
+"""
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from config import SCRAPER_MAX_LOCALIZACOES
+from core.cache_buscas import normalizar_termo
+
+ARQUIVO_LOCALIDADES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados", "localidades.tsv")
+
+# Separadores entre localizações: vírgula, ponto e vírgula, barra vertical e quebra de linha.
+_SEPARADORES = re.compile(r"\s*[,;|\n]\s*")
+# " e " e " ou " só separam quando o texto inteiro não é um nome ("Abreu e Lima", "Pontes e Lacerda").
+_CONJUNCOES = re.compile(r"\s+(?:e|ou)\s+", re.IGNORECASE)
+_NAO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+
+ESTADOS = {
+    "AC": "Acre", "AL": "Alagoas", "AP": "Amapá", "AM": "Amazonas", "BA": "Bahia", "CE": "Ceará",
+    "DF": "Distrito Federal", "ES": "Espírito Santo", "GO": "Goiás", "MA": "Maranhão",
+    "MT": "Mato Grosso", "MS": "Mato Grosso do Sul", "MG": "Minas Gerais", "PA": "Pará",
+    "PB": "Paraíba", "PR": "Paraná", "PE": "Pernambuco", "PI": "Piauí", "RJ": "Rio de Janeiro",
+    "RN": "Rio Grande do Norte", "RS": "Rio Grande do Sul", "RO": "Rondônia", "RR": "Roraima",
+    "SC": "Santa Catarina", "SP": "São Paulo", "SE": "Sergipe", "TO": "Tocantins",
+}
+
+# Apelidos (sem acentos, minúsculos) -> (cidade, UF). Têm prioridade sobre os nomes de
+# estado, então "São Paulo" e "Rio de Janeiro" sozinhos são as capitais.
+APELIDOS = {
+    "rio": ("Rio de Janeiro", "RJ"), "rio de janeiro": ("Rio de Janeiro", "RJ"),
+    "sao paulo": ("São Paulo", "SP"), "sampa": ("São Paulo", "SP"),
+    "bh": ("Belo Horizonte", "MG"), "beaga": ("Belo Horizonte", "MG"),
+    "poa": ("Porto Alegre", "RS"), "floripa": ("Florianópolis", "SC"),
+    "bsb": ("Brasília", "DF"), "cwb": ("Curitiba", "PR"), "ssa": ("Salvador", "BA"),
+    "sjc": ("São José dos Campos", "SP"), "sjrp": ("São José do Rio Preto", "SP"),
+}
+
+# Textos que não são um lugar: trabalho remoto e o país inteiro.
+REMOTO = {"remoto", "remota", "home office", "homeoffice", "trabalho remoto", "remote", "teletrabalho", "a distancia"}
+PAIS = {"brasil", "brazil", "br", "todo o brasil", "todas as localizacoes", "qualquer lugar", "nacional"}
+
+# Complementos que, sozinhos, qualificam a localização anterior em vez de formar uma nova
+# ("São Paulo, SP", "Recife, Brasil").
+_UFS = {uf.casefold() for uf in ESTADOS}
+_COMPLEMENTOS = _UFS | {"brasil", "brazil", "br"}
+
+# Tamanho mínimo do texto para completar por prefixo e erros de digitação tolerados por tamanho.
+_MINIMO_PREFIXO = 4
+_DISTANCIA_MAXIMA = ((5, 0), (9, 1))  # até 4 letras: 0; 5 a 8: 1; 9 ou mais: 2
+# Sem o estado no texto, um prefixo ou erro de digitação só é completado para um lugar
+# com pelo menos esta população: quem abrevia ou erra quer dizer uma cidade conhecida,
+# e nomes de fora do índice ("Paris", "Lima") não viram um município pequeno parecido.
+_POPULACAO_MINIMA_APROXIMADA = 100_000
+
+
+class Localidade(NamedTuple):
+    rotulo: str      # forma canônica, guardada no perfil e usada nas chaves de cache ("Niterói - RJ")
+    consulta: str    # texto enviado às fontes ("Niterói, Rio de Janeiro, Brasil")
+    tipo: str        # "cidade", "estado", "pais" ou "remoto"
+    uf: str          # sigla do estado ("" para país e remoto)
+    populacao: int
+
+
+LOCALIDADE_REMOTO = Localidade("Remoto", "Remoto", "remoto", "", 0)
+LOCALIDADE_PAIS = Localidade("Brasil", "Brasil", "pais", "", 0)
+
+
+def _chave(texto: str) -> str:
+    """Texto de comparação: sem acentos, minúsculo, só letras e dígitos separados por um espaço."""
+    return _NAO_ALFANUMERICO.sub(" ", normalizar_termo(texto)).strip()
+
+
+# --- ÍNDICE ---
+
+class _No:
+    """Nó da trie: filhos por letra, o nome que termina aqui e o nome mais populoso da subárvore."""
+    __slots__ = ("filhos", "nome", "melhor")
+
+    def __init__(self):
+        self.filhos: Dict[str, "_No"] = {}
+        self.nome = ""
+        self.melhor = ""
+
+
+class _Indice:
+    def __init__(self, caminho: str):
+        self.raiz = _No()
+        # Nome sem acentos -> localidades com esse nome (homônimas em estados diferentes, estado e capital)
+        self.nomes: Dict[str, List[Localidade]] = {}
+        self.estados: Dict[str, Localidade] = {}
+        self.cidades: Dict[Tuple[str, str], Localidade] = {}
+
+        populacao_estados = dict.fromkeys(ESTADOS, 0)
+        with open(caminho, encoding="utf-8") as f:
+            for linha in f:
+                if linha.startswith("#") or not linha.strip():
+                    continue
+                uf, nome, populacao = linha.rstrip("\n").split("\t")
+                cidade = Localidade(f"{nome} - {uf}", f"{nome}, {ESTADOS[uf]}, Brasil", "cidade", uf, int(populacao))
+                self.cidades[(_chave(nome), uf)] = cidade
+                self.nomes.setdefault(_chave(nome), []).append(cidade)
+                populacao_estados[uf] += cidade.populacao
+
+        for uf, nome in ESTADOS.items():
+            # A população do estado (soma das cidades) o coloca à frente das suas cidades nos prefixos.
+            rotulo = nome if uf == "DF" else f"{nome} (estado)"
+            estado = Localidade(rotulo, f"{nome}, Brasil", "estado", uf, populacao_estados[uf])
+            self.estados[uf.casefold()] = self.estados[_chave(nome)] = estado
+            self.nomes.setdefault(_chave(nome), []).append(estado)
+
+        self.maiores = {nome: self.populacao(nome) for nome in self.nomes}
+        for nome in self.nomes:
+            self._inserir(nome)
+
+    def populacao(self, nome: str, uf: str = "") -> int:
+        """Maior população entre as localidades com o nome (só do estado `uf`, se informado); -1 se nenhuma."""
+        return max((l.populacao for l in self.nomes[nome] if not uf or l.uf == uf), default=-1)
+
+    def _inserir(self, nome: str):
+        no = self.raiz
+        for letra in nome + "\0":
+            if not no.melhor or self.maiores[nome] > self.maiores[no.melhor]:
+                no.melhor = nome
+            if letra == "\0":
+                no.nome = nome
+            else:
+                no = no.filhos.setdefault(letra, _No())
+
+    def por_prefixo(self, prefixo: str, uf: str = "") -> str:
+        """O nome mais populoso que começa com `prefixo` (com localidade no estado `uf`, se informado)."""
+        no = self.raiz
+        for letra in prefixo:
+            no = no.filhos.get(letra)
+            if no is None:
+                return ""
+        if not uf:
+            return no.melhor
+        melhor, populacao = "", -1
+        pilha = [no]
+        while pilha:
+            atual = pilha.pop()
+            if atual.nome and self.populacao(atual.nome, uf) > populacao:
+                melhor, populacao = atual.nome, self.populacao(atual.nome, uf)
+            pilha.extend(atual.filhos.values())
+        return melhor
+
+    def aproximado(self, nome: str, uf: str = "") -> str:
+        """
+        O nome do índice mais parecido com `nome` (distância de edição com transposições,
+        percorrendo a trie e podando ramos que já passaram da melhor distância); empate vai
+        para o mais populoso. A primeira letra tem que bater, o que corta a busca a uma
+        fração da trie (quase ninguém erra a inicial).
+        """
+        maximo = next((d for limite, d in _DISTANCIA_MAXIMA if len(nome) < limite), 2)
+        inicio = self.raiz.filhos.get(nome[:1])
+        if not maximo or inicio is None:
+            return ""
+        melhor: Tuple[int, int, str] = (maximo, 0, "")
+        primeira = list(range(len(nome) + 1))
+        pilha = [(inicio, nome[0], "", primeira, None, 1)]
+        while pilha:
+            no, letra, anterior, acima, acima2, profundidade = pilha.pop()
+            linha = [acima[0] + 1]
+            for j in range(1, len(nome) + 1):
+                valor = min(linha[j - 1] + 1, acima[j] + 1, acima[j - 1] + (nome[j - 1] != letra))
+                if acima2 is not None and j > 1 and nome[j - 1] == anterior and nome[j - 2] == letra:
+                    valor = min(valor, acima2[j - 2] + 1)
+                linha.append(valor)
+            if no.nome and linha[-1] <= melhor[0]:
+                populacao = self.populacao(no.nome, uf)
+                if populacao >= 0 and (linha[-1], -populacao) < melhor[:2]:
+                    melhor = (linha[-1], -populacao, no.nome)
+            if min(linha) <= melhor[0]:
+                # O ramo que segue o texto digitado entra por último na pilha e é visitado
+                # primeiro: acha cedo um nome próximo e aperta a poda dos demais.
+                seguinte = nome[profundidade:profundidade + 1]
+                pilha.extend((filho, proxima, letra, linha, acima, profundidade + 1)
+                             for proxima, filho in no.filhos.items() if proxima != seguinte)
+                if seguinte in no.filhos:
+                    pilha.append((no.filhos[seguinte], seguinte, letra, linha, acima, profundidade + 1))
+        return melhor[2]
+
+
+_indice: Optional[_Indice] = None
+_indice_lock = threading.Lock()
+
+
+def _obter_indice() -> _Indice:
+    """Monta o índice na primeira chamada (o arquivo é lido uma vez por processo)."""
+    global _indice
+    if _indice is None:
+        with _indice_lock:
+            if _indice is None:
+                _indice = _Indice(ARQUIVO_LOCALIDADES)
+    return _indice
+
+
+# --- RESOLUÇÃO ---
+
+# " sao paulo", " minas gerais"...: nome do estado no fim do texto ("Campinas, São Paulo").
+_SUFIXOS_ESTADOS = {uf: " " + _chave(estado) for uf, estado in ESTADOS.items()}
+
+def _separar_uf(chave: str) -> Tuple[str, str]:
+    """("campinas", "SP") para "campinas sp" ou "campinas sao paulo"; (chave, "") se não houver estado."""
+    nome, _, ultima = chave.rpartition(" ")
+    if nome and ultima in _UFS:
+        return nome, ultima.upper()
+    for uf, sufixo in _SUFIXOS_ESTADOS.items():
+        if chave.endswith(sufixo) and len(chave) > len(sufixo):
+            return chave[:-len(sufixo)], uf
+    return chave, ""
+
+
+def _exata(indice: _Indice, nome: str, uf: str = "") -> Optional[Localidade]:
+    """
+    Localidade com exatamente esse nome: apelido, estado e cidade, nessa ordem
+    (com `uf`, a cidade daquele estado vem antes do estado de mesmo nome).
+    Entre cidades homônimas, a mais populosa.
+    """
+    if nome in APELIDOS and (not uf or APELIDOS[nome][1] == uf):
+        cidade, uf_apelido = APELIDOS[nome]
+        return indice.cidades[(_chave(cidade), uf_apelido)]
+    estado = indice.estados.get(nome)
+    if estado and not uf:
+        return estado
+    cidades = [l for l in indice.nomes.get(nome, []) if l.tipo == "cidade" and (not uf or l.uf == uf)]
+    if cidades:
+        return max(cidades, key=lambda l: l.populacao)
+    return estado if estado and estado.uf == uf else None
+
+
+def _confiavel(localidade: Optional[Localidade], uf: str) -> bool:
+    """Se um nome achado por prefixo ou aproximação pode ser aceito no lugar do texto digitado."""
+    return localidade is not None and (bool(uf) or localidade.populacao >= _POPULACAO_MINIMA_APROXIMADA)
+
+
+@lru_cache(maxsize=8192)
+def resolver_localizacao(texto: str, aproximar: bool = True) -> Optional[Localidade]:
+    """
+    Localidade canônica do texto livre, ou None se não for reconhecida.
+
+    Ordem: remoto/país, nome exato (apelido, estado pela sigla ou nome, cidade),
+    nome qualificado pelo estado ("Campinas - SP", "Campinas, São Paulo"),
+    prefixo e, por fim, o nome mais parecido (erros de digitação). O nome
+    encontrado por prefixo ou aproximação passa pelas mesmas regras do exato
+    e só vale se o estado foi informado ou se o lugar é grande
+    (_POPULACAO_MINIMA_APROXIMADA). Com `aproximar=False`, só nomes exatos.
+    """
+    chave = _chave(texto)
+    if chave in PAIS:
+        return LOCALIDADE_PAIS
+    palavras = chave.split()
+    while len(palavras) > 1 and palavras[-1] in PAIS:
+        palavras.pop()
+    chave = " ".join(palavras)
+    if not chave:
+        return None
+    if chave in REMOTO:
+        return LOCALIDADE_REMOTO
+
+    indice = _obter_indice()
+    # "Estado de São Paulo", "São Paulo (estado)"
+    estado = re.sub(r"^estado d[eoa]s? |^estado | estado$", "", chave)
+    if estado != chave:
+        if estado not in indice.estados:
+            estado = indice.aproximado(estado) if aproximar else ""
+        return indice.estados.get(estado)
+
+    localidade = _exata(indice, chave)
+    if localidade:
+        return localidade
+    nome, uf = _separar_uf(chave)
+    if uf:
+        localidade = _exata(indice, nome, uf)
+        if localidade:
+            return localidade
+    if not aproximar:
+        return None
+    # Sem resultado no estado, tenta o texto inteiro ("sao pa" não é "São ..." no Pará).
+    for nome, uf in ((nome, uf), (chave, "")) if uf else ((chave, ""),):
+        parecido = (indice.por_prefixo(nome, uf) if len(nome) >= _MINIMO_PREFIXO else "") or indice.aproximado(nome, uf)
+        localidade = _exata(indice, parecido, uf) if parecido else None
+        if _confiavel(localidade, uf):
+            return localidade
+    return None
+
+
+def canonicalizar_localizacao(texto: str) -> str:
+    """Rótulo canônico da localização ("Niterói - RJ"); o texto original (sem espaços extras) se não for reconhecida."""
+    localidade = resolver_localizacao(texto)
+    return localidade.rotulo if localidade else " ".join(texto.split())
+
+
+def consulta_localizacao(texto: str) -> str:
+    """Texto a enviar às fontes de vagas para a localização."""
+    localidade = resolver_localizacao(texto)
+    return localidade.consulta if localidade else texto
+
+
+def _dividir_conjuncoes(parte: str) -> List[str]:
+    """
+    "Rio e Niterói" -> ["Rio", "Niterói"]. O texto fica inteiro se for um nome
+    exato ("Abreu e Lima") ou se algum dos pedaços não for reconhecido.
+    """
+    pedacos = [pedaco.strip(" .-") for pedaco in _CONJUNCOES.split(parte)]
+    if len(pedacos) == 1 or resolver_localizacao(parte, aproximar=False):
+        return [parte]
+    if all(pedaco and resolver_localizacao(pedaco) for pedaco in pedacos):
+        return pedacos
+    return [parte]
+
+
+def _completa_cidade(anterior: str, complemento: str) -> bool:
+    """Se o complemento ("SP", "Brasil") qualifica a localização anterior em vez de ser outra."""
+    if normalizar_termo(complemento) not in _UFS:
+        return True
+    # Uma sigla de estado só completa uma cidade daquele estado ("Campinas, SC");
+    # depois de outra coisa é o próprio estado ("Remoto, SP").
+    cidade = resolver_localizacao(anterior)
+    qualificada = resolver_localizacao(f"{anterior}, {complemento}")
+    return (
+        cidade is not None and cidade.tipo == "cidade"
+        and qualificada is not None and qualificada.tipo == "cidade"
+        and qualificada.uf == complemento.strip().upper()
+    )
+
+
+def separar_localizacoes(texto: str, maximo: int = SCRAPER_MAX_LOCALIZACOES) -> List[str]:
+    """
+    Localizações citadas no texto, já canônicas, na ordem, sem repetições e no máximo `maximo`.
+    Um texto que já é um lugar ("São Paulo, SP", "Abreu e Lima") não é separado. Uma
+    sigla de estado depois de uma cidade daquele estado (ou "Brasil") continua a anterior.
+    """
+    if resolver_localizacao(texto or "", aproximar=False):
+        return [canonicalizar_localizacao(texto)]
+
+    localizacoes: List[str] = []
+    for parte in _SEPARADORES.split(texto or ""):
+        parte = parte.strip(" .-")
+        if not parte:
+            continue
+        if localizacoes and normalizar_termo(parte) in _COMPLEMENTOS and _completa_cidade(localizacoes[-1], parte):
+            localizacoes[-1] = f"{localizacoes[-1]}, {parte}"
+        else:
+            localizacoes.extend(_dividir_conjuncoes(parte))
+
+    unicas: List[str] = []
+    vistas = set()
+    for local in map(canonicalizar_localizacao, localizacoes):
+        if normalizar_termo(local) not in vistas:
+            vistas.add(normalizar_termo(local))
+            unicas.append(local)
+    return unicas[:max(1, maximo)]
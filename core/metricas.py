@@ -0,0 +1,217 @@
+"""
+Métricas de latência e vazão do bot (contadores e histogramas em memória).
+
+Os estágios registram tempos com `medir(...)` e eventos com `incrementar(...)`.
+O agregado pode ser lido no formato texto do Prometheus por um endpoint HTTP
+local (`iniciar_servidor_metricas`) ou despejado periodicamente em arquivo/log
+(`iniciar_despejo_periodico`).
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Limites dos buckets de latência, em segundos.
+BUCKETS_PADRAO = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_Rotulos = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_contadores: Dict[str, Dict[_Rotulos, float]] = {}
+_histogramas: Dict[str, Dict[_Rotulos, "_Histograma"]] = {}
+
+
+class _Histograma:
+    __slots__ = ("contagens", "soma", "total")
+
+    def __init__(self):
+        self.contagens = [0] * (len(BUCKETS_PADRAO) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        self.contagens[bisect.bisect_left(BUCKETS_PADRAO, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+
+def _chave(rotulos: Dict[str, str]) -> _Rotulos:
+    return tuple(sorted((k, str(v)) for k, v in rotulos.items()))
+
+
+def incrementar(nome: str, valor: float = 1, **rotulos):
+    """Soma `valor` ao contador `nome` com os rótulos informados."""
+    chave = _chave(rotulos)
+    with _lock:
+        serie = _contadores.setdefault(nome, {})
+        serie[chave] = serie.get(chave, 0) + valor
+
+
+def observar(nome: str, segundos: float, **rotulos):
+    """Registra uma observação (em segundos) no histograma `nome`."""
+    chave = _chave(rotulos)
+    with _lock:
+        serie = _histogramas.setdefault(nome, {})
+        histograma = serie.get(chave)
+        if histograma is None:
+            histograma = serie[chave] = _Histograma()
+        histograma.observar(segundos)
+
+
+@contextmanager
+def medir(nome: str, **rotulos) -> Iterator[None]:
+    """
+    Mede o tempo do bloco e registra no histograma `nome`. Funciona também
+    em código assíncrono (`with medir(...): await ...`). Se o bloco levantar
+    exceção, a observação leva o rótulo status="erro".
+    """
+    inicio = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "erro"
+        raise
+    finally:
+        observar(nome, time.perf_counter() - inicio, status=status, **rotulos)
+
+
+def limpar():
+    """Zera todas as métricas (útil em benchmarks)."""
+    with _lock:
+        _contadores.clear()
+        _histogramas.clear()
+
+
+def resumo() -> Dict[str, Dict]:
+    """Retrato das métricas em dicionário: contadores e, por histograma, contagem/soma/média."""
+    with _lock:
+        contadores = {nome: {_formatar_rotulos(k) or "-": v for k, v in serie.items()} for nome, serie in _contadores.items()}
+        histogramas = {
+            nome: {
+                _formatar_rotulos(k) or "-": {"n": h.total, "soma_s": h.soma, "media_s": h.soma / h.total if h.total else 0.0}
+                for k, h in serie.items()
+            }
+            for nome, serie in _histogramas.items()
+        }
+    return {"contadores": contadores, "histogramas": histogramas}
+
+
+def _contagens(nome: str, rotulos: Dict) -> List[int]:
+    """Contagens por bucket somadas das séries de `nome` com os rótulos pedidos (valor ou coleção de valores)."""
+    aceitos = {
+        k: {str(x) for x in v} if isinstance(v, (list, tuple, set, frozenset)) else {str(v)}
+        for k, v in rotulos.items()
+    }
+    contagens = [0] * (len(BUCKETS_PADRAO) + 1)
+    with _lock:
+        for chave, h in _histogramas.get(nome, {}).items():
+            serie = dict(chave)
+            if all(serie.get(k) in valores for k, valores in aceitos.items()):
+                contagens = [a + b for a, b in zip(contagens, h.contagens)]
+    return contagens
+
+
+def total_observacoes(nome: str, **rotulos) -> int:
+    """Observações do histograma `nome` nas séries com os rótulos informados."""
+    return sum(_contagens(nome, rotulos))
+
+
+def quantil(nome: str, q: float, **rotulos) -> float:
+    """
+    Quantil `q` (0 a 1) aproximado do histograma `nome`, interpolado dentro do
+    bucket como o histogram_quantile do Prometheus. Cada rótulo aceita um valor
+    ou uma coleção de valores. Sem observações, retorna 0.
+    """
+    contagens = _contagens(nome, rotulos)
+    alvo = q * sum(contagens)
+    acumulado = 0
+    for i, contagem in enumerate(contagens):
+        if contagem and acumulado + contagem >= alvo:
+            if i == len(BUCKETS_PADRAO):
+                return BUCKETS_PADRAO[-1]
+            inferior = BUCKETS_PADRAO[i - 1] if i else 0.0
+            return inferior + (BUCKETS_PADRAO[i] - inferior) * (alvo - acumulado) / contagem
+        acumulado += contagem
+    return 0.0
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatar_rotulos(rotulos: _Rotulos, extra: Optional[Tuple[str, str]] = None) -> str:
+    pares = list(rotulos) + ([extra] if extra else [])
+    if not pares:
+        return ""
+    conteudo = ",".join(f'{k}="{_escapar(v)}"' for k, v in pares)
+    return "{" + conteudo + "}"
+
+
+def exportar_prometheus() -> str:
+    """Todas as métricas no formato de exposição em texto do Prometheus."""
+    linhas: List[str] = []
+    with _lock:
+        for nome in sorted(_contadores):
+            linhas.append(f"# TYPE {nome} counter")
+            for rotulos, valor in sorted(_contadores[nome].items()):
+                linhas.append(f"{nome}{_formatar_rotulos(rotulos)} {valor:g}")
+        for nome in sorted(_histogramas):
+            linhas.append(f"# TYPE {nome} histogram")
+            for rotulos, h in sorted(_histogramas[nome].items()):
+                acumulado = 0
+                for limite, contagem in zip(BUCKETS_PADRAO, h.contagens):
+                    acumulado += contagem
+                    linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos, ('le', f'{limite:g}'))} {acumulado}")
+                linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos, ('le', '+Inf'))} {h.total}")
+                linhas.append(f"{nome}_sum{_formatar_rotulos(rotulos)} {h.soma:.6f}")
+                linhas.append(f"{nome}_count{_formatar_rotulos(rotulos)} {h.total}")
+    return "\n".join(linhas) + "\n"
+
+
+class _HandlerMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        corpo = exportar_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def iniciar_servidor_metricas(porta: int, endereco: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Sobe o endpoint GET /metrics em uma thread daemon e retorna o servidor."""
+    servidor = ThreadingHTTPServer((endereco, porta), _HandlerMetricas)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="metricas-http", daemon=True).start()
+    logging.info(f"Métricas disponíveis em http://{endereco}:{servidor.server_port}/metrics")
+    return servidor
+
+
+def iniciar_despejo_periodico(intervalo: float, caminho: Optional[str] = None) -> threading.Event:
+    """
+    Grava as métricas a cada `intervalo` segundos no arquivo `caminho`
+    (sobrescrevendo) ou, sem arquivo, no log. Retorna um Event que encerra o despejo.
+    """
+    parar = threading.Event()
+
+    def _loop():
+        while not parar.wait(intervalo):
+            texto = exportar_prometheus()
+            if caminho:
+                with open(caminho, "w", encoding="utf-8") as f:
+                    f.write(texto)
+            else:
+                logging.info("Métricas:\n%s", texto)
+
+    threading.Thread(target=_loop, name="metricas-despejo", daemon=True).start()
+    return parar
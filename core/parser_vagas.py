@@ -0,0 +1,146 @@
+import importlib
+import re
+from importlib.util import find_spec
+from typing import Callable, Dict, List, Optional
+
+from config import SCRAPER_PARSER
+
+# Módulo de cada backend. Os opcionais (lxml, selectolax) são usados só se a
+# biblioteca estiver instalada; todos são importados no primeiro uso, e não com
+# este módulo, para não atrasar a partida do bot (ver core/preaquecimento.py).
+_MODULOS = {"bs4": "bs4", "lxml": "lxml.html", "selectolax": "selectolax.lexbor"}
+
+
+def _instalado(modulo: str) -> bool:
+    """Se o pacote do módulo está instalado (find_spec do pacote de topo não o importa)."""
+    return find_spec(modulo.partition(".")[0]) is not None
+
+LINK_NAO_ENCONTRADO = "Link não encontrado"
+
+
+def _classe(nome: str) -> str:
+    """Predicado XPath equivalente ao class_= do BeautifulSoup (token em @class)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {nome} ')"
+
+
+# Durante o filtro do SoupStrainer o atributo class chega como texto cru em
+# algumas versões do bs4, então o token é casado por regex.
+_CLASSE_BASE_CARD = re.compile(r"(^|\s)base-card(\s|$)")
+
+_XPATH_CARDS = f"//div[{_classe('base-card')}]"
+_XPATH_TITULO = f".//h3[{_classe('base-search-card__title')}]"
+_XPATH_EMPRESA = f".//h4[{_classe('base-search-card__subtitle')}]"
+_XPATH_LOCAL = f".//span[{_classe('job-search-card__location')}]"
+_XPATH_LINK = f".//a[{_classe('base-card__full-link')}]"
+
+
+def _extrair_bs4(html: str) -> List[Dict]:
+    """Backend de referência: BeautifulSoup, interpretando só os cards (SoupStrainer)."""
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('div', class_=_CLASSE_BASE_CARD))
+
+    lista_de_vagas = []
+    for card in soup.find_all('div', class_='base-card'):
+        try:
+            titulo = card.find('h3', class_='base-search-card__title').text.strip()
+            empresa = card.find('h4', class_='base-search-card__subtitle').text.strip()
+            local = card.find('span', class_='job-search-card__location').text.strip()
+
+            link_tag = card.find('a', class_='base-card__full-link')
+            link = link_tag.get('href', LINK_NAO_ENCONTRADO) if link_tag else LINK_NAO_ENCONTRADO
+
+            lista_de_vagas.append({
+                "titulo": titulo, "empresa": empresa,
+                "local": local, "link": link
+            })
+        except AttributeError:
+            continue
+
+    return lista_de_vagas
+
+
+def _extrair_lxml(html: str) -> List[Dict]:
+    """Backend lxml (libxml2, em C) com consultas XPath restritas a cada card."""
+    from lxml import html as lxml_html
+
+    if not html.strip():
+        return []
+    raiz = lxml_html.fromstring(html)
+
+    lista_de_vagas = []
+    for card in raiz.xpath(_XPATH_CARDS):
+        titulo = card.xpath(_XPATH_TITULO)
+        empresa = card.xpath(_XPATH_EMPRESA)
+        local = card.xpath(_XPATH_LOCAL)
+        if not (titulo and empresa and local):
+            continue
+
+        link_tag = card.xpath(_XPATH_LINK)
+        link = link_tag[0].get('href', LINK_NAO_ENCONTRADO) if link_tag else LINK_NAO_ENCONTRADO
+
+        lista_de_vagas.append({
+            "titulo": titulo[0].text_content().strip(),
+            "empresa": empresa[0].text_content().strip(),
+            "local": local[0].text_content().strip(),
+            "link": link
+        })
+
+    return lista_de_vagas
+
+
+def _extrair_selectolax(html: str) -> List[Dict]:
+    """Backend selectolax (Lexbor, em C) com seletores CSS."""
+    from selectolax.lexbor import LexborHTMLParser
+
+    lista_de_vagas = []
+    for card in LexborHTMLParser(html).css('div.base-card'):
+        titulo = card.css_first('h3.base-search-card__title')
+        empresa = card.css_first('h4.base-search-card__subtitle')
+        local = card.css_first('span.job-search-card__location')
+        if titulo is None or empresa is None or local is None:
+            continue
+
+        link_tag = card.css_first('a.base-card__full-link')
+        link = link_tag.attributes.get('href') if link_tag is not None else None
+
+        lista_de_vagas.append({
+            "titulo": titulo.text().strip(),
+            "empresa": empresa.text().strip(),
+            "local": local.text().strip(),
+            "link": link if link is not None else LINK_NAO_ENCONTRADO
+        })
+
+    return lista_de_vagas
+
+
+BACKENDS: Dict[str, Callable[[str], List[Dict]]] = {"bs4": _extrair_bs4}
+if _instalado(_MODULOS["lxml"]):
+    BACKENDS["lxml"] = _extrair_lxml
+if _instalado(_MODULOS["selectolax"]):
+    BACKENDS["selectolax"] = _extrair_selectolax
+
+# Ordem de preferência quando SCRAPER_PARSER = "auto".
+_PREFERENCIA = ("selectolax", "lxml", "bs4")
+
+
+def backend_padrao() -> str:
+    """Nome do backend usado quando nenhum é informado."""
+    if SCRAPER_PARSER != "auto":
+        if SCRAPER_PARSER not in BACKENDS:
+            raise ValueError(f"Parser '{SCRAPER_PARSER}' indisponível. Opções: {', '.join(BACKENDS)}.")
+        return SCRAPER_PARSER
+    return next(nome for nome in _PREFERENCIA if nome in BACKENDS)
+
+
+def importar_backend(backend: Optional[str] = None):
+    """Importa a biblioteca do backend (o padrão, se nenhum for informado) sem interpretar nada."""
+    importlib.import_module(_MODULOS[backend or backend_padrao()])
+
+
+def extrair_vagas(html: str, backend: Optional[str] = None) -> List[Dict]:
+    """
+    Converte o HTML da página de resultados do LinkedIn em uma lista de vagas
+    (dicts com titulo/empresa/local/link), usando o backend escolhido.
+    """
+    return BACKENDS[backend or backend_padrao()](html)
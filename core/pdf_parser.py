@@ -1,17 +1,170 @@
-import fitz
-from typing import Union
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, Optional, Set, Union
 import io
 
+from config import PDF_MAX_BYTES, PDF_MAX_PAGINAS, PDF_MAX_CARACTERES, PDF_TIMEOUT, PDF_PROCESSOS
 
-def extrair_texto_pdf(fonte_pdf : Union[str, io.BytesIO]) -> str | None:
+# Pool de processos da extração: um PDF pesado (ou malicioso) consome CPU de um
+# processo separado e pode ser interrompido sem travar o event loop do bot.
+_pool: Optional[ProcessPoolExecutor] = None
+# Extrações em andamento por pool, e pools descartados (por um documento que
+# estourou o tempo) que serão encerrados quando as outras extrações terminarem.
+_em_andamento: Dict[ProcessPoolExecutor, int] = {}
+_descartados: Set[ProcessPoolExecutor] = set()
+
+# Limita as extrações em voo ao número de processos (um semáforo por event loop),
+# para que PDF_TIMEOUT conte só a execução, e não a espera na fila do pool.
+_limitador: Optional[asyncio.Semaphore] = None
+_limitador_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _abrir_pdf(fonte_pdf: Union[str, bytes, io.BytesIO]):
+    # Importado no primeiro uso: o PyMuPDF não precisa atrasar a partida do bot.
+    import fitz
+
+    if isinstance(fonte_pdf, str):
+        return fitz.open(fonte_pdf)
+    return fitz.open(stream=fonte_pdf, filetype="pdf")
+
+
+def iterar_paginas_pdf(
+    fonte_pdf: Union[str, bytes, io.BytesIO],
+    max_paginas: Optional[int] = None,
+    max_caracteres: Optional[int] = None,
+) -> Iterator[str]:
     '''
-    Abre um arquivo PDF e retorna com o texto contido nele.
-     
+    Gera o texto do PDF página a página, parando ao atingir o limite de
+    páginas ou de caracteres (a última página é truncada no limite).
+    '''
+    max_paginas = PDF_MAX_PAGINAS if max_paginas is None else max_paginas
+    restante = PDF_MAX_CARACTERES if max_caracteres is None else max_caracteres
+
+    with _abrir_pdf(fonte_pdf) as doc:
+        for indice, page in enumerate(doc):
+            if indice >= max_paginas or restante <= 0:
+                break
+            texto = page.get_text()[:restante]
+            restante -= len(texto)
+            yield texto
+
+
+def extrair_texto_pdf(
+    fonte_pdf: Union[str, bytes, io.BytesIO],
+    max_paginas: Optional[int] = None,
+    max_caracteres: Optional[int] = None,
+) -> str | None:
+    '''
+    Abre um arquivo PDF e retorna com o texto contido nele, com as páginas
+    separadas por \\f, respeitando os limites de páginas e de caracteres.
     '''
     try:
-        with fitz.open(stream=fonte_pdf, filetype="pdf") as doc:
-            texto_completo = "".join(page.get_text() for page in doc)
-            return texto_completo
+        texto = "\f".join(iterar_paginas_pdf(fonte_pdf, max_paginas, max_caracteres))
+        return texto if texto.strip() else ""
     except Exception as e:
         print(f"Erro ao ler o PDF: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def _obter_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # "spawn" evita herdar threads e conexões abertas do processo do bot.
+        _pool = ProcessPoolExecutor(max_workers=PDF_PROCESSOS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _obter_limitador() -> asyncio.Semaphore:
+    global _limitador, _limitador_loop
+    loop = asyncio.get_running_loop()
+    if _limitador is None or _limitador_loop is not loop:
+        _limitador = asyncio.Semaphore(PDF_PROCESSOS)
+        _limitador_loop = loop
+    return _limitador
+
+
+def _carregar_pymupdf():
+    import fitz  # noqa: F401
+
+
+def aquecer_pool():
+    '''Sobe os processos do pool de extração e carrega o PyMuPDF neles (bloqueia até terminar).'''
+    pool = _obter_pool()
+    wait([pool.submit(_carregar_pymupdf) for _ in range(PDF_PROCESSOS)])
+
+
+def _matar_processos(pool: ProcessPoolExecutor):
+    '''Mata os processos do pool (um deles está preso em um documento) e o encerra.'''
+    if hasattr(pool, "terminate_workers"):
+        pool.terminate_workers()
+        return
+    # Antes do Python 3.14 o ProcessPoolExecutor não tem como matar os processos.
+    for processo in list((pool._processes or {}).values()):
+        processo.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _descartar_pool(pool: ProcessPoolExecutor):
+    '''
+    Tira `pool` de uso e o encerra assim que as outras extrações em andamento
+    nele terminarem. Se outra extração já trocou o pool, o novo não é tocado.
+    '''
+    global _pool
+    if _pool is pool:
+        _pool = None
+    _descartados.add(pool)
+
+
+def _terminar_extracao(pool: ProcessPoolExecutor):
+    _em_andamento[pool] -= 1
+    if _em_andamento[pool]:
+        return
+    del _em_andamento[pool]
+    if pool in _descartados:
+        _descartados.discard(pool)
+        _matar_processos(pool)
+
+
+def encerrar_pool():
+    '''Encerra o pool de extração (no desligamento do bot), esperando os processos saírem.'''
+    global _pool
+    pool, _pool = _pool, None
+    for descartado in list(_descartados):
+        _descartados.discard(descartado)
+        _matar_processos(descartado)
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def extrair_texto_pdf_async(
+    pdf_bytes: Union[bytes, bytearray],
+    max_paginas: Optional[int] = None,
+    max_caracteres: Optional[int] = None,
+) -> str | None:
+    '''
+    Extrai o texto do PDF em um processo separado, sem bloquear o event loop.
+    Retorna None se o arquivo for grande demais, inválido ou estourar PDF_TIMEOUT.
+    '''
+    if len(pdf_bytes) > PDF_MAX_BYTES:
+        print(f"Erro ao ler o PDF: arquivo com {len(pdf_bytes)} bytes excede o limite de {PDF_MAX_BYTES}.")
+        return None
+
+    loop = asyncio.get_running_loop()
+    async with _obter_limitador():
+        pool = _obter_pool()
+        _em_andamento[pool] = _em_andamento.get(pool, 0) + 1
+        try:
+            futuro = loop.run_in_executor(pool, extrair_texto_pdf, bytes(pdf_bytes), max_paginas, max_caracteres)
+            return await asyncio.wait_for(futuro, PDF_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"Erro ao ler o PDF: extração excedeu {PDF_TIMEOUT}s. Reiniciando o pool de extração.")
+            _descartar_pool(pool)
+            return None
+        except BrokenProcessPool:
+            print("Erro ao ler o PDF: processo de extração encerrado inesperadamente.")
+            _descartar_pool(pool)
+            return None
+        finally:
+            _terminar_extracao(pool)
@@ -0,0 +1,60 @@
+"""
+Carregamento antecipado das dependências pesadas.
+
+PyMuPDF, google-genai, NumPy, o scraper e o parser de HTML (lxml ou
+selectolax) são importados no primeiro uso, para que o bot (e cada
+trabalhador do modo webhook) responda o /start logo após subir.
+`preaquecer` faz esse trabalho de uma vez, fora do caminho das mensagens:
+o bot o agenda na job queue, em uma thread, logo depois de começar a
+receber updates (BOT_PREAQUECER), e assim o primeiro CV e a primeira busca não pagam por ele.
+"""
+import importlib
+import time
+from typing import Callable, Dict, List, Tuple
+
+from core import metricas
+
+
+def _indice_localizacoes():
+    from core.localizacao import _obter_indice
+
+    _obter_indice()
+
+
+def _parser_vagas():
+    from core.parser_vagas import importar_backend
+
+    importlib.import_module("core.job_scraper")
+    importar_backend()
+
+
+def _pool_pdf():
+    from core.pdf_parser import aquecer_pool
+
+    aquecer_pool()
+
+
+# (etapa, função) na ordem em que são carregadas; as primeiras são as que o fluxo usa antes.
+ETAPAS: List[Tuple[str, Callable[[], object]]] = [
+    # O PyMuPDF só é usado nos processos de extração: é carregado neles, não no processo do bot.
+    ("pool_pdf", _pool_pdf),
+    ("google_genai", lambda: importlib.import_module("google.genai")),
+    ("localizacoes", _indice_localizacoes),
+    ("parser_vagas", _parser_vagas),
+    ("numpy", lambda: importlib.import_module("core.ranking")),
+]
+
+
+def preaquecer() -> Dict[str, float]:
+    """Executa cada etapa (bloqueante) e retorna quanto tempo (s) ela levou; uma etapa que falha não impede as outras."""
+    tempos: Dict[str, float] = {}
+    for etapa, carregar in ETAPAS:
+        inicio = time.perf_counter()
+        try:
+            with metricas.medir("bot_preaquecimento_segundos", etapa=etapa):
+                carregar()
+        except Exception as e:
+            print(f"Pré-aquecimento: falha ao carregar {etapa}: {e}")
+            continue
+        tempos[etapa] = time.perf_counter() - inicio
+    return tempos
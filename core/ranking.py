@@ -0,0 +1,141 @@
+"""
+Ranking das vagas de uma busca pelo perfil do usuário.
+
+As vagas viram uma matriz TF-IDF esparsa, em formato de coordenadas
+(arrays de documento, termo e peso), e são comparadas por cosseno com o
+perfil (habilidades_chave + cargo_ideal). Cada título é tokenizado uma
+única vez (memoizado, com limite) e o vocabulário é o do próprio lote, então
+a memória não cresce com o número de buscas e a pontuação de um lote inteiro
+sai em poucas operações NumPy (`bincount`).
+Um ajuste de senioridade favorece as vagas do nível do usuário.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Peso dos termos do cargo ideal em relação a cada habilidade.
+PESO_CARGO = 2.0
+# Ajuste somado à similaridade quando o nível da vaga é o do usuário
+# (ou subtraído quando está a dois níveis ou mais de distância).
+AJUSTE_SENIORIDADE = 0.15
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+_PALAVRAS_VAZIAS = {
+    "de", "da", "do", "das", "dos", "e", "em", "para", "com", "a", "o", "as", "os",
+    "the", "at", "of", "and", "for", "in", "to", "vaga", "vagas",
+}
+
+# Níveis em ordem crescente; "-1" significa nível não informado.
+_NIVEIS = {
+    "estagio": 0, "estagiario": 0, "estagiaria": 0, "trainee": 0, "aprendiz": 0, "intern": 0,
+    "junior": 1, "jr": 1,
+    "pleno": 2, "mid": 2,
+    "senior": 3, "sr": 3,
+    "especialista": 4, "lead": 4, "lider": 4, "staff": 4, "principal": 4,
+}
+
+def tokenizar(texto: str) -> List[str]:
+    """Termos do texto: sem acentos, minúsculos, preservando c++, c#, node.js etc."""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).casefold()
+    return [t for t in _TOKEN.findall(texto) if t not in _PALAVRAS_VAZIAS]
+
+
+def nivel(texto: str) -> int:
+    """Nível de senioridade citado no texto (0 = estágio ... 4 = especialista/liderança) ou -1."""
+    niveis = [_NIVEIS[t] for t in tokenizar(texto) if t in _NIVEIS]
+    # "Tech Lead Sênior" fica com o nível mais alto citado.
+    return max(niveis) if niveis else -1
+
+
+@lru_cache(maxsize=65536)
+def _termos_titulo(titulo: str) -> Tuple[Tuple[str, ...], int]:
+    """(termos, nível) de um título, memoizados entre buscas."""
+    return tuple(tokenizar(titulo)), nivel(titulo)
+
+
+class MatrizVagas:
+    """
+    Representação TF-IDF de um lote de vagas, pronta para ser pontuada contra
+    vários perfis (ex.: todos os inscritos de um mesmo alerta).
+    """
+
+    def __init__(self, vagas: Sequence[Dict]):
+        self.quantidade = len(vagas)
+        termos = [_termos_titulo(vaga.get("titulo", "")) for vaga in vagas]
+        self.niveis = np.fromiter((n for _, n in termos), dtype=np.int64, count=self.quantidade)
+
+        comprimentos = np.fromiter((len(t) for t, _ in termos), dtype=np.int64, count=self.quantidade)
+        total = int(comprimentos.sum())
+        docs = np.repeat(np.arange(self.quantidade, dtype=np.int64), comprimentos)
+
+        # Vocabulário do lote (termo -> coluna 0..n-1): descartado junto com a matriz.
+        todos = list(chain.from_iterable(t for t, _ in termos))
+        self.vocabulario: Dict[str, int] = {termo: i for i, termo in enumerate(dict.fromkeys(todos))}
+        colunas = np.fromiter(map(self.vocabulario.__getitem__, todos), dtype=np.int64, count=total)
+        colunas_lote = max(1, len(self.vocabulario))
+
+        # Frequência de cada par (vaga, termo), com o par codificado em um único inteiro.
+        pares, frequencias = np.unique(docs * colunas_lote + colunas, return_counts=True)
+        self.docs = pares // colunas_lote
+        self.termos = pares % colunas_lote
+
+        # IDF suavizado, calculado sobre o próprio lote.
+        df = np.bincount(self.termos, minlength=len(self.vocabulario))
+        self.idf = np.log((1 + self.quantidade) / (1 + df)) + 1.0
+
+        pesos = (1.0 + np.log(frequencias)) * self.idf[self.termos]
+        normas = np.sqrt(np.bincount(self.docs, weights=pesos * pesos, minlength=self.quantidade))
+        self.pesos = pesos / normas[self.docs] if pesos.size else pesos
+
+    def _consulta(self, habilidades: Iterable[str], cargo: str) -> np.ndarray:
+        """Vetor do perfil nas colunas do lote (termos que não aparecem no lote ficam de fora)."""
+        consulta = np.zeros(len(self.vocabulario))
+        termos = [(t, 1.0) for habilidade in habilidades or [] for t in tokenizar(habilidade)]
+        termos += [(t, PESO_CARGO) for t in tokenizar(cargo)]
+        for termo, peso in termos:
+            coluna = self.vocabulario.get(termo)
+            if coluna is not None:
+                consulta[coluna] += peso
+        return consulta * self.idf
+
+    def pontuar(self, habilidades: Iterable[str], cargo: str = "", nivel_usuario: str = "") -> np.ndarray:
+        """Similaridade de cosseno de cada vaga com o perfil, mais o ajuste de senioridade."""
+        consulta = self._consulta(habilidades, cargo)
+        norma = np.linalg.norm(consulta)
+
+        pontos = np.zeros(self.quantidade)
+        if norma > 0:
+            pontos = np.bincount(
+                self.docs, weights=self.pesos * consulta[self.termos], minlength=self.quantidade
+            ) / norma
+
+        alvo = nivel(nivel_usuario)
+        if alvo >= 0:
+            distancia = np.abs(self.niveis - alvo)
+            informado = self.niveis >= 0
+            pontos = pontos + AJUSTE_SENIORIDADE * ((informado & (distancia == 0)).astype(float)
+                                                   - (informado & (distancia >= 2)).astype(float))
+        return pontos
+
+    def ordenar(self, pontos: np.ndarray, indices: Optional[Sequence[int]] = None) -> List[int]:
+        """Índices (de `indices` ou de todas as vagas) da maior para a menor pontuação, estável."""
+        indices = np.arange(self.quantidade) if indices is None else np.asarray(indices, dtype=np.int64)
+        if indices.size == 0:
+            return []
+        return indices[np.argsort(-pontos[indices], kind="stable")].tolist()
+
+
+def ordenar_vagas(vagas: Sequence[Dict], perfil: Dict) -> List[Dict]:
+    """As vagas da mais para a menos aderente ao perfil (empates mantêm a ordem original)."""
+    if len(vagas) < 2:
+        return list(vagas)
+    matriz = MatrizVagas(vagas)
+    pontos = matriz.pontuar(
+        perfil.get("habilidades_chave") or [], perfil.get("cargo_ideal", ""), perfil.get("nivel_experiencia", "")
+    )
+    return [vagas[i] for i in matriz.ordenar(pontos)]
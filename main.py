@@ -1,7 +1,4 @@
 # Salve este código em: main.py
-from core.pdf_parser import extrair_texto_pdf
-from core.cv_analyzer import analisar_cv
-from core.job_scraper import buscar_vagas
 from profiles.profile_manager import inicializar_banco, salvar_perfil, carregar_perfil
 from telegram_bot.bot import run as run_bot
 
@@ -18,6 +15,11 @@ def rodar_teste_completo_com_memoria():
     Função de teste que executa o fluxo completo (IA + DB)
     usando um arquivo de CV fixo para facilitar os testes.
     """
+    # Importados só aqui: o bot carrega o PDF, a IA e o scraper no primeiro uso.
+    from core.pdf_parser import extrair_texto_pdf
+    from core.cv_analyzer import analisar_cv
+    from core.job_scraper import buscar_vagas
+
     inicializar_banco()
     print(f"--- Iniciando teste para o Usuário ID: {USER_ID_TESTE} ---")
 
@@ -1,12 +1,92 @@
 import sqlite3
 import json
 import re
-from typing import Dict, Optional
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from core import metricas
+from core.dedup import chave_impressao, hash_vaga, impressao_vaga, quase_duplicata
+from config import SQLITE_SYNCHRONOUS, SQLITE_CACHE_KB, SQLITE_THREADS
 
 DB_PATH = "bot_database.db"
 
+# Limite de parâmetros por consulta IN (...), abaixo do SQLITE_MAX_VARIABLE_NUMBER antigo (999).
+_MAX_PARAMETROS_LOTE = 900
+
+# Fração do histórico removida de uma vez a partir da qual a compactação faz um VACUUM completo.
+_FRACAO_VACUUM = 0.2
+
+# --- CAMADA DE CONEXÃO ---
+# Cada thread mantém uma conexão aberta (sqlite3 não compartilha conexões entre
+# threads). As instruções preparadas ficam no cache da própria conexão, então
+# deixam de ser recompiladas a cada chamada.
+
+_local = threading.local()
+_conexoes_abertas: List[sqlite3.Connection] = []
+_conexoes_lock = threading.Lock()
+
+# Executor dedicado para que os handlers assíncronos não bloqueiem o event loop.
+_executor_banco = ThreadPoolExecutor(max_workers=SQLITE_THREADS, thread_name_prefix="sqlite")
+
+
+def _conexao() -> sqlite3.Connection:
+    """Retorna a conexão persistente da thread atual, abrindo-a se necessário."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.caminho == DB_PATH:
+        return conn
+
+    conn = sqlite3.connect(DB_PATH, timeout=30, cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    # Precisa vir antes do WAL, que grava o cabeçalho de um banco novo. Em um banco
+    # existente só passa a valer depois de um VACUUM (ver inicializar_banco).
+    # Permite devolver ao sistema o espaço liberado pela compactação do histórico.
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS};")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB};")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+
+    _local.conn = conn
+    _local.caminho = DB_PATH
+    with _conexoes_lock:
+        _conexoes_abertas.append(conn)
+    return conn
+
+
+def fechar_conexoes():
+    """Fecha todas as conexões persistentes (ex.: no encerramento do bot ou em testes)."""
+    with _conexoes_lock:
+        for conn in _conexoes_abertas:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # Conexão criada em outra thread; o SQLite a libera com a thread.
+                pass
+        _conexoes_abertas.clear()
+    _local.__dict__.clear()
+
+
+def _executar_medindo(enfileirado: float, funcao: Callable[..., Any], *args, **kwargs) -> Any:
+    # Espera por uma thread livre: cresce quando as threads do banco estão ocupadas ou presas em locks.
+    metricas.observar("bot_sqlite_espera_segundos", time.perf_counter() - enfileirado, operacao=funcao.__name__)
+    with metricas.medir("bot_sqlite_segundos", operacao=funcao.__name__):
+        return funcao(*args, **kwargs)
+
+
+async def executar_no_banco(funcao: Callable[..., Any], *args, **kwargs) -> Any:
+    """Executa uma função deste módulo no executor do banco, sem bloquear o event loop."""
+    loop = asyncio.get_running_loop()
+    tarefa = partial(_executar_medindo, time.perf_counter(), funcao, *args, **kwargs)
+    return await loop.run_in_executor(_executor_banco, tarefa)
+
+
 def inicializar_banco():
-    with sqlite3.connect(DB_PATH) as conn:
+    conn = _conexao()
+    with conn:
         cursor = conn.cursor()
         
         # Tabela de Perfis
@@ -23,24 +103,114 @@ def inicializar_banco():
         cursor.execute("PRAGMA table_info(perfis);")
         existing_cols = {row[1] for row in cursor.fetchall()}
 
-        for col in ("nome", "sobrenome", "telefone"):
+        for col in ("nome", "sobrenome", "telefone", "localizacao", "nivel_experiencia"):
             if col not in existing_cols:
                 cursor.execute(f"ALTER TABLE perfis ADD COLUMN {col} TEXT DEFAULT ''")
+        if "alertas_ativos" not in existing_cols:
+            cursor.execute("ALTER TABLE perfis ADD COLUMN alertas_ativos INTEGER DEFAULT 0")
         conn.commit()
 
-        # Tabela de Histórico de Vagas (Para evitar duplicatas)
-        # Ajustei o UNIQUE para ser a combinação de user_id + link
+        # Histórico de envios (para evitar duplicatas): um hash de 64 bits da chave
+        # canônica da vaga por usuário (ver core/dedup.py). Sem rowid, a tabela é o
+        # próprio índice (user_id, hash), e cada linha ocupa poucas dezenas de bytes.
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS historico_envios (
+            user_id INTEGER NOT NULL,
+            hash INTEGER NOT NULL,
+            enviado_em INTEGER NOT NULL,
+            PRIMARY KEY (user_id, hash)
+        ) WITHOUT ROWID;
+        """)
+
+        # Índice de impressões das vagas enviadas (ver core/dedup.py): `faixa` guarda a
+        # parte exata da impressão (título + cidade), para a busca de quase duplicatas
+        # usar o índice.
         cursor.execute("""
-        CREATE TABLE IF NOT EXISTS historico_vagas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
+        CREATE TABLE IF NOT EXISTS impressoes_vagas (
             user_id INTEGER,
-            job_link TEXT,
-            data_envio DATETIME DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(user_id, job_link)
+            faixa INTEGER,
+            impressao INTEGER,
+            enviado_em INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, faixa, impressao)
+        ) WITHOUT ROWID;
+        """)
+        cursor.execute("PRAGMA table_info(impressoes_vagas);")
+        if "enviado_em" not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE impressoes_vagas ADD COLUMN enviado_em INTEGER NOT NULL DEFAULT 0")
+            cursor.execute("UPDATE impressoes_vagas SET enviado_em = CAST(strftime('%s', 'now') AS INTEGER)")
+
+        # Migração: o histórico antigo (historico_vagas, com a URL inteira, id e
+        # UNIQUE sobre o texto) vira hashes das chaves canônicas em historico_envios.
+        migrou_historico = False
+        versao = cursor.execute("PRAGMA user_version;").fetchone()[0]
+        if versao < 2:
+            antigo = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'historico_vagas';"
+            ).fetchone()
+            if antigo:
+                conn.create_function("hash_vaga", 1, hash_vaga, deterministic=True)
+                cursor.execute("""
+                    INSERT OR IGNORE INTO historico_envios (user_id, hash, enviado_em)
+                    SELECT user_id, hash_vaga(job_link),
+                           CAST(strftime('%s', COALESCE(data_envio, 'now')) AS INTEGER)
+                    FROM historico_vagas
+                    WHERE user_id IS NOT NULL AND job_link IS NOT NULL;
+                """)
+                cursor.execute("DROP TABLE historico_vagas;")
+                migrou_historico = True
+            cursor.execute("PRAGMA user_version = 2;")
+            versao = 2
+        if versao < 3:
+            # As impressões antigas (simhash de título + empresa + local, em quatro
+            # faixas) não se comparam com as atuais; o histórico de links continua valendo.
+            cursor.execute("DELETE FROM impressoes_vagas;")
+            cursor.execute("PRAGMA user_version = 3;")
+        conn.commit()
+
+        # Cache compartilhado de resultados de busca (ver core/cache_buscas.py)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cache_buscas (
+            chave TEXT PRIMARY KEY,
+            vagas TEXT,
+            criado_em REAL
         );
         """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_cache_buscas_criado_em ON cache_buscas (criado_em);")
         conn.commit()
 
+        # Cache de análises de CV, endereçado pelo hash do conteúdo (ver core/cv_analyzer.py)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cache_analises_cv (
+            hash TEXT,
+            versao TEXT,
+            resultado TEXT,
+            criado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (hash, versao)
+        ) WITHOUT ROWID;
+        """)
+        conn.commit()
+
+        # Estado do bot compartilhado entre processos (ver telegram_bot/persistencia.py)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS estado_conversas (
+            nome TEXT,
+            chave TEXT,
+            estado TEXT,
+            PRIMARY KEY (nome, chave)
+        ) WITHOUT ROWID;
+        """)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS dados_usuarios (
+            user_id INTEGER PRIMARY KEY,
+            dados TEXT
+        );
+        """)
+        conn.commit()
+
+    if migrou_historico:
+        # Reescreve o arquivo sem as páginas da tabela antiga (fora de transação)
+        conn.execute("VACUUM;")
+
 
 def _normalize_phone(telefone: str) -> str:
     if not telefone:
@@ -59,80 +229,335 @@ def _validar_telefone(telefone: str) -> bool:
     return 8 <= len(t_digits) <= 15
 
 def salvar_perfil(user_id: int, perfil: Dict):
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT cargo_ideal, habilidades_chave, nome, sobrenome, telefone FROM perfis WHERE user_id = ?;", (user_id,))
-        existente = cursor.fetchone()
-        
-        # Lógica de merge (manter dados antigos se os novos forem vazios)
-        cargo = perfil.get("cargo_ideal") if perfil.get("cargo_ideal") is not None else (existente["cargo_ideal"] if existente else "")
-        
-        if "habilidades_chave" in perfil:
-            habilidades = perfil.get("habilidades_chave") or []
-        else:
-            try:
-                habilidades = json.loads(existente["habilidades_chave"]) if existente and existente["habilidades_chave"] else []
-            except Exception:
-                habilidades = []
+    """
+    Cria ou atualiza o perfil em um único UPSERT.
+    Campos ausentes (ou vazios, no caso dos dados de contato) mantêm o valor salvo.
+    """
+    cargo = perfil.get("cargo_ideal")
+    habilidades = (
+        json.dumps(perfil.get("habilidades_chave") or [], ensure_ascii=False)
+        if "habilidades_chave" in perfil else None
+    )
+    telefone = _normalize_phone(perfil.get("telefone") or "")
 
-        nome = perfil.get("nome") or (existente["nome"] if existente else "")
-        sobrenome = perfil.get("sobrenome") or (existente["sobrenome"] if existente else "")
-        telefone_raw = perfil.get("telefone") or (existente["telefone"] if existente else "")
-        telefone = _normalize_phone(telefone_raw)
-
-        cursor.execute("""
-            INSERT OR REPLACE INTO perfis (user_id, cargo_ideal, habilidades_chave, nome, sobrenome, telefone)
-            VALUES (?, ?, ?, ?, ?, ?);
-        """, (user_id, cargo, json.dumps(habilidades, ensure_ascii=False), nome, sobrenome, telefone))
-        conn.commit()
+    conn = _conexao()
+    with conn:
+        conn.execute("""
+            INSERT INTO perfis (user_id, cargo_ideal, habilidades_chave, nome, sobrenome, telefone,
+                                localizacao, nivel_experiencia)
+            VALUES (:user_id, COALESCE(:cargo, ''), COALESCE(:habilidades, '[]'),
+                    COALESCE(:nome, ''), COALESCE(:sobrenome, ''), COALESCE(:telefone, ''),
+                    COALESCE(:localizacao, ''), COALESCE(:nivel, ''))
+            ON CONFLICT(user_id) DO UPDATE SET
+                cargo_ideal = COALESCE(:cargo, cargo_ideal),
+                habilidades_chave = COALESCE(:habilidades, habilidades_chave),
+                nome = COALESCE(:nome, nome),
+                sobrenome = COALESCE(:sobrenome, sobrenome),
+                telefone = COALESCE(:telefone, telefone),
+                localizacao = COALESCE(:localizacao, localizacao),
+                nivel_experiencia = COALESCE(:nivel, nivel_experiencia);
+        """, {
+            "user_id": user_id,
+            "cargo": cargo,
+            "habilidades": habilidades,
+            "nome": perfil.get("nome") or None,
+            "sobrenome": perfil.get("sobrenome") or None,
+            "telefone": telefone or None,
+            "localizacao": perfil.get("localizacao") or None,
+            "nivel": perfil.get("nivel_experiencia") or None,
+        })
 
 def carregar_perfil(user_id: int) -> Optional[Dict]:
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT cargo_ideal, habilidades_chave, nome, sobrenome, telefone FROM perfis WHERE user_id = ?;", (user_id,))
-        row = cursor.fetchone()
-        if row:
-            try:
-                habilidades = json.loads(row["habilidades_chave"]) if row["habilidades_chave"] else []
-            except Exception:
-                habilidades = []
-            return {
-                "cargo_ideal": row["cargo_ideal"],
-                "habilidades_chave": habilidades,
-                "nome": row["nome"],
-                "sobrenome": row["sobrenome"],
-                "telefone": row["telefone"],
-            }
+    cursor = _conexao().execute(
+        "SELECT cargo_ideal, habilidades_chave, nome, sobrenome, telefone, localizacao, alertas_ativos, "
+        "nivel_experiencia FROM perfis WHERE user_id = ?;",
+        (user_id,)
+    )
+    row = cursor.fetchone()
+    if row:
+        try:
+            habilidades = json.loads(row["habilidades_chave"]) if row["habilidades_chave"] else []
+        except Exception:
+            habilidades = []
+        return {
+            "cargo_ideal": row["cargo_ideal"],
+            "habilidades_chave": habilidades,
+            "nome": row["nome"],
+            "sobrenome": row["sobrenome"],
+            "telefone": row["telefone"],
+            "localizacao": row["localizacao"] or "",
+            "alertas_ativos": bool(row["alertas_ativos"]),
+            "nivel_experiencia": row["nivel_experiencia"] or "",
+        }
     return None
 
 # --- NOVAS FUNÇÕES PARA CONTROLE DE VAGAS ---
+# O histórico guarda o hash da chave canônica da vaga (ver core/dedup.py), e não
+# a URL crua do card, que muda a cada busca por causa dos parâmetros de rastreamento.
+# As impressões de título/empresa/local pegam a mesma vaga republicada com outra URL.
 
-def vaga_ja_enviada(user_id: int, link: str) -> bool:
-    """Retorna True se o link já foi enviado para este usuário."""
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id FROM historico_vagas WHERE user_id = ? AND job_link = ?", 
-            (user_id, link)
+def filtrar_vagas_ineditas_usuarios(
+    user_ids: List[int],
+    vagas: List[Dict],
+    ja_escolhidas: Sequence[Dict] = (),
+    limite: Optional[int] = None,
+) -> Dict[int, List[Dict]]:
+    """
+    Para cada usuário, as vagas (na ordem original) que ele ainda não recebeu,
+    nem pela chave canônica do link nem por uma impressão próxima.
+
+    O histórico e o índice de impressões são consultados juntos (UNION ALL),
+    em uma consulta por lote. Quase duplicatas dentro do próprio lote e em
+    relação a `ja_escolhidas` (vagas já separadas nesta busca) também saem.
+    `limite` corta a lista de cada usuário.
+    """
+    if not user_ids:
+        return {}
+
+    # Primeiro o que vale para todos: duplicatas dentro do próprio lote.
+    hashes_lote = {hash_vaga(vaga['link']) for vaga in ja_escolhidas}
+    impressoes_lote = [impressao_vaga(vaga) for vaga in ja_escolhidas]
+    candidatas: List[Tuple[Dict, int, int]] = []
+    for vaga in vagas:
+        hash_link, impressao = hash_vaga(vaga['link']), impressao_vaga(vaga)
+        if hash_link in hashes_lote or quase_duplicata(impressao, impressoes_lote):
+            continue
+        hashes_lote.add(hash_link)
+        impressoes_lote.append(impressao)
+        candidatas.append((vaga, hash_link, impressao))
+
+    hashes_vistos: Dict[int, set] = {user_id: set() for user_id in user_ids}
+    impressoes_vistas: Dict[int, set] = {user_id: set() for user_id in user_ids}
+    conn = _conexao()
+    # Cada candidata usa 1 parâmetro (hash) + 1 (chave da impressão).
+    por_lote_vagas = _MAX_PARAMETROS_LOTE // 3
+    for i in range(0, len(candidatas), por_lote_vagas):
+        lote_vagas = candidatas[i:i + por_lote_vagas]
+        hashes = [hash_link for _, hash_link, _ in lote_vagas]
+        faixas = list(dict.fromkeys(chave_impressao(impressao) for _, _, impressao in lote_vagas))
+        marcadores_hashes = ", ".join("?" * len(hashes))
+        marcadores_faixas = ", ".join("?" * len(faixas))
+        por_lote_usuarios = max(1, (_MAX_PARAMETROS_LOTE - len(hashes) - len(faixas)) // 2)
+        for j in range(0, len(user_ids), por_lote_usuarios):
+            lote_usuarios = user_ids[j:j + por_lote_usuarios]
+            marcadores_usuarios = ", ".join("?" * len(lote_usuarios))
+            cursor = conn.execute(
+                f"""SELECT user_id, hash, NULL FROM historico_envios
+                    WHERE user_id IN ({marcadores_usuarios}) AND hash IN ({marcadores_hashes})
+                    UNION ALL
+                    SELECT user_id, NULL, impressao FROM impressoes_vagas
+                    WHERE user_id IN ({marcadores_usuarios}) AND faixa IN ({marcadores_faixas})""",
+                (*lote_usuarios, *hashes, *lote_usuarios, *faixas)
+            )
+            for user_id, hash_link, impressao in cursor.fetchall():
+                if hash_link is not None:
+                    hashes_vistos[user_id].add(hash_link)
+                else:
+                    impressoes_vistas[user_id].add(impressao)
+
+    resultado: Dict[int, List[Dict]] = {}
+    for user_id in user_ids:
+        ineditas = []
+        for vaga, hash_link, impressao in candidatas:
+            if limite is not None and len(ineditas) >= limite:
+                break
+            if hash_link in hashes_vistos[user_id] or quase_duplicata(impressao, impressoes_vistas[user_id]):
+                continue
+            ineditas.append(vaga)
+        resultado[user_id] = ineditas
+    return resultado
+
+def filtrar_vagas_ineditas(
+    user_id: int,
+    vagas: List[Dict],
+    ja_escolhidas: Sequence[Dict] = (),
+    limite: Optional[int] = None,
+) -> List[Dict]:
+    """`filtrar_vagas_ineditas_usuarios` para um único usuário."""
+    return filtrar_vagas_ineditas_usuarios([user_id], vagas, ja_escolhidas, limite)[user_id]
+
+def registrar_vagas_enviadas_usuarios(envios: Dict[int, List[Dict]]):
+    """Registra hashes e impressões das vagas enviadas a cada usuário, em uma transação."""
+    agora = int(time.time())
+    historico = []
+    impressoes = []
+    for user_id, vagas in envios.items():
+        for vaga in vagas:
+            historico.append((user_id, hash_vaga(vaga['link']), agora))
+            impressao = impressao_vaga(vaga)
+            impressoes.append((user_id, chave_impressao(impressao), impressao, agora))
+    if not historico:
+        return
+    try:
+        with _conexao() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO historico_envios (user_id, hash, enviado_em) VALUES (?, ?, ?)",
+                historico
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO impressoes_vagas (user_id, faixa, impressao, enviado_em) VALUES (?, ?, ?, ?)",
+                impressoes
+            )
+    except Exception as e:
+        print(f"Erro ao registrar vagas: {e}")
+
+def registrar_vagas_enviadas(user_id: int, vagas: List[Dict]):
+    registrar_vagas_enviadas_usuarios({user_id: vagas})
+
+def compactar_historico(retencao_dias: float) -> int:
+    """
+    Remove do histórico e do índice de impressões os envios com mais de
+    `retencao_dias` dias (a vaga volta a poder ser enviada) e devolve ao
+    sistema as páginas liberadas. Retorna quantos envios saíram do histórico.
+    """
+    if retencao_dias <= 0:
+        return 0
+    limite = int(time.time() - retencao_dias * 24 * 60 * 60)
+    conn = _conexao()
+    with conn:
+        # Sem índice por data: a varredura roda uma vez por dia e um índice
+        # dobraria o tamanho da tabela.
+        removidos = conn.execute("DELETE FROM historico_envios WHERE enviado_em < ?", (limite,)).rowcount
+        conn.execute("DELETE FROM impressoes_vagas WHERE enviado_em < ?", (limite,))
+        restantes = conn.execute("SELECT COUNT(*) FROM historico_envios").fetchone()[0]
+    if removidos > _FRACAO_VACUUM * (removidos + restantes):
+        # Remoções espalhadas pela tabela deixam páginas meio vazias, que só um
+        # VACUUM completo junta (caso de quando a retenção é ligada ou reduzida).
+        conn.execute("VACUUM;")
+    else:
+        # No dia a dia, os novos envios reaproveitam o espaço das páginas. Cada passo
+        # do incremental_vacuum libera uma página; executescript vai até o fim.
+        conn.executescript("PRAGMA incremental_vacuum;")
+    conn.execute("PRAGMA optimize;")
+    return removidos
+
+# --- ALERTAS ---
+
+def definir_alertas(user_id: int, ativo: bool) -> bool:
+    """Liga/desliga os alertas periódicos do usuário. Retorna False se não houver perfil."""
+    with _conexao() as conn:
+        cursor = conn.execute(
+            "UPDATE perfis SET alertas_ativos = ? WHERE user_id = ?",
+            (1 if ativo else 0, user_id)
         )
-        return cursor.fetchone() is not None
+        return cursor.rowcount > 0
 
-def registrar_envio(user_id: int, link: str):
-    """Registra o envio da vaga para não enviar novamente."""
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
+def listar_inscritos_alertas() -> List[Tuple[int, str, str, List[str], str]]:
+    """
+    (user_id, cargo_ideal, localizacao, habilidades_chave, nivel_experiencia)
+    de quem tem alertas ativos e busca completa.
+    """
+    cursor = _conexao().execute(
+        "SELECT user_id, cargo_ideal, localizacao, habilidades_chave, nivel_experiencia FROM perfis "
+        "WHERE alertas_ativos = 1 AND cargo_ideal != '' AND localizacao != '';"
+    )
+    inscritos = []
+    for row in cursor.fetchall():
         try:
-            # INSERT OR IGNORE evita erro se tentar inserir duplicado
-            cursor.execute(
-                "INSERT OR IGNORE INTO historico_vagas (user_id, job_link) VALUES (?, ?)", 
-                (user_id, link)
+            habilidades = json.loads(row["habilidades_chave"]) if row["habilidades_chave"] else []
+        except Exception:
+            habilidades = []
+        inscritos.append((row["user_id"], row["cargo_ideal"], row["localizacao"], habilidades, row["nivel_experiencia"] or ""))
+    return inscritos
+
+# --- CACHE DE BUSCAS ---
+
+def ler_cache_busca(chave: str, criado_apos: float) -> Optional[Tuple[List[Dict], float]]:
+    """Retorna (vagas, criado_em) da entrada do cache se ela for mais nova que `criado_apos`."""
+    cursor = _conexao().execute(
+        "SELECT vagas, criado_em FROM cache_buscas WHERE chave = ? AND criado_em > ?",
+        (chave, criado_apos)
+    )
+    row = cursor.fetchone()
+    if not row:
+        return None
+    try:
+        return json.loads(row[0]), row[1]
+    except Exception:
+        return None
+
+def gravar_cache_busca(chave: str, vagas: List[Dict], criado_em: float):
+    """Grava (ou substitui) uma entrada do cache de buscas."""
+    with _conexao() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_buscas (chave, vagas, criado_em) VALUES (?, ?, ?)",
+            (chave, json.dumps(vagas, ensure_ascii=False), criado_em)
+        )
+
+def remover_cache_buscas_expirado(criado_ate: float) -> int:
+    """Remove as entradas do cache criadas até `criado_ate`. Retorna quantas foram removidas."""
+    with _conexao() as conn:
+        cursor = conn.execute("DELETE FROM cache_buscas WHERE criado_em <= ?", (criado_ate,))
+        return cursor.rowcount
+
+# --- CACHE DE ANÁLISES DE CV ---
+
+def ler_analise_cv(hashes: List[str], versao: str) -> Optional[Dict]:
+    """Retorna a análise guardada para qualquer um dos hashes na versão informada."""
+    hashes = [h for h in hashes if h]
+    if not hashes:
+        return None
+    marcadores = ", ".join("?" * len(hashes))
+    cursor = _conexao().execute(
+        f"SELECT resultado FROM cache_analises_cv WHERE versao = ? AND hash IN ({marcadores}) LIMIT 1",
+        (versao, *hashes)
+    )
+    row = cursor.fetchone()
+    if not row:
+        return None
+    try:
+        return json.loads(row[0])
+    except Exception:
+        return None
+
+def gravar_analise_cv(hashes: List[str], versao: str, resultado: Dict):
+    """Guarda a análise sob cada um dos hashes (texto extraído e, se houver, bytes do PDF)."""
+    conteudo = json.dumps(resultado, ensure_ascii=False)
+    with _conexao() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO cache_analises_cv (hash, versao, resultado) VALUES (?, ?, ?)",
+            [(h, versao, conteudo) for h in hashes if h]
+        )
+
+# --- ESTADO DO BOT (CONVERSAS E user_data) ---
+# Chaves e valores em JSON: as chaves das conversas são tuplas (chat_id, user_id).
+
+def carregar_estados_conversa(nome: str) -> Dict[Tuple, Any]:
+    """Estados salvos do ConversationHandler `nome`, por chave."""
+    cursor = _conexao().execute("SELECT chave, estado FROM estado_conversas WHERE nome = ?", (nome,))
+    return {tuple(json.loads(chave)): json.loads(estado) for chave, estado in cursor.fetchall()}
+
+def gravar_estado_conversa(nome: str, chave: Tuple, estado: Any):
+    """Grava o estado da conversa; `None` (conversa encerrada) apaga o registro."""
+    with _conexao() as conn:
+        if estado is None:
+            conn.execute("DELETE FROM estado_conversas WHERE nome = ? AND chave = ?", (nome, json.dumps(list(chave))))
+        else:
+            conn.execute(
+                "INSERT OR REPLACE INTO estado_conversas (nome, chave, estado) VALUES (?, ?, ?)",
+                (nome, json.dumps(list(chave)), json.dumps(estado))
             )
-            conn.commit()
-        except Exception as e:
-            print(f"Erro ao registrar vaga: {e}")
+
+def carregar_dados_usuario(user_id: int) -> Dict:
+    """`user_data` do usuário (vazio se não houver)."""
+    row = _conexao().execute("SELECT dados FROM dados_usuarios WHERE user_id = ?", (user_id,)).fetchone()
+    if not row:
+        return {}
+    try:
+        return json.loads(row[0])
+    except Exception:
+        return {}
+
+def gravar_dados_usuario(user_id: int, dados: Dict):
+    with _conexao() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO dados_usuarios (user_id, dados) VALUES (?, ?)",
+            (user_id, json.dumps(dados, ensure_ascii=False, default=str))
+        )
+
+def remover_dados_usuario(user_id: int):
+    with _conexao() as conn:
+        conn.execute("DELETE FROM dados_usuarios WHERE user_id = ?", (user_id,))
 
 # --- FUNÇÕES DE CONSOLE (MANTIDAS) ---
 
@@ -156,7 +581,5 @@ def cadastrar_via_chat_console(user_id: int):
     return True
 
 def listar_perfis():
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT user_id, cargo_ideal, nome, sobrenome, telefone FROM perfis;")
-        return cursor.fetchall()
\ No newline at end of file
+    cursor = _conexao().execute("SELECT user_id, cargo_ideal, nome, sobrenome, telefone FROM perfis;")
+    return [tuple(row) for row in cursor.fetchall()]
@@ -0,0 +1,206 @@
+"""
+Concorrência do bot: processamento dos updates e fila das tarefas pesadas.
+
+- `ProcessadorPorUsuario`: os updates de usuários diferentes são tratados em
+  paralelo, e os de um mesmo usuário, em ordem (o ConversationHandler depende
+  disso), o que também limita cada usuário a uma tarefa pesada por vez. Cada
+  usuário tem poucos updates aguardando de cada vez; o excesso é descartado.
+  Um update só ocupa uma das vagas do processador quando chega a vez dele.
+- `tarefa_pesada`: análises de CV e buscas de vagas passam por filas próprias,
+  cada uma com seu limite de execuções simultâneas. Quem espera é atendido por
+  ordem de chegada e fica sabendo a sua posição; com a fila cheia, o pedido é
+  recusado (`FilaCheia`). O update devolve a sua vaga do processador ao entrar
+  na fila, para que as tarefas pesadas (limitadas pelas filas) não travem o
+  /start e os demais passos leves dos outros usuários.
+"""
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional
+
+from telegram.ext import BaseUpdateProcessor
+
+from config import AGENDADOR_MAX_CV, AGENDADOR_MAX_BUSCAS, AGENDADOR_MAX_FILA
+from core import metricas
+
+
+class TarefaRecusada(Exception):
+    """A tarefa pesada não foi aceita agora; o usuário deve tentar de novo depois."""
+
+
+class FilaCheia(TarefaRecusada):
+    """A fila do tipo de tarefa atingiu o limite de pedidos aguardando."""
+
+
+class Fila:
+    """Limite de execuções simultâneas com espera por ordem de chegada e tamanho máximo."""
+
+    def __init__(self, nome: str, limite: int, max_aguardando: int):
+        self.nome = nome
+        self.limite = limite
+        self.max_aguardando = max_aguardando
+        self.ativas = 0
+        self._aguardando: Deque[asyncio.Future] = deque()
+
+    @property
+    def aguardando(self) -> int:
+        return len(self._aguardando)
+
+    async def entrar(self, avisar: Optional[Callable[[int], Awaitable[Any]]] = None):
+        """Ocupa uma vaga, esperando a vez se necessário. `avisar(posicao)` é chamado ao entrar na fila."""
+        if self.ativas < self.limite and not self._aguardando:
+            self.ativas += 1
+            return
+        if len(self._aguardando) >= self.max_aguardando:
+            raise FilaCheia(self.nome)
+
+        vez = asyncio.get_running_loop().create_future()
+        self._aguardando.append(vez)
+        try:
+            if avisar:
+                try:
+                    await avisar(len(self._aguardando))
+                except Exception as e:
+                    print(f"Erro ao avisar a posição na fila de {self.nome}: {e}")
+            await vez
+        except BaseException:
+            if vez.done() and not vez.cancelled():
+                # A vaga chegou junto com o cancelamento: passa adiante
+                self.sair()
+            elif vez in self._aguardando:
+                self._aguardando.remove(vez)
+            raise
+
+    def sair(self):
+        """Libera a vaga, entregando-a diretamente ao próximo da fila."""
+        while self._aguardando:
+            vez = self._aguardando.popleft()
+            if not vez.done():
+                vez.set_result(None)
+                return
+        self.ativas -= 1
+
+
+FILAS: Dict[str, Fila] = {
+    "cv": Fila("cv", AGENDADOR_MAX_CV, AGENDADOR_MAX_FILA),
+    "busca": Fila("busca", AGENDADOR_MAX_BUSCAS, AGENDADOR_MAX_FILA),
+}
+
+
+class _VagaUpdate:
+    """Vaga do processador ocupada pelo update em andamento, que pode ser devolvida antes do fim."""
+    __slots__ = ("_semaforo", "ocupada")
+
+    def __init__(self, semaforo: asyncio.BoundedSemaphore):
+        self._semaforo = semaforo
+        self.ocupada = False
+
+    async def ocupar(self):
+        await self._semaforo.acquire()
+        self.ocupada = True
+
+    def liberar(self):
+        if self.ocupada:
+            self.ocupada = False
+            self._semaforo.release()
+
+
+# Vaga do update sendo processado nesta task (definida pelo ProcessadorPorUsuario).
+_vaga_update: ContextVar[Optional[_VagaUpdate]] = ContextVar("vaga_update", default=None)
+
+
+@asynccontextmanager
+async def tarefa_pesada(
+    tipo: str,
+    user_id: int,
+    avisar: Optional[Callable[[int], Awaitable[Any]]] = None,
+) -> AsyncIterator[None]:
+    """
+    Executa o bloco ocupando uma vaga da fila `tipo` ("cv" ou "busca").
+    Levanta `FilaCheia` (antes de executar o bloco) se o pedido não puder ser aceito.
+    Daqui até o fim do update, ele não ocupa mais vaga do processador de updates.
+    """
+    fila = FILAS[tipo]
+    try:
+        with metricas.medir("bot_agendador_espera_segundos", tipo=tipo):
+            if fila.ativas >= fila.limite or fila.aguardando:
+                vaga = _vaga_update.get()
+                if vaga is not None:
+                    vaga.liberar()
+            await fila.entrar(avisar)
+    except FilaCheia:
+        metricas.incrementar("bot_agendador_recusas_total", tipo=tipo, motivo="fila_cheia")
+        raise
+    try:
+        yield
+    finally:
+        fila.sair()
+
+
+class _PendentesUsuario:
+    __slots__ = ("lock", "quantidade")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.quantidade = 0
+
+
+class ProcessadorPorUsuario(BaseUpdateProcessor):
+    """
+    Processa até `max_concurrent_updates` updates ao mesmo tempo, mantendo a
+    ordem entre os updates de um mesmo usuário. Acima de `max_pendentes_usuario`
+    updates do mesmo usuário na fila, os novos são descartados.
+
+    `process_update` é substituído para que a vez do usuário venha antes da
+    vaga do processador: updates esperando o anterior do mesmo usuário, ou uma
+    fila de `tarefa_pesada`, não ocupam vaga.
+    """
+
+    def __init__(self, max_concurrent_updates: int, max_pendentes_usuario: int = 3):
+        super().__init__(max_concurrent_updates)
+        self.max_pendentes_usuario = max_pendentes_usuario
+        self._usuarios: Dict[int, _PendentesUsuario] = {}
+
+    async def process_update(self, update: object, coroutine: Awaitable[Any]):
+        usuario = getattr(update, "effective_user", None)
+        if usuario is None:
+            await self.do_process_update(update, coroutine)
+            return
+
+        pendentes = self._usuarios.get(usuario.id)
+        if pendentes is None:
+            pendentes = self._usuarios[usuario.id] = _PendentesUsuario()
+        if pendentes.quantidade >= self.max_pendentes_usuario:
+            coroutine.close()
+            metricas.incrementar("bot_updates_descartados_total")
+            return
+
+        pendentes.quantidade += 1
+        try:
+            async with pendentes.lock:
+                await self.do_process_update(update, coroutine)
+        finally:
+            pendentes.quantidade -= 1
+            if not pendentes.quantidade:
+                del self._usuarios[usuario.id]
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]):
+        vaga = _VagaUpdate(self._semaphore)
+        try:
+            await vaga.ocupar()
+        except BaseException:
+            coroutine.close()
+            raise
+        token = _vaga_update.set(vaga)
+        try:
+            await coroutine
+        finally:
+            _vaga_update.reset(token)
+            vaga.liberar()
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
@@ -0,0 +1,155 @@
+"""
+Alertas periódicos de vagas.
+
+A cada rodada, os perfis inscritos são agrupados pela busca normalizada
+(cargo, localização). Cada grupo gera uma única raspagem e o resultado é
+repartido entre os membros, filtrando por usuário o que já foi enviado
+(historico_envios). Assim, o custo de uma rodada cresce com o número de
+buscas distintas, e não com o número de inscritos.
+"""
+import asyncio
+import html
+import logging
+from contextlib import aclosing
+from typing import Dict, List, Tuple
+
+from telegram.error import Forbidden
+from telegram.ext import ContextTypes
+
+from config import ALERTAS_MAX_PAGINAS, ALERTAS_CONCORRENCIA
+from core import metricas
+from core.cache_buscas import normalizar_termo
+from core.localizacao import separar_localizacoes
+from profiles.profile_manager import (
+    definir_alertas,
+    executar_no_banco,
+    filtrar_vagas_ineditas_usuarios,
+    listar_inscritos_alertas,
+    registrar_vagas_enviadas_usuarios
+)
+from .handlers import LIMITE_VAGAS_NOVAS, formatar_vaga, juntar_vagas
+from . import envio
+
+# (user_id, cargo_ideal, localizacao, habilidades_chave, nivel_experiencia)
+Inscrito = Tuple[int, str, str, List[str], str]
+
+
+def agrupar_inscritos(inscritos: List[Inscrito]) -> Dict[Tuple[str, str], List[Inscrito]]:
+    """Agrupa os inscritos pela busca normalizada (cargo, localizações canônicas)."""
+    grupos: Dict[Tuple[str, str], List[Inscrito]] = {}
+    for inscrito in inscritos:
+        _, cargo, localizacao, _, _ = inscrito
+        # Perfis antigos guardam o texto digitado ("rj"); a forma canônica junta "rj" e "RJ - Brasil".
+        localizacoes = ", ".join(separar_localizacoes(localizacao))
+        grupos.setdefault((normalizar_termo(cargo), normalizar_termo(localizacoes)), []).append(inscrito)
+    return grupos
+
+
+async def _coletar_vagas(cargo: str, localizacao: str) -> List[Dict]:
+    """Raspa até ALERTAS_MAX_PAGINAS páginas da busca (de cada localização), sem links repetidos."""
+    from core.job_scraper import iterar_vagas
+
+    vagas: List[Dict] = []
+    vistos = set()
+    localizacoes = separar_localizacoes(localizacao)
+    async with aclosing(iterar_vagas(cargo, localizacoes, max_paginas=ALERTAS_MAX_PAGINAS)) as encontradas:
+        async for vaga in encontradas:
+            if vaga['link'] not in vistos:
+                vistos.add(vaga['link'])
+                vagas.append(vaga)
+    return vagas
+
+
+async def _enviar_alerta(bot, user_id: int, cargo: str, localizacao: str, vagas: List[Dict]) -> bool:
+    """Envia as vagas ao usuário. Retorna True se a mensagem foi entregue."""
+    texto = (
+        f"🔔 Vagas <b>NOVAS</b> de <b>{html.escape(cargo)}</b> em <b>{html.escape(localizacao)}</b>:\n\n"
+        f"{juntar_vagas([formatar_vaga(vaga) for vaga in vagas])}\n\n"
+        "Para parar de receber alertas, digite /parar_alertas."
+    )
+    try:
+        # Pela fila de envio: a rodada pode entregar a muitos chats de uma vez
+        await envio.enviar_mensagem(
+            bot, user_id, texto, agrupar="\n\n", parse_mode='HTML', disable_web_page_preview=True
+        )
+        return True
+    except Forbidden:
+        # O usuário bloqueou o bot: não adianta continuar tentando nas próximas rodadas
+        await executar_no_banco(definir_alertas, user_id, False)
+        metricas.incrementar("bot_alertas_descadastrados_total")
+    except Exception as e:
+        print(f"Erro ao enviar alerta para {user_id}: {e}")
+        metricas.incrementar("bot_alertas_erros_total", etapa="envio")
+    return False
+
+
+async def processar_grupo(bot, membros: List[Inscrito]) -> int:
+    """
+    Raspa uma vez a busca do grupo e entrega a cada membro as vagas novas mais
+    aderentes ao seu perfil. Retorna quantos receberam.
+    """
+    _, cargo, localizacao, _, _ = membros[0]
+    vagas = await _coletar_vagas(cargo, localizacao)
+    if not vagas:
+        return 0
+
+    novas_por_usuario = await executar_no_banco(
+        filtrar_vagas_ineditas_usuarios, [membro[0] for membro in membros], vagas
+    )
+
+    # A matriz TF-IDF do lote é montada uma vez e pontuada contra cada perfil
+    # (o ranking, com o NumPy, é importado só na primeira rodada de alertas)
+    from core.ranking import MatrizVagas
+
+    matriz = MatrizVagas(vagas)
+    posicao = {id(vaga): indice for indice, vaga in enumerate(vagas)}
+
+    escolhidas_por_usuario: Dict[int, List[Dict]] = {}
+    envios = []
+    for user_id, cargo_membro, localizacao_membro, habilidades, nivel in membros:
+        novas = novas_por_usuario.get(user_id)
+        if not novas:
+            continue
+        pontos = matriz.pontuar(habilidades, cargo_membro, nivel)
+        melhores = matriz.ordenar(pontos, [posicao[id(vaga)] for vaga in novas])[:LIMITE_VAGAS_NOVAS]
+        escolhidas_por_usuario[user_id] = [vagas[indice] for indice in melhores]
+        envios.append(_enviar_alerta(bot, user_id, cargo_membro, localizacao_membro, escolhidas_por_usuario[user_id]))
+
+    # Os envios do grupo entram juntos na fila de envio, que dita o ritmo
+    entregas = await asyncio.gather(*envios)
+    entregues = {
+        user_id: escolhidas
+        for (user_id, escolhidas), entregue in zip(escolhidas_por_usuario.items(), entregas) if entregue
+    }
+
+    # Só o que foi realmente entregue entra no histórico, em uma única transação
+    await executar_no_banco(registrar_vagas_enviadas_usuarios, entregues)
+    return len(entregues)
+
+
+async def executar_alertas(context: ContextTypes.DEFAULT_TYPE):
+    """Rodada de alertas agendada na job queue do Application."""
+    inscritos = await executar_no_banco(listar_inscritos_alertas)
+    if not inscritos:
+        return
+    grupos = agrupar_inscritos(inscritos)
+    limite = asyncio.Semaphore(ALERTAS_CONCORRENCIA)
+
+    async def _grupo(membros: List[Inscrito]) -> int:
+        async with limite:
+            try:
+                return await processar_grupo(context.bot, membros)
+            except Exception as e:
+                print(f"Erro ao processar alerta de '{membros[0][1]}' em '{membros[0][2]}': {e}")
+                metricas.incrementar("bot_alertas_erros_total", etapa="grupo")
+                return 0
+
+    with metricas.medir("bot_alertas_rodada_segundos"):
+        entregues = await asyncio.gather(*(_grupo(membros) for membros in grupos.values()))
+
+    metricas.incrementar("bot_alertas_grupos_total", len(grupos))
+    metricas.incrementar("bot_alertas_entregues_total", sum(entregues))
+    logging.info(
+        f"Alertas: {len(inscritos)} inscritos em {len(grupos)} buscas distintas; "
+        f"{sum(entregues)} receberam vagas novas."
+    )
@@ -1,4 +1,7 @@
+import asyncio
+import sys
 from telegram.ext import (
+    Application,
     ApplicationBuilder, 
     CommandHandler, 
     MessageHandler, 
@@ -6,16 +9,73 @@ from telegram.ext import (
     ConversationHandler,
     CallbackQueryHandler
 )
-from config import TELEGRAM_BOT_TOKEN
-from . import handlers
+from config import (
+    TELEGRAM_BOT_TOKEN, METRICAS_PORTA, METRICAS_ENDERECO,
+    METRICAS_DESPEJO_INTERVALO, METRICAS_DESPEJO_ARQUIVO,
+    ALERTAS_INTERVALO, ALERTAS_PRIMEIRA_EXECUCAO,
+    HISTORICO_RETENCAO_DIAS, HISTORICO_COMPACTACAO_INTERVALO,
+    BOT_UPDATES_CONCORRENTES, BOT_UPDATES_PENDENTES_USUARIO,
+    PERSISTENCIA_INTERVALO, TELEGRAM_API_URL, WEBHOOK_URL, BOT_PREAQUECER
+)
+from core import metricas
+from core.preaquecimento import preaquecer
+from core.cv_analyzer import fechar_cliente as fechar_cliente_gemini
+from core.pdf_parser import encerrar_pool
+from profiles.profile_manager import compactar_historico, executar_no_banco, fechar_conexoes
+from . import agendador, alertas, handlers
+from .persistencia import PersistenciaSQLite
+
+# Atraso (em segundos) da primeira compactação do histórico, para não disputar
+# o banco com a primeira rodada de alertas.
+ATRASO_COMPACTACAO = 15 * 60
+
+# Atraso (em segundos) do pré-aquecimento, para que ele comece depois que o bot já recebe updates.
+ATRASO_PREAQUECIMENTO = 1
 
-def run():
-    """Inicia o bot do Telegram e configura o ConversationHandler."""
-    if not TELEGRAM_BOT_TOKEN:
-        print("Erro: TELEGRAM_BOT_TOKEN não está definido. Verifique!")
-        return
-        
-    application = ApplicationBuilder().token(TELEGRAM_BOT_TOKEN).build()
+
+async def _ao_encerrar(application):
+    """Libera recursos compartilhados quando o bot é encerrado."""
+    # O scraper só é importado na primeira busca; sem ela, não há cliente HTTP a fechar.
+    job_scraper = sys.modules.get("core.job_scraper")
+    if job_scraper is not None:
+        await job_scraper.fechar_cliente()
+    await fechar_cliente_gemini()
+    encerrar_pool()
+    fechar_conexoes()
+
+async def _compactar_historico(context):
+    """Remove do histórico os envios mais antigos que a retenção configurada."""
+    removidos = await executar_no_banco(compactar_historico, HISTORICO_RETENCAO_DIAS)
+    metricas.incrementar("bot_historico_removidos_total", removidos)
+    if removidos:
+        print(f"Histórico compactado: {removidos} envios com mais de {HISTORICO_RETENCAO_DIAS:g} dias removidos.")
+
+async def _preaquecer(context):
+    """Carrega em uma thread as dependências que os módulos só importam no primeiro uso."""
+    tempos = await asyncio.to_thread(preaquecer)
+    print("Pré-aquecimento concluído: " + ", ".join(f"{etapa} {s * 1000:.0f} ms" for etapa, s in tempos.items()))
+
+def construir_aplicacao(com_updater: bool = True, tarefas_periodicas: bool = True) -> Application:
+    """
+    Monta o Application com os handlers, o estado persistido no SQLite e, se
+    `tarefas_periodicas`, os alertas e a compactação do histórico na job queue.
+    Sem `com_updater`, os updates são entregues por quem chama (modo webhook).
+    """
+    # Updates de usuários diferentes em paralelo; os de um mesmo usuário em ordem,
+    # como o ConversationHandler espera (ver telegram_bot/agendador.py).
+    processador = agendador.ProcessadorPorUsuario(BOT_UPDATES_CONCORRENTES, BOT_UPDATES_PENDENTES_USUARIO)
+    construtor = (
+        ApplicationBuilder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(processador)
+        .persistence(PersistenciaSQLite(PERSISTENCIA_INTERVALO))
+        .post_shutdown(_ao_encerrar)
+    )
+    if TELEGRAM_API_URL:
+        construtor = construtor.base_url(f"{TELEGRAM_API_URL}/bot").base_file_url(f"{TELEGRAM_API_URL}/file/bot")
+    if not com_updater:
+        construtor = construtor.updater(None)
+    application = construtor.build()
 
     # --- Configuração do ConversationHandler ---
     conv_handler = ConversationHandler(
@@ -37,7 +97,10 @@ def run():
         },
         fallbacks=[
             CommandHandler("cancelar", handlers.cancelar)
-        ]
+        ],
+        # O estado da conversa fica no banco e sobrevive a reinícios (ver telegram_bot/persistencia.py)
+        name="conversa_principal",
+        persistent=True
     )
 
     application.add_handler(conv_handler)
@@ -45,5 +108,56 @@ def run():
     # Adiciona um handler para o comando /start fora da conversa, para o caso do usuário se perder.
     application.add_handler(CommandHandler("start", handlers.start))
 
+    # --- Alertas periódicos ---
+    application.add_handler(CommandHandler("alertas", handlers.ativar_alertas))
+    application.add_handler(CommandHandler("parar_alertas", handlers.desativar_alertas))
+
+    # --- Tarefas em segundo plano (pré-aquecimento, alertas e compactação do histórico) ---
+    alertar = tarefas_periodicas and ALERTAS_INTERVALO
+    compactar = tarefas_periodicas and HISTORICO_RETENCAO_DIAS and HISTORICO_COMPACTACAO_INTERVALO
+    if application.job_queue is None:
+        if alertar or compactar:
+            print("Aviso: job queue indisponível (instale python-telegram-bot[job-queue]); "
+                  "alertas e compactação do histórico desativados.")
+    else:
+        if BOT_PREAQUECER:
+            application.job_queue.run_once(_preaquecer, when=ATRASO_PREAQUECIMENTO, name="preaquecimento")
+        if alertar:
+            application.job_queue.run_repeating(
+                alertas.executar_alertas,
+                interval=ALERTAS_INTERVALO,
+                first=ALERTAS_PRIMEIRA_EXECUCAO,
+                name="alertas_vagas",
+                job_kwargs={"max_instances": 1, "coalesce": True}
+            )
+        if compactar:
+            application.job_queue.run_repeating(
+                _compactar_historico,
+                interval=HISTORICO_COMPACTACAO_INTERVALO,
+                first=ATRASO_COMPACTACAO,
+                name="compactar_historico",
+                job_kwargs={"max_instances": 1, "coalesce": True}
+            )
+
+    return application
+
+def run():
+    """Inicia o bot do Telegram: long polling em um processo ou, com WEBHOOK_URL, o modo webhook."""
+    if not TELEGRAM_BOT_TOKEN:
+        print("Erro: TELEGRAM_BOT_TOKEN não está definido. Verifique!")
+        return
+
+    if WEBHOOK_URL:
+        from .webhook import executar_webhook
+        executar_webhook()
+        return
+
+    if METRICAS_PORTA:
+        metricas.iniciar_servidor_metricas(METRICAS_PORTA, METRICAS_ENDERECO)
+    if METRICAS_DESPEJO_INTERVALO:
+        metricas.iniciar_despejo_periodico(METRICAS_DESPEJO_INTERVALO, METRICAS_DESPEJO_ARQUIVO)
+
+    application = construir_aplicacao()
+
     print("Bot do Telegram iniciado. Pressione Ctrl+C para encerrar.")
-    application.run_polling()
\ No newline at end of file
+    application.run_polling()
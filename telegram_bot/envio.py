@@ -0,0 +1,327 @@
+"""
+Envio de mensagens ao Telegram com controle de vazão.
+
+Respostas, edições e alertas passam por uma fila por chat (a ordem dentro
+de cada chat é mantida) que respeita:
+
+- um balde de tokens global (TELEGRAM_ENVIOS_POR_SEGUNDO): acima de ~30
+  mensagens/s o Telegram recusa os envios com 429. A taxa é adaptativa: cai
+  pela metade a cada recusa e volta aos poucos a cada envio aceito;
+- um balde por chat (uma mensagem a cada TELEGRAM_INTERVALO_CHAT segundos,
+  com rajada de TELEGRAM_RAJADA_CHAT);
+- o `retry_after` das recusas (RetryAfter): o chat fica parado pelo tempo
+  pedido e o envio é repetido, até TELEGRAM_MAX_TENTATIVAS vezes.
+
+Enquanto esperam a vez, mensagens agrupáveis do mesmo chat (as de vagas)
+são juntadas em uma só e edições seguidas da mesma mensagem ficam só com a
+última. Quem enfileira recebe o resultado da chamada (a Message enviada).
+"""
+import asyncio
+import time
+import weakref
+from collections import deque
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple, Union
+
+from telegram.error import RetryAfter
+
+from config import (
+    TELEGRAM_ENVIOS_POR_SEGUNDO, TELEGRAM_INTERVALO_CHAT, TELEGRAM_RAJADA_CHAT, TELEGRAM_MAX_TENTATIVAS
+)
+from core import metricas
+
+# Maior texto aceito em uma mensagem; mensagens agrupadas não passam disso.
+LIMITE_TEXTO = 4096
+# Menor taxa global (mensagens/s) a que as recusas podem reduzir o envio.
+TAXA_MINIMA = 1.0
+# Fração da taxa máxima recuperada por segundo sem recusas depois de uma redução.
+RECUPERACAO_TAXA = 0.1
+# Rajada global, em segundos de envio: o Telegram conta as mensagens em janelas de 1 s,
+# e a rajada mais a reposição de um segundo não pode passar do limite dele.
+RAJADA_GLOBAL = 0.2
+
+# Taxa global deste processo (no modo webhook cada trabalhador fica com uma parte)
+# e intervalo entre mensagens de um chat; valem para as filas criadas depois de alterados.
+taxa_maxima = TELEGRAM_ENVIOS_POR_SEGUNDO
+intervalo_chat = TELEGRAM_INTERVALO_CHAT
+
+
+class BaldeTokens:
+    """Balde de tokens: `taxa` tokens por segundo, acumulando até `capacidade`."""
+    __slots__ = ("taxa", "capacidade", "tokens", "atualizado")
+
+    def __init__(self, taxa: float, capacidade: float):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.tokens = capacidade
+        self.atualizado = time.monotonic()
+
+    def _repor(self):
+        agora = time.monotonic()
+        self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado) * self.taxa)
+        self.atualizado = agora
+
+    def reservar(self) -> float:
+        """Consome um token e retorna 0, ou retorna quantos segundos faltam para haver um."""
+        self._repor()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.taxa
+
+    def ate_encher(self) -> float:
+        """Segundos até o balde voltar à capacidade."""
+        self._repor()
+        return (self.capacidade - self.tokens) / self.taxa
+
+
+class _Pedido:
+    __slots__ = ("funcao", "texto", "chave", "separador", "substituir", "futuros", "tentativas", "criado")
+
+    def __init__(self, funcao, texto: str, chave: Optional[Hashable], separador: Optional[str], substituir: bool,
+                 futuro: asyncio.Future):
+        self.funcao = funcao
+        self.texto = texto
+        self.chave = chave
+        self.separador = separador
+        self.substituir = substituir
+        self.futuros: List[asyncio.Future] = [futuro]
+        self.tentativas = 0
+        self.criado = time.monotonic()
+
+    def concluir(self, resultado: Any = None, erro: Optional[BaseException] = None):
+        for futuro in self.futuros:
+            if futuro.done():
+                continue
+            if isinstance(erro, asyncio.CancelledError):
+                futuro.cancel()
+            elif erro is not None:
+                futuro.set_exception(erro)
+            else:
+                futuro.set_result(resultado)
+
+
+class _Chat:
+    __slots__ = ("fila", "balde", "pausado_ate", "tarefa")
+
+    def __init__(self, intervalo: float, rajada: int):
+        self.fila: Deque[_Pedido] = deque()
+        self.balde = BaldeTokens(1 / intervalo if intervalo > 0 else 1e9, max(1, rajada))
+        self.pausado_ate = 0.0
+        self.tarefa: Optional[asyncio.Task] = None
+
+
+def _segundos(retry_after: Union[int, float, timedelta]) -> float:
+    return retry_after.total_seconds() if isinstance(retry_after, timedelta) else float(retry_after)
+
+
+class FilaEnvio:
+    """Filas de envio por chat sob um limite global adaptativo."""
+
+    def __init__(
+        self,
+        taxa: float,
+        intervalo_chat: float = TELEGRAM_INTERVALO_CHAT,
+        rajada_chat: int = TELEGRAM_RAJADA_CHAT,
+        max_tentativas: int = TELEGRAM_MAX_TENTATIVAS,
+    ):
+        self.taxa_maxima = max(TAXA_MINIMA, taxa)
+        self.intervalo_chat = intervalo_chat
+        self.rajada_chat = rajada_chat
+        self.max_tentativas = max(1, max_tentativas)
+        self.balde = BaldeTokens(self.taxa_maxima, max(1.0, self.taxa_maxima * RAJADA_GLOBAL))
+        # Recusas até este instante vêm do mesmo excesso e não reduzem a taxa de novo
+        self._reduzida_ate = 0.0
+        self._ultimo_ajuste = time.monotonic()
+        self._chats: Dict[int, _Chat] = {}
+        # Ordem de chegada entre os chats que disputam o balde global
+        self._vez_global = asyncio.Lock()
+        # Futuros de mensagens que saíram juntadas a outras (ver `agrupada`)
+        self._agrupados: "weakref.WeakSet[asyncio.Future]" = weakref.WeakSet()
+
+    @property
+    def pendentes(self) -> int:
+        return sum(len(chat.fila) for chat in self._chats.values())
+
+    def enfileirar(
+        self,
+        chat_id: int,
+        texto: str,
+        funcao: Callable[[str], Awaitable[Any]],
+        chave: Optional[Hashable] = None,
+        separador: Optional[str] = None,
+        substituir: bool = False,
+    ) -> asyncio.Future:
+        """
+        Agenda `funcao(texto)` na fila do chat e retorna o futuro com o resultado.
+
+        Com `separador`, o texto se junta ao último pedido ainda na fila que tenha
+        a mesma `chave` (ex.: duas mensagens de vagas viram uma). Com `substituir`,
+        o texto toma o lugar do pedido pendente de mesma `chave` (ex.: edições da
+        mesma mensagem). Nos dois casos, todos recebem o resultado do envio único.
+        """
+        futuro = asyncio.get_running_loop().create_future()
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = _Chat(self.intervalo_chat, self.rajada_chat)
+            chat.tarefa = asyncio.ensure_future(self._escoar(chat_id, chat))
+
+        if chave is not None and chat.fila:
+            if substituir:
+                for pedido in chat.fila:
+                    if pedido.substituir and pedido.chave == chave:
+                        pedido.funcao, pedido.texto = funcao, texto
+                        pedido.futuros.append(futuro)
+                        metricas.incrementar("bot_telegram_agrupadas_total", tipo="edicao")
+                        return futuro
+            else:
+                # Só o último: juntar com um anterior mudaria a ordem das mensagens do chat
+                ultimo = chat.fila[-1]
+                if (separador is not None and ultimo.separador == separador and ultimo.chave == chave
+                        and len(ultimo.texto) + len(separador) + len(texto) <= LIMITE_TEXTO):
+                    ultimo.texto += separador + texto
+                    ultimo.futuros.append(futuro)
+                    self._agrupados.update(ultimo.futuros)
+                    metricas.incrementar("bot_telegram_agrupadas_total", tipo="mensagem")
+                    return futuro
+
+        chat.fila.append(_Pedido(funcao, texto, chave, separador, substituir, futuro))
+        return futuro
+
+    def agrupada(self, futuro: asyncio.Future) -> bool:
+        """True se a mensagem de `futuro` foi juntada a outras (a Message enviada não é só dela)."""
+        return futuro in self._agrupados
+
+    async def _escoar(self, chat_id: int, chat: _Chat):
+        """Envia os pedidos do chat, em ordem, enquanto houver; depois espera o ritmo do chat se recompor."""
+        try:
+            while True:
+                if not chat.fila:
+                    # Mantém o estado do chat até o balde encher, para que uma mensagem
+                    # logo em seguida ainda respeite o intervalo.
+                    espera = max(chat.balde.ate_encher(), chat.pausado_ate - time.monotonic())
+                    if espera <= 0:
+                        break
+                    await asyncio.sleep(espera)
+                    continue
+                await self._aguardar_chat(chat)
+                await self._aguardar_global()
+                await self._executar(chat, chat.fila.popleft())
+        except BaseException as e:
+            for pedido in chat.fila:
+                pedido.concluir(erro=e if isinstance(e, Exception) else asyncio.CancelledError())
+            raise
+        finally:
+            if self._chats.get(chat_id) is chat:
+                del self._chats[chat_id]
+
+    async def _aguardar_chat(self, chat: _Chat):
+        while True:
+            pausa = chat.pausado_ate - time.monotonic()
+            espera = pausa if pausa > 0 else chat.balde.reservar()
+            if not espera:
+                return
+            await asyncio.sleep(espera)
+
+    async def _aguardar_global(self):
+        async with self._vez_global:
+            espera = self.balde.reservar()
+            while espera:
+                await asyncio.sleep(espera)
+                espera = self.balde.reservar()
+
+    async def _executar(self, chat: _Chat, pedido: _Pedido):
+        metricas.observar("bot_telegram_fila_segundos", time.monotonic() - pedido.criado)
+        try:
+            with metricas.medir("bot_telegram_envio_segundos"):
+                resultado = await pedido.funcao(pedido.texto)
+        except RetryAfter as e:
+            segundos = _segundos(e.retry_after)
+            metricas.incrementar("bot_telegram_recusas_total")
+            # Recusa por excesso: o chat espera o tempo pedido e todos desaceleram
+            agora = time.monotonic()
+            chat.pausado_ate = max(chat.pausado_ate, agora + segundos)
+            self._ultimo_ajuste = agora
+            if agora >= self._reduzida_ate:
+                self._reduzida_ate = agora + segundos
+                self.balde.taxa = max(TAXA_MINIMA, self.balde.taxa / 2)
+                self.balde.tokens = min(self.balde.tokens, 0.0)
+            pedido.tentativas += 1
+            if pedido.tentativas < self.max_tentativas:
+                chat.fila.appendleft(pedido)
+            else:
+                pedido.concluir(erro=e)
+        except asyncio.CancelledError as e:
+            pedido.concluir(erro=e)
+            raise
+        except Exception as e:
+            pedido.concluir(erro=e)
+        else:
+            agora = time.monotonic()
+            if self.balde.taxa < self.taxa_maxima:
+                recuperada = (agora - self._ultimo_ajuste) * self.taxa_maxima * RECUPERACAO_TAXA
+                self.balde.taxa = min(self.taxa_maxima, self.balde.taxa + recuperada)
+            self._ultimo_ajuste = agora
+            pedido.concluir(resultado)
+
+
+# A fila fica presa ao event loop em que foi criada (como o cliente HTTP do scraper).
+_fila: Optional[FilaEnvio] = None
+_fila_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def obter_fila() -> FilaEnvio:
+    """Retorna a fila de envio do processo, criando-a no loop atual se necessário."""
+    global _fila, _fila_loop
+    loop = asyncio.get_running_loop()
+    if _fila is None or _fila_loop is not loop:
+        _fila = FilaEnvio(taxa_maxima, intervalo_chat)
+        _fila_loop = loop
+    return _fila
+
+
+async def enviar(chat_id: int, texto: str, funcao: Callable[[str], Awaitable[Any]], **opcoes) -> Any:
+    """Envia `funcao(texto)` pela fila do chat (opções em `FilaEnvio.enfileirar`) e retorna o resultado."""
+    return await obter_fila().enfileirar(chat_id, texto, funcao, **opcoes)
+
+
+def _chave_opcoes(kwargs: Dict) -> Hashable:
+    return tuple(sorted((nome, repr(valor)) for nome, valor in kwargs.items()))
+
+
+async def responder(mensagem, texto: str, agrupar: Optional[str] = None, **kwargs):
+    """`mensagem.reply_text(texto, **kwargs)` pela fila; `agrupar` é o separador para juntar mensagens pendentes."""
+    return await enviar(
+        mensagem.chat_id, texto, lambda t: mensagem.reply_text(t, **kwargs),
+        chave=("responder", _chave_opcoes(kwargs)) if agrupar is not None else None, separador=agrupar,
+    )
+
+
+async def responder_agrupavel(mensagem, texto: str, separador: str = "\n\n", **kwargs) -> Tuple[Any, bool]:
+    """
+    `responder(mensagem, texto, agrupar=separador, **kwargs)` que informa também se a
+    mensagem saiu junto com outras: nesse caso ela não deve ser editada depois, para
+    não apagar o texto das demais.
+    """
+    fila = obter_fila()
+    futuro = fila.enfileirar(
+        mensagem.chat_id, texto, lambda t: mensagem.reply_text(t, **kwargs),
+        chave=("responder", _chave_opcoes(kwargs)), separador=separador,
+    )
+    return await futuro, fila.agrupada(futuro)
+
+
+async def editar(mensagem, texto: str, **kwargs):
+    """`mensagem.edit_text(texto, **kwargs)` pela fila; só a edição mais recente ainda pendente é enviada."""
+    return await enviar(
+        mensagem.chat_id, texto, lambda t: mensagem.edit_text(t, **kwargs),
+        chave=("editar", mensagem.message_id), substituir=True,
+    )
+
+
+async def enviar_mensagem(bot, chat_id: int, texto: str, agrupar: Optional[str] = None, **kwargs):
+    """`bot.send_message(chat_id, texto, **kwargs)` pela fila (ex.: alertas, fora de uma conversa)."""
+    return await enviar(
+        chat_id, texto, lambda t: bot.send_message(chat_id=chat_id, text=t, **kwargs),
+        chave=("enviar", _chave_opcoes(kwargs)) if agrupar is not None else None, separador=agrupar,
+    )
@@ -1,25 +1,77 @@
-import io
+import asyncio
 import json
+import time
+from contextlib import aclosing
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 
+from config import PDF_MAX_BYTES
+
 # Importa as funções principais
-from core.pdf_parser import extrair_texto_pdf
-from core.cv_analyzer import analisar_cv
-from core.job_scraper import buscar_vagas
+from core import metricas
+from core.pdf_parser import extrair_texto_pdf_async
+from core.cv_analyzer import analisar_cv_async, analise_em_cache
+from core.localizacao import separar_localizacoes
 
 # Importamos as novas funções de controle de histórico
 from profiles.profile_manager import (
     salvar_perfil, 
     _validar_telefone, 
     carregar_perfil, 
-    vaga_ja_enviada, 
-    registrar_envio
+    filtrar_vagas_ineditas,
+    registrar_vagas_enviadas,
+    definir_alertas,
+    executar_no_banco
 )
+from .agendador import TarefaRecusada, tarefa_pesada
+from . import envio
 
 # --- DEFINIÇÃO DOS ESTADOS DA CONVERSA ---
 AGUARDANDO_NOME, AGUARDANDO_SOBRENOME, AGUARDANDO_TELEFONE, AGUARDANDO_LOCALIZACAO, ESCOLHER_ACAO = range(5)
 
+# Quantidade de vagas NOVAS enviadas por busca.
+LIMITE_VAGAS_NOVAS = 5
+# Vagas novas reunidas (por localização buscada) antes de escolher as mais aderentes ao perfil.
+CANDIDATOS_RANKING = 25
+# Maior lote de vagas conferido de uma vez no histórico durante a busca.
+LOTE_FILTRO_MAXIMO = 8
+# Intervalo mínimo (em segundos) entre edições da mensagem de vagas, para não esbarrar no limite do Telegram.
+INTERVALO_EDICAO = 1.0
+
+# --- FUNÇÕES AUXILIARES ---
+
+async def _responder(mensagem, texto: str, **kwargs):
+    """Responde à mensagem pela fila de envio (limites de vazão do Telegram, ver envio.py)."""
+    return await envio.responder(mensagem, texto, **kwargs)
+
+def formatar_vaga(vaga: dict) -> str:
+    """Formata uma vaga em HTML para o Telegram."""
+    return (
+        f"<b>{vaga['titulo']}</b>\n"
+        f"<i>{vaga['empresa']}</i>\n"
+        f"📍 {vaga['local']}\n"
+        f"<a href='{vaga['link']}'>Ver Vaga</a>"
+    )
+
+def juntar_vagas(vagas_formatadas: list) -> str:
+    separador = "\n\n" + ("-" * 25) + "\n\n"
+    return separador.join(vagas_formatadas)
+
+def juntar_localizacoes(localizacoes: list) -> str:
+    """'A', 'A e B', 'A, B e C'."""
+    if len(localizacoes) < 2:
+        return "".join(localizacoes)
+    return ", ".join(localizacoes[:-1]) + " e " + localizacoes[-1]
+
+def _avisar_fila(mensagem, tarefa: str):
+    """Aviso enviado quando o pedido entra na fila de tarefas pesadas."""
+    async def avisar(posicao: int):
+        await _responder(mensagem, f"⏳ Muitas {tarefa} em andamento. Você é o {posicao}º da fila; já já chega a sua vez!")
+    return avisar
+
+def _mensagem_recusa(erro: TarefaRecusada) -> str:
+    return "🚦 Estou com muitos pedidos agora. Tente novamente em alguns minutos."
+
 # --- FUNÇÕES DO FLUXO DE CONVERSA ---
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -27,7 +79,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     Inicia a interação. Verifica perfil existente e oferece menu.
     """
     user_id = update.effective_user.id
-    perfil_existente = carregar_perfil(user_id)
+    perfil_existente = await executar_no_banco(carregar_perfil, user_id)
 
     if perfil_existente and perfil_existente.get('cargo_ideal'):
         context.user_data['perfil'] = perfil_existente
@@ -47,10 +99,10 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await update.message.reply_text(msg, reply_markup=reply_markup, parse_mode='Markdown')
+        await _responder(update.message, msg, reply_markup=reply_markup, parse_mode='Markdown')
         return ESCOLHER_ACAO
     else:
-        await update.message.reply_text(
+        await _responder(update.message,
             "Olá! Sou seu assistente de busca de vagas.\n\n"
             "Para começar, por favor, envie seu currículo em formato PDF. "
             "A qualquer momento, você pode digitar /cancelar para encerrar."
@@ -63,16 +115,17 @@ async def botao_acao_handler(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
 
     if query.data == "acao_buscar":
-        await query.edit_message_text(
+        await envio.enviar(update.effective_chat.id,
             "Ótimo! Vamos usar seus dados salvos.\n\n"
-            "Para onde deseja buscar as vagas? (ex: Rio de Janeiro, Remoto, São Paulo)"
+            "Para onde deseja buscar as vagas? (ex: Rio de Janeiro, Remoto, São Paulo)",
+            query.edit_message_text
         )
         return AGUARDANDO_LOCALIZACAO
 
     elif query.data == "acao_novo_cv":
-        await query.edit_message_text(
+        await envio.enviar(update.effective_chat.id,
             "Entendido. Por favor, envie o *novo arquivo PDF* do seu currículo.",
-            parse_mode='Markdown'
+            lambda texto: query.edit_message_text(texto, parse_mode='Markdown')
         )
         return ConversationHandler.END
 
@@ -81,134 +134,260 @@ async def receber_cv(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.message.from_user.id
     
     try:
-        pdf_file = await context.bot.get_file(update.message.document.file_id)
-        pdf_bytes = io.BytesIO(await pdf_file.download_as_bytearray())
-        await update.message.reply_text("Currículo recebido! Analisando as informações com a IA... 🧠")
-
-        texto_cv = extrair_texto_pdf(pdf_bytes)
-        if not texto_cv:
-            await update.message.reply_text("❌ Erro: Não consegui ler o texto do PDF.")
+        tamanho = update.message.document.file_size
+        if tamanho and tamanho > PDF_MAX_BYTES:
+            await _responder(update.message,
+                f"❌ Erro: O PDF é grande demais (limite de {PDF_MAX_BYTES // (1024 * 1024)} MB)."
+            )
             return ConversationHandler.END
 
-        perfil_ia = analisar_cv(texto_cv)
+        with metricas.medir("bot_telegram_download_segundos"):
+            pdf_file = await context.bot.get_file(update.message.document.file_id)
+            pdf_conteudo = bytes(await pdf_file.download_as_bytearray())
+        await _responder(update.message, "Currículo recebido! Analisando as informações com a IA... 🧠")
+
+        # O mesmo PDF já analisado antes dispensa a extração e a chamada à IA
+        perfil_ia = await executar_no_banco(analise_em_cache, pdf_conteudo)
+
         if not perfil_ia:
-            await update.message.reply_text("❌ Erro: A análise do currículo falhou. Tente novamente.")
-            return ConversationHandler.END
+            async with tarefa_pesada("cv", user_id, _avisar_fila(update.message, "análises de currículo")):
+                with metricas.medir("bot_pdf_extracao_segundos"):
+                    texto_cv = await extrair_texto_pdf_async(pdf_conteudo)
+                if not texto_cv:
+                    await _responder(update.message, "❌ Erro: Não consegui ler o texto do PDF.")
+                    return ConversationHandler.END
+
+                with metricas.medir("bot_analise_cv_segundos"):
+                    perfil_ia = await analisar_cv_async(texto_cv, pdf_bytes=pdf_conteudo)
+            if not perfil_ia:
+                await _responder(update.message, "❌ Erro: A análise do currículo falhou. Tente novamente.")
+                return ConversationHandler.END
         
-        salvar_perfil(user_id, perfil_ia)
+        await executar_no_banco(salvar_perfil, user_id, perfil_ia)
         context.user_data['perfil'] = perfil_ia 
 
         # Se já tem cadastro completo, pula para localização
-        perfil_banco = carregar_perfil(user_id)
+        perfil_banco = await executar_no_banco(carregar_perfil, user_id)
         if perfil_banco and perfil_banco.get('nome') and perfil_banco.get('telefone'):
              context.user_data['perfil'] = perfil_banco
-             await update.message.reply_text(
+             await _responder(update.message,
                 f"Currículo atualizado! Novo cargo detectado: *{perfil_ia.get('cargo_ideal')}*.\n"
                 f"Como já tenho seus dados, informe a *localização* para a busca.",
                 parse_mode='Markdown'
              )
              return AGUARDANDO_LOCALIZACAO
 
-        await update.message.reply_text(
+        await _responder(update.message,
             f"Análise concluída! Cargo ideal identificado: *{perfil_ia.get('cargo_ideal', 'N/A')}*\n\n"
             "Para finalizar, qual é o seu *primeiro nome*?",
             parse_mode='Markdown'
         )
         return AGUARDANDO_NOME 
 
+    except TarefaRecusada as e:
+        await _responder(update.message, _mensagem_recusa(e))
+        return ConversationHandler.END
+    except asyncio.CancelledError:
+        # Cancelamento do próprio handler (bot desligando) segue adiante; o de uma etapa
+        # (ex.: a extração, quando o pool de PDFs é encerrado) vira resposta ao usuário.
+        if asyncio.current_task().cancelling():
+            raise
+        print("Processamento do CV interrompido.")
+        await _responder(update.message, "❌ A leitura do currículo foi interrompida. Envie o PDF novamente.")
+        return ConversationHandler.END
     except Exception as e:
         print(f"Erro crítico ao processar o CV: {e}")
-        await update.message.reply_text("❌ Ocorreu um erro inesperado.")
+        await _responder(update.message, "❌ Ocorreu um erro inesperado.")
         return ConversationHandler.END
 
 async def receber_nome(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.message.from_user.id
     nome = update.message.text.strip()
-    salvar_perfil(user_id, {"nome": nome})
-    await update.message.reply_text(f"Ótimo, {nome}! Agora, qual o seu *sobrenome*?")
+    await executar_no_banco(salvar_perfil, user_id, {"nome": nome})
+    await _responder(update.message, f"Ótimo, {nome}! Agora, qual o seu *sobrenome*?")
     return AGUARDANDO_SOBRENOME
 
 async def receber_sobrenome(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.message.from_user.id
     sobrenome = update.message.text.strip()
-    salvar_perfil(user_id, {"sobrenome": sobrenome})
-    await update.message.reply_text("Informe seu *telefone* (com DDD) ou digite /pular.")
+    await executar_no_banco(salvar_perfil, user_id, {"sobrenome": sobrenome})
+    await _responder(update.message, "Informe seu *telefone* (com DDD) ou digite /pular.")
     return AGUARDANDO_TELEFONE
 
 async def receber_telefone(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.message.from_user.id
     telefone = update.message.text.strip()
     if not _validar_telefone(telefone):
-        await update.message.reply_text("❌ Telefone inválido. Tente novamente ou digite /pular.")
+        await _responder(update.message, "❌ Telefone inválido. Tente novamente ou digite /pular.")
         return AGUARDANDO_TELEFONE 
-    salvar_perfil(user_id, {"telefone": telefone})
-    await update.message.reply_text("✅ Telefone salvo! Informe a *localização* para a busca.", parse_mode='Markdown')
+    await executar_no_banco(salvar_perfil, user_id, {"telefone": telefone})
+    await _responder(update.message, "✅ Telefone salvo! Informe a *localização* para a busca.", parse_mode='Markdown')
     return AGUARDANDO_LOCALIZACAO
 
 async def pular_telefone(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    await update.message.reply_text("Ok. Informe a *localização* para a busca.", parse_mode='Markdown')
+    await _responder(update.message, "Ok. Informe a *localização* para a busca.", parse_mode='Markdown')
     return AGUARDANDO_LOCALIZACAO
 
+async def _buscar_e_enviar(update: Update, perfil: dict, cargo: str, localizacoes: list):
+    """Busca as vagas (em todas as localizações ao mesmo tempo), mostra as melhores à medida que chegam e registra as enviadas."""
+    # Importado na primeira busca: o scraper e o parser de HTML não precisam atrasar a partida do bot.
+    from core.job_scraper import iterar_vagas
+
+    user_id = update.effective_user.id
+    await _responder(update.message,
+        f"🚀 Buscando vagas de *{cargo}* em *{juntar_localizacoes(localizacoes)}*...", parse_mode='Markdown'
+    )
+
+    cabecalho = "✅ Encontrei estas vagas *NOVAS* para você:\n\n"
+    rodape_buscando = "\n\n⏳ Buscando mais vagas..."
+    candidatas = []
+    encontrou_vagas = False
+    mensagem_vagas = None
+    agrupada = False
+    texto_exibido = ""
+    ultima_edicao = 0.0
+
+    async def _exibir(texto: str, final: bool = False):
+        """
+        Publica a primeira vaga e, depois, edita a mesma mensagem (no máximo 1 edição por intervalo).
+        As mensagens de vagas pendentes para o chat saem juntas (envio.py); se a primeira foi juntada
+        a outras, ela não é editada e a lista final vai em uma mensagem nova.
+        """
+        nonlocal mensagem_vagas, agrupada, texto_exibido, ultima_edicao
+        if agrupada and not final:
+            return
+        if mensagem_vagas is None or agrupada:
+            mensagem_vagas, agrupada = await envio.responder_agrupavel(
+                update.message, texto, parse_mode='HTML', disable_web_page_preview=True
+            )
+        else:
+            try:
+                with metricas.medir("bot_telegram_edicao_segundos"):
+                    await envio.editar(mensagem_vagas, texto, parse_mode='HTML', disable_web_page_preview=True)
+            except Exception as e:
+                print(f"Erro ao atualizar a mensagem de vagas: {e}")
+                return
+        texto_exibido = texto
+        ultima_edicao = time.monotonic()
+
+    def _melhores():
+        # Importado na primeira busca: o NumPy não precisa atrasar a partida do bot.
+        from core.ranking import ordenar_vagas
+
+        return ordenar_vagas(candidatas, perfil)[:LIMITE_VAGAS_NOVAS]
+
+    def _texto(vagas_exibidas):
+        return cabecalho + juntar_vagas([formatar_vaga(vaga) for vaga in vagas_exibidas])
+
+    pendentes = []
+    tamanho_lote = 1
+    # Cada localização contribui com candidatas para o ranking da resposta única
+    max_candidatas = CANDIDATOS_RANKING * len(localizacoes)
+
+    async def _filtrar_pendentes():
+        """Descarta das pendentes o que o usuário já recebeu (mesma vaga ou republicação) e o que repete uma candidata."""
+        nonlocal tamanho_lote
+        candidatas.extend(await executar_no_banco(filtrar_vagas_ineditas, user_id, pendentes, candidatas))
+        pendentes.clear()
+        tamanho_lote = min(tamanho_lote * 2, LOTE_FILTRO_MAXIMO)
+
+    # As vagas passam pelo filtro de duplicatas em lotes que começam com 1 e dobram:
+    # a primeira vaga nova aparece logo e as seguintes custam poucas consultas.
+    # A mensagem mostra as melhores até o momento; ao reunir candidatas suficientes,
+    # o aclosing encerra a busca e cancela as páginas que não chegaram.
+    async with aclosing(iterar_vagas(cargo, localizacoes)) as vagas:
+        async for vaga in vagas:
+            encontrou_vagas = True
+            pendentes.append(vaga)
+            if len(pendentes) < tamanho_lote:
+                continue
+
+            await _filtrar_pendentes()
+            if len(candidatas) >= max_candidatas:
+                break
+
+            # A primeira vaga sai na hora; as seguintes respeitam o intervalo entre edições
+            if candidatas and (mensagem_vagas is None or time.monotonic() - ultima_edicao >= INTERVALO_EDICAO):
+                await _exibir(_texto(_melhores()) + rodape_buscando)
+
+    if pendentes:
+        await _filtrar_pendentes()
+
+    # Registra as vagas escolhidas de uma vez, em uma única transação
+    vagas_escolhidas = _melhores()
+    await executar_no_banco(registrar_vagas_enviadas, user_id, vagas_escolhidas)
+
+    if vagas_escolhidas:
+        texto_final = _texto(vagas_escolhidas)
+        if texto_final != texto_exibido:
+            await _exibir(texto_final, final=True)
+    elif encontrou_vagas:
+        # Se encontrou vagas no scraper, mas todas já tinham sido enviadas antes
+        await _responder(update.message,
+            "🔎 Encontrei vagas, mas parece que eu já te enviei todas elas anteriormente!\n"
+            "Tente buscar novamente amanhã ou mude a região da busca."
+        )
+    else:
+        await _responder(update.message, "😕 Nenhuma vaga encontrada para os critérios informados.")
+
 async def receber_localizacao_e_buscar(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    """Recebe a localização, busca vagas e filtra duplicatas."""
-    localizacao = update.message.text.strip()
+    """Recebe a localização (ou várias, separadas por vírgula), busca vagas e filtra duplicatas."""
+    localizacoes = separar_localizacoes(update.message.text)
     perfil = context.user_data.get('perfil')
     user_id = update.effective_user.id
 
     if not perfil or 'cargo_ideal' not in perfil:
-        await update.message.reply_text("❌ Erro de perfil. Digite /start.")
+        await _responder(update.message, "❌ Erro de perfil. Digite /start.")
         return ConversationHandler.END
+    if not localizacoes:
+        await _responder(update.message, "Não entendi a localização. Exemplo: Rio de Janeiro, Niterói, Remoto")
+        return AGUARDANDO_LOCALIZACAO
 
     cargo = perfil['cargo_ideal']
-    await update.message.reply_text(f"🚀 Buscando vagas de *{cargo}* em *{localizacao}*...", parse_mode='Markdown')
-
-    vagas = buscar_vagas(cargo, localizacao)
+    localizacao = ", ".join(localizacoes)
+    # A última localização buscada é a usada pelos alertas periódicos
+    await executar_no_banco(salvar_perfil, user_id, {"localizacao": localizacao})
+    perfil['localizacao'] = localizacao
 
-    if vagas:
-        lista_vagas_texto = []
-        contador_novas = 0
-        
-        # Itera sobre todas as vagas encontradas para filtrar as já enviadas
-        for vaga in vagas:
-            # Verifica se já enviou
-            if vaga_ja_enviada(user_id, vaga['link']):
-                continue
-                
-            # Formatação HTML
-            vaga_formatada = (
-                f"<b>{vaga['titulo']}</b>\n"
-                f"<i>{vaga['empresa']}</i>\n"
-                f"📍 {vaga['local']}\n"
-                f"<a href='{vaga['link']}'>Ver Vaga</a>"
-            )
-            lista_vagas_texto.append(vaga_formatada)
-            
-            # Registra como enviada no banco
-            registrar_envio(user_id, vaga['link'])
-            
-            contador_novas += 1
-            if contador_novas >= 5: # Limita a mostrar 5 vagas NOVAS por vez
-                break
-        
-        if not lista_vagas_texto:
-            # Se encontrou vagas no scraper, mas todas já tinham sido enviadas antes
-            await update.message.reply_text(
-                "🔎 Encontrei vagas, mas parece que eu já te enviei todas elas anteriormente!\n"
-                "Tente buscar novamente amanhã ou mude a região da busca."
-            )
-        else:
-            separador = "\n\n" + ("-" * 25) + "\n\n"
-            corpo_mensagem = separador.join(lista_vagas_texto)
-            mensagem_final = f"✅ Encontrei estas vagas *NOVAS* para você:\n\n{corpo_mensagem}"
-            
-            await update.message.reply_text(mensagem_final, parse_mode='HTML', disable_web_page_preview=True)
-            
-    else:
-        await update.message.reply_text("😕 Nenhuma vaga encontrada para os critérios informados.")
+    try:
+        async with tarefa_pesada("busca", user_id, _avisar_fila(update.message, "buscas")):
+            await _buscar_e_enviar(update, perfil, cargo, localizacoes)
+    except TarefaRecusada as e:
+        await _responder(update.message, _mensagem_recusa(e) + "\nDepois, é só me mandar a localização de novo.")
+        return AGUARDANDO_LOCALIZACAO
 
-    await update.message.reply_text("Busca encerrada. Digite /start se quiser fazer uma nova busca!")
+    mensagem_fim = "Busca encerrada. Digite /start se quiser fazer uma nova busca!"
+    if not perfil.get('alertas_ativos'):
+        mensagem_fim += "\nPara receber vagas novas desta busca automaticamente, digite /alertas."
+    await _responder(update.message, mensagem_fim)
     return ConversationHandler.END
 
 async def cancelar(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    await update.message.reply_text("Conversa encerrada.")
-    return ConversationHandler.END
\ No newline at end of file
+    await _responder(update.message, "Conversa encerrada.")
+    return ConversationHandler.END
+
+# --- ALERTAS PERIÓDICOS ---
+
+async def ativar_alertas(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Inscreve o usuário nos alertas da sua última busca (cargo + localização)."""
+    user_id = update.effective_user.id
+    perfil = await executar_no_banco(carregar_perfil, user_id)
+    if not perfil or not perfil.get('cargo_ideal') or not perfil.get('localizacao'):
+        await _responder(update.message, "Faça uma busca primeiro (digite /start) para eu saber o que procurar.")
+        return
+
+    await executar_no_banco(definir_alertas, user_id, True)
+    if 'perfil' in context.user_data:
+        context.user_data['perfil']['alertas_ativos'] = True
+    await _responder(update.message,
+        f"🔔 Alertas ativados! Vou te avisar sobre vagas novas de *{perfil['cargo_ideal']}* "
+        f"em *{perfil['localizacao']}*.\nPara parar, digite /parar\\_alertas.",
+        parse_mode='Markdown'
+    )
+
+async def desativar_alertas(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = update.effective_user.id
+    await executar_no_banco(definir_alertas, user_id, False)
+    if 'perfil' in context.user_data:
+        context.user_data['perfil']['alertas_ativos'] = False
+    await _responder(update.message, "🔕 Alertas desativados. Digite /alertas para reativar.")
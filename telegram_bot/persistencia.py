@@ -0,0 +1,106 @@
+"""
+Persistência do estado do bot (conversas e user_data) no SQLite do projeto.
+
+Com o estado fora da memória, o bot pode ser reiniciado no meio de uma
+conversa e vários processos podem atender o mesmo bot (ver
+telegram_bot/webhook.py). O `user_data` de um usuário é lido do banco
+quando chega um update dele, e não na partida: cada processo só guarda os
+usuários que atendeu, e a cópia em memória só prevalece sobre a do banco
+enquanto tiver alterações ainda não gravadas. As mudanças são gravadas a
+cada `intervalo` segundos e no encerramento.
+"""
+import hashlib
+import json
+from copy import deepcopy
+from typing import Any, Dict, Optional, Tuple
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from profiles.profile_manager import (
+    carregar_dados_usuario,
+    carregar_estados_conversa,
+    executar_no_banco,
+    gravar_dados_usuario,
+    gravar_estado_conversa,
+    remover_dados_usuario
+)
+
+
+
+def _impressao(dados: Dict) -> bytes:
+    conteudo = json.dumps(dados, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(conteudo.encode("utf-8"), digest_size=16).digest()
+
+
+class PersistenciaSQLite(BasePersistence):
+    """Guarda `user_data` e os estados dos ConversationHandlers; chat_data, bot_data e callback_data não são usados."""
+
+    def __init__(self, intervalo: float = 5):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=intervalo,
+        )
+        # user_id -> impressão do user_data como está no banco (lido ou gravado por este processo)
+        self._no_banco: Dict[int, bytes] = {}
+
+    async def get_user_data(self) -> Dict[int, Dict]:
+        # Nada na partida: cada usuário é carregado em refresh_user_data, no primeiro update dele.
+        return {}
+
+    async def get_chat_data(self) -> Dict[int, Dict]:
+        return {}
+
+    async def get_bot_data(self) -> Dict:
+        return {}
+
+    async def get_callback_data(self) -> Optional[Any]:
+        return None
+
+    async def get_conversations(self, name: str) -> Dict[Tuple, Any]:
+        return await executar_no_banco(carregar_estados_conversa, name)
+
+    async def update_conversation(self, name: str, key: Tuple, new_state: Optional[object]):
+        await executar_no_banco(gravar_estado_conversa, name, key, new_state)
+
+    async def update_user_data(self, user_id: int, data: Dict):
+        # Cópia: o handler pode alterar o dicionário enquanto ele é serializado em outra thread
+        copia = deepcopy(data)
+        await executar_no_banco(gravar_dados_usuario, user_id, copia)
+        self._no_banco[user_id] = _impressao(copia)
+
+    async def update_chat_data(self, chat_id: int, data: Dict):
+        pass
+
+    async def update_bot_data(self, data: Dict):
+        pass
+
+    async def update_callback_data(self, data: Any):
+        pass
+
+    async def drop_chat_data(self, chat_id: int):
+        pass
+
+    async def drop_user_data(self, user_id: int):
+        await executar_no_banco(remover_dados_usuario, user_id)
+        self._no_banco.pop(user_id, None)
+
+    async def refresh_user_data(self, user_id: int, user_data: Dict):
+        # Chamado antes de cada update do usuário (que são tratados um por vez, ver agendador.py).
+        # Alterações deste processo ainda não gravadas mantêm a cópia em memória; senão, vale o banco.
+        impressao = self._no_banco.get(user_id)
+        if impressao is not None and _impressao(user_data) != impressao:
+            return
+        dados = await executar_no_banco(carregar_dados_usuario, user_id)
+        user_data.clear()
+        user_data.update(dados)
+        self._no_banco[user_id] = _impressao(dados)
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: Dict):
+        pass
+
+    async def refresh_bot_data(self, bot_data: Dict):
+        pass
+
+    async def flush(self):
+        # As gravações já são feitas uma a uma em update_*.
+        pass
@@ -0,0 +1,217 @@
+"""
+Modo webhook com vários processos.
+
+Um servidor HTTP local recebe os updates que o Telegram envia para
+WEBHOOK_URL e os repassa, sem processar, a BOT_PROCESSOS processos
+trabalhadores. O processo é escolhido pelo id do usuário do update, então
+os updates de um mesmo usuário chegam sempre, e em ordem, ao mesmo
+trabalhador, enquanto usuários diferentes são atendidos em paralelo.
+
+Os trabalhadores não guardam estado próprio: conversas e user_data ficam no
+SQLite (ver telegram_bot/persistencia.py); os estados das conversas são
+carregados na partida e o user_data de cada usuário, no primeiro update
+dele, então os processos podem ser reiniciados ou ter a quantidade alterada
+entre uma execução e outra. Só o trabalhador 0 roda as tarefas periódicas (alertas e
+compactação do histórico).
+
+Todo update precisa trazer o token secreto (WEBHOOK_SEGREDO, ou um gerado na
+partida) no cabeçalho X-Telegram-Bot-Api-Secret-Token; sem ele, qualquer um
+que alcançasse a porta poderia enviar updates em nome de qualquer usuário.
+"""
+import asyncio
+import hmac
+import json
+import multiprocessing
+import queue
+import secrets
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from telegram import Bot, Update
+
+from config import (
+    TELEGRAM_BOT_TOKEN, TELEGRAM_API_URL, METRICAS_PORTA, METRICAS_ENDERECO,
+    WEBHOOK_URL, WEBHOOK_ENDERECO, WEBHOOK_PORTA, WEBHOOK_SEGREDO, WEBHOOK_MAX_FILA, BOT_PROCESSOS,
+    TELEGRAM_ENVIOS_POR_SEGUNDO
+)
+from core import metricas
+from profiles import profile_manager
+from . import envio
+
+# Tempo máximo (em segundos) que um trabalhador tem para terminar os updates pendentes ao encerrar.
+ESPERA_ENCERRAMENTO = 30
+
+
+def chave_roteamento(dados: Dict) -> int:
+    """Id do usuário que originou o update (ou do chat, se não houver usuário); 0 se não houver nenhum."""
+    for valor in dados.values():
+        if not isinstance(valor, dict):
+            continue
+        for campo in ("from", "user", "chat"):
+            origem = valor.get(campo)
+            if isinstance(origem, dict) and "id" in origem:
+                return origem["id"]
+    return 0
+
+
+def _trabalhador(indice: int, fila, caminho_banco: str, tarefas_periodicas: bool, porta_metricas: int,
+                 processos: int):
+    """Processo trabalhador: um Application sem updater alimentado pela fila."""
+    # O Ctrl+C chega ao grupo de processos inteiro; quem encerra os trabalhadores é o servidor.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    profile_manager.DB_PATH = caminho_banco
+    # O limite de envios do Telegram é por bot: cada trabalhador fica com a sua parte.
+    envio.taxa_maxima = TELEGRAM_ENVIOS_POR_SEGUNDO / processos
+    if porta_metricas:
+        metricas.iniciar_servidor_metricas(porta_metricas, METRICAS_ENDERECO)
+    asyncio.run(_atender(fila, tarefas_periodicas))
+
+
+async def _atender(fila, tarefas_periodicas: bool):
+    from .bot import construir_aplicacao
+
+    application = construir_aplicacao(com_updater=False, tarefas_periodicas=tarefas_periodicas)
+    loop = asyncio.get_running_loop()
+    async with application:
+        await application.start()
+        while True:
+            corpo = await loop.run_in_executor(None, fila.get)
+            if corpo is None:
+                break
+            try:
+                update = Update.de_json(json.loads(corpo), application.bot)
+            except Exception as e:
+                print(f"Update inválido descartado: {e}")
+                continue
+            await application.update_queue.put(update)
+        # Processa o que já estava na fila e grava o estado no banco (shutdown)
+        await application.stop()
+    await application.post_shutdown(application)
+
+
+class ServidorWebhook:
+    """Servidor HTTP do webhook e os processos trabalhadores."""
+
+    def __init__(
+        self,
+        processos: int = BOT_PROCESSOS,
+        endereco: str = WEBHOOK_ENDERECO,
+        porta: int = WEBHOOK_PORTA,
+        caminho: Optional[str] = None,
+        segredo: str = WEBHOOK_SEGREDO,
+        max_fila: int = WEBHOOK_MAX_FILA,
+    ):
+        self.processos = max(1, processos)
+        self.endereco = endereco
+        self.porta = porta
+        self.caminho = caminho if caminho is not None else (urlsplit(WEBHOOK_URL).path or "/")
+        self.segredo = segredo
+        self.max_fila = max_fila
+        if not segredo:
+            raise ValueError("O modo webhook exige um token secreto (WEBHOOK_SEGREDO).")
+        self.filas: List = []
+        self.trabalhadores: List[multiprocessing.Process] = []
+        self.encaminhados: List[int] = []
+        self._servidor: Optional[ThreadingHTTPServer] = None
+
+    def iniciar(self):
+        # spawn: os trabalhadores não herdam threads, conexões e pools do processo pai
+        contexto = multiprocessing.get_context("spawn")
+        self.filas = [contexto.Queue(self.max_fila) for _ in range(self.processos)]
+        self.encaminhados = [0] * self.processos
+        for indice, fila in enumerate(self.filas):
+            processo = contexto.Process(
+                target=_trabalhador,
+                args=(indice, fila, profile_manager.DB_PATH, indice == 0,
+                      METRICAS_PORTA + indice if METRICAS_PORTA else 0, self.processos),
+                name=f"bot-trabalhador-{indice}",
+            )
+            processo.start()
+            self.trabalhadores.append(processo)
+
+        servidor_webhook = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if urlsplit(self.path).path != servidor_webhook.caminho:
+                    self._responder(404)
+                    return
+                recebido = self.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+                if not hmac.compare_digest(recebido.encode(), servidor_webhook.segredo.encode()):
+                    self._responder(403)
+                    return
+                corpo = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                try:
+                    dados = json.loads(corpo)
+                except ValueError:
+                    self._responder(400)
+                    return
+                self._responder(servidor_webhook.encaminhar(dados, corpo))
+
+            def _responder(self, status: int):
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer((self.endereco, self.porta), _Handler)
+        self._servidor.daemon_threads = True
+        self.porta = self._servidor.server_port
+        threading.Thread(target=self._servidor.serve_forever, name="webhook", daemon=True).start()
+
+    def encaminhar(self, dados: Dict, corpo: bytes) -> int:
+        """Coloca o update na fila do trabalhador do usuário. Retorna o status HTTP da resposta ao Telegram."""
+        indice = chave_roteamento(dados) % self.processos
+        try:
+            self.filas[indice].put(corpo, timeout=1)
+        except queue.Full:
+            # O Telegram reenvia o update mais tarde
+            return 503
+        self.encaminhados[indice] += 1
+        return 200
+
+    def encerrar(self):
+        """Para de receber updates e espera os trabalhadores terminarem os pendentes."""
+        if self._servidor:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+        for fila in self.filas:
+            fila.put(None)
+        for processo in self.trabalhadores:
+            processo.join(ESPERA_ENCERRAMENTO)
+            if processo.is_alive():
+                print(f"{processo.name} não encerrou a tempo; finalizando.")
+                processo.terminate()
+        self.trabalhadores.clear()
+
+
+async def registrar_webhook(segredo: str, url: str = WEBHOOK_URL):
+    """Informa ao Telegram a URL pública do webhook e o token secreto que ele deve enviar."""
+    base_url = f"{TELEGRAM_API_URL}/bot" if TELEGRAM_API_URL else "https://api.telegram.org/bot"
+    async with Bot(TELEGRAM_BOT_TOKEN, base_url=base_url) as bot:
+        await bot.set_webhook(url, secret_token=segredo, allowed_updates=Update.ALL_TYPES)
+
+
+def executar_webhook():
+    """Sobe o servidor e os trabalhadores, registra o webhook e roda até Ctrl+C."""
+    # Sem WEBHOOK_SEGREDO, um token novo por partida (o registro do webhook o atualiza no Telegram).
+    segredo = WEBHOOK_SEGREDO or secrets.token_urlsafe(32)
+    servidor = ServidorWebhook(segredo=segredo)
+    servidor.iniciar()
+    try:
+        asyncio.run(registrar_webhook(segredo))
+        print(
+            f"Bot do Telegram em modo webhook ({WEBHOOK_URL}) na porta {servidor.porta}, "
+            f"com {servidor.processos} processos. Pressione Ctrl+C para encerrar."
+        )
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.encerrar()